@@ -31,6 +31,9 @@ try:
     from src.chatbot import ChatBot
     from src.feedback_manager import FeedbackManager
     from src.training_manager import TrainingManager
+    from src.training_scheduler import training_scheduler
+    from src.feedback_store import get_feedback_store
+    from src.chat_ring_buffer import get_chat_history, get_chat_store
     from src.analytics import Analytics
     from src.utils import initialize_data_files, log_activity, safe_load_json, safe_save_json
 except ImportError as e:
@@ -47,6 +50,7 @@ def initialize_components():
         chatbot = ChatBot()
         feedback_manager = FeedbackManager()
         training_manager = TrainingManager()
+        training_scheduler.set_manager(training_manager)
         analytics = Analytics()
         return chatbot, feedback_manager, training_manager, analytics
     except Exception as e:
@@ -870,6 +874,8 @@ def init_session_state():
         st.session_state.page_visits = defaultdict(int)
     if "session_start_time" not in st.session_state:
         st.session_state.session_start_time = datetime.now()
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = str(uuid.uuid4())
 
 # Helper functions
 def get_confidence_class(confidence):
@@ -920,11 +926,10 @@ def render_sidebar():
         
         # Enhanced quick stats
         try:
-            chat_history = safe_load_json(Config.CHAT_HISTORY_FILE, [])
-            feedback_data = safe_load_json(Config.FEEDBACK_DATA_FILE, [])
+            feedback_counters = get_feedback_store().stats()
             
-            total_chats = len(chat_history)
-            total_feedback = len(feedback_data)
+            total_chats = len(get_chat_store())
+            total_feedback = feedback_counters["total"]
             
             st.markdown("### 📈 Quick Stats")
             
@@ -935,8 +940,7 @@ def render_sidebar():
             
             with col2:
                 if total_feedback > 0:
-                    positive_feedback = sum(1 for f in feedback_data if f.get("feedback_type") == "positive")
-                    satisfaction_rate = (positive_feedback / total_feedback) * 100
+                    satisfaction_rate = (feedback_counters["positive"] / total_feedback) * 100
                     st.metric("😊 Satisfaction", f"{satisfaction_rate:.1f}%")
                 
                 # Session time
@@ -1101,13 +1105,14 @@ def render_chat_page():
         # Get bot response with enhanced error handling
         with st.spinner("🤔 Thinking..."):
             try:
-                response_data = chatbot.get_response(user_input)
+                response_data = chatbot.get_response(user_input, session_id=st.session_state.session_id)
                 
                 bot_message = {
                     "role": "bot",
                     "content": response_data["response"],
                     "confidence": response_data["confidence"],
                     "model_source": response_data["model_source"],
+                    "model_tier": response_data.get("model_tier"),
                     "query": user_input,
                     "timestamp": datetime.now().isoformat(),
                     "id": str(uuid.uuid4())
@@ -1115,7 +1120,7 @@ def render_chat_page():
                 st.session_state.messages.append(bot_message)
                 
                 # Save to history
-                feedback_manager.save_chat_history(user_input, response_data)
+                feedback_manager.save_chat_history(user_input, response_data, session_id=st.session_state.session_id)
                 
             except Exception as e:
                 error_message = {
@@ -1393,6 +1398,138 @@ def render_analytics_page():
                 
                 st.plotly_chart(fig_gauge, use_container_width=True)
         
+        feedback_trend = analytics.get_feedback_trend()
+        if any(day["positive"] or day["negative"] for day in feedback_trend):
+            fig_trend = px.bar(
+                pd.DataFrame(feedback_trend),
+                x="date",
+                y=["positive", "negative"],
+                title="Feedback over the Last 14 Days",
+                labels={"date": "Date", "value": "Feedback", "variable": "Type"},
+                color_discrete_sequence=['#10b981', '#ef4444'],
+                template="plotly_white"
+            )
+            
+            fig_trend.update_layout(
+                plot_bgcolor='rgba(0,0,0,0)',
+                paper_bgcolor='rgba(0,0,0,0)',
+                title_font_size=18,
+                title_font_color='#1e293b',
+                font=dict(family="Inter", size=12),
+                height=350
+            )
+            
+            st.plotly_chart(fig_trend, use_container_width=True)
+        
+        # Runtime performance of the LLM fallback path
+        st.markdown("---")
+        st.markdown("### ⚡ Runtime Performance")
+        
+        runtime_metrics = analytics.get_runtime_metrics()
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        runtime_cards = [
+            ("Groq Requests", str(runtime_metrics['groq_requests']), "🚀"),
+            ("Coalesced", f"{runtime_metrics['coalesced_requests']} ({runtime_metrics['coalesced_rate']:.1f}%)", "🔗"),
+            ("Limiter Wait p95", f"{runtime_metrics['limiter_wait_p95']:.2f}s", "⏳"),
+            ("Rate Limited", str(runtime_metrics['limiter_rejections']), "🚦")
+        ]
+        
+        for i, (label, value, icon) in enumerate(runtime_cards):
+            with [col1, col2, col3, col4][i]:
+                st.markdown(create_metric_card(label, value, icon), unsafe_allow_html=True)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        hedge_cards = [
+            ("Hedge Rate", f"{runtime_metrics['hedge_rate']:.1f}%", "🪁"),
+            ("Hedge Wins", str(runtime_metrics['hedge_wins']), "🏁"),
+            ("Avg Time Saved", f"{runtime_metrics['latency_saved_avg']:.2f}s", "⚡"),
+            ("Failovers", str(runtime_metrics['failovers']), "🔀")
+        ]
+        
+        for i, (label, value, icon) in enumerate(hedge_cards):
+            with [col1, col2, col3, col4][i]:
+                st.markdown(create_metric_card(label, value, icon), unsafe_allow_html=True)
+        
+        col1, col2, col3 = st.columns(3)
+        
+        # Each hit is a question that did not reach the LLM
+        retrieval_cards = [
+            ("FAQ Lookups", str(runtime_metrics['retrieval_queries']), "🔎"),
+            ("FAQ Hits", str(runtime_metrics['retrieval_hits']), "📚"),
+            ("FAQ Hit Rate", f"{runtime_metrics['retrieval_hit_rate']:.1f}%", "🎯")
+        ]
+        
+        for i, (label, value, icon) in enumerate(retrieval_cards):
+            with [col1, col2, col3][i]:
+                st.markdown(create_metric_card(label, value, icon), unsafe_allow_html=True)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        cache_cards = [
+            ("Stale Served", str(runtime_metrics['stale_served']), "🕰️"),
+            ("Stale on Error", str(runtime_metrics['stale_served_upstream_error']), "🛟"),
+            ("Stale on Timeout", str(runtime_metrics['stale_served_budget']), "⏱️"),
+            ("Revalidated", f"{runtime_metrics['revalidation_successes']}/{runtime_metrics['revalidations']}", "🔄")
+        ]
+        
+        for i, (label, value, icon) in enumerate(cache_cards):
+            with [col1, col2, col3, col4][i]:
+                st.markdown(create_metric_card(label, value, icon), unsafe_allow_html=True)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        quota_cards = [
+            ("LLM Quota Used", f"{runtime_metrics['quota_request_utilization']:.0f}% req / {runtime_metrics['quota_token_utilization']:.0f}% tok", "📊"),
+            ("Active Sessions", str(runtime_metrics['quota_active_sessions']), "👥"),
+            ("Shed Requests", f"{runtime_metrics['quota_shed']} (R{runtime_metrics['quota_degraded_rasa']}/C{runtime_metrics['quota_degraded_cache']}/Q{runtime_metrics['quota_degraded_queued']})", "🪫"),
+            ("Deferred Queue", str(runtime_metrics['quota_queue_length']), "📥")
+        ]
+        
+        for i, (label, value, icon) in enumerate(quota_cards):
+            with [col1, col2, col3, col4][i]:
+                st.markdown(create_metric_card(label, value, icon), unsafe_allow_html=True)
+        
+        if Config.PREFETCH_ENABLED:
+            col1, col2, col3, col4 = st.columns(4)
+            
+            prefetch_cards = [
+                ("Prefetched Answers", str(runtime_metrics['prefetch_computed']), "🔮"),
+                ("Prefetch Hits", str(runtime_metrics['prefetch_hits']), "🎯"),
+                ("Prefetch Hit Rate", f"{runtime_metrics['prefetch_hit_rate']:.1f}%", "📈"),
+                ("Avg Time Saved", f"{runtime_metrics['prefetch_latency_saved_avg']:.2f}s", "⚡")
+            ]
+            
+            for i, (label, value, icon) in enumerate(prefetch_cards):
+                with [col1, col2, col3, col4][i]:
+                    st.markdown(create_metric_card(label, value, icon), unsafe_allow_html=True)
+        
+        if Config.CHAT_WRITER_ENABLED:
+            col1, col2, col3, col4 = st.columns(4)
+            
+            writer_cards = [
+                ("Chat Writer Queue", str(runtime_metrics['chat_writer_queue_depth']), "📝"),
+                ("Writer Lag", f"{runtime_metrics['chat_writer_lag_seconds']:.2f}s (p95 {runtime_metrics['chat_writer_commit_lag_p95']:.2f}s)", "⏳"),
+                ("Turns per Batch", f"{runtime_metrics['chat_writer_written'] / runtime_metrics['chat_writer_batches']:.1f}" if runtime_metrics['chat_writer_batches'] else "0", "📦"),
+                ("Queue Full Writes", str(runtime_metrics['chat_writer_queue_full']), "🚧")
+            ]
+            
+            for i, (label, value, icon) in enumerate(writer_cards):
+                with [col1, col2, col3, col4][i]:
+                    st.markdown(create_metric_card(label, value, icon), unsafe_allow_html=True)
+        
+        tier_metrics = analytics.get_model_tier_metrics()
+        if any(tier["requests"] for tier in tier_metrics):
+            st.markdown("#### 🧠 LLM Model Tiers")
+            st.dataframe(pd.DataFrame(tier_metrics), use_container_width=True, hide_index=True)
+        
+        worker_metrics = analytics.get_rasa_worker_metrics()
+        if worker_metrics:
+            st.markdown("#### 🧩 Rasa Workers")
+            st.dataframe(pd.DataFrame(worker_metrics), use_container_width=True, hide_index=True)
+        
         # Training insights
         st.markdown("---")
         st.markdown("### 🎓 Training Insights")
@@ -1414,6 +1551,25 @@ def render_analytics_page():
             for i, (label, value, icon) in enumerate(training_metrics):
                 with [col1, col2, col3, col4][i]:
                     st.markdown(create_metric_card(label, str(value), icon), unsafe_allow_html=True)
+            
+            if runtime_metrics['training_gemini_calls'] or runtime_metrics['training_generation_cache_hits']:
+                col1, col2, col3, col4 = st.columns(4)
+                
+                generation_cards = [
+                    ("Gemini Calls", f"{runtime_metrics['training_gemini_calls']} ({runtime_metrics['training_gemini_tokens']:,} tokens)", "✨"),
+                    ("Clustered Duplicates", str(runtime_metrics['training_feedback_clustered']), "🧩"),
+                    ("Gemini Calls Saved", f"{runtime_metrics['training_gemini_calls_saved']} (+{runtime_metrics['training_generation_cache_hits']} cached)", "💰"),
+                    ("Deferred by Budget", str(runtime_metrics['training_deferred']), "⏸️")
+                ]
+                
+                for i, (label, value, icon) in enumerate(generation_cards):
+                    with [col1, col2, col3, col4][i]:
+                        st.markdown(create_metric_card(label, value, icon), unsafe_allow_html=True)
+                
+                batch_metrics = analytics.get_generation_batch_metrics()
+                if batch_metrics:
+                    st.markdown("#### 📦 Generation Prompt Batching")
+                    st.dataframe(pd.DataFrame(batch_metrics), use_container_width=True, hide_index=True)
         
         except Exception as e:
             st.error(f"Training insights error: {str(e)}")
@@ -1428,7 +1584,7 @@ def render_history_page():
     st.markdown('<div class="main-header">📁 Chat History & Data Management</div>', unsafe_allow_html=True)
     
     try:
-        chat_history = safe_load_json(Config.CHAT_HISTORY_FILE, [])
+        chat_history = get_chat_history()
         
         if chat_history:
             # Enhanced statistics
@@ -1464,7 +1620,7 @@ def render_history_page():
                 search_query = st.text_input("🔍 Search conversations:", placeholder="Enter keywords...")
             
             with col2:
-                model_filter = st.selectbox("🔧 Filter by model:", ["All Models", "Rasa", "Groq", "Error"])
+                model_filter = st.selectbox("🔧 Filter by model:", ["All Models", "Rasa", "Retrieval", "Groq", "Cache", "Cache (stale)", "Error"])
             
             with col3:
                 date_filter = st.selectbox("📅 Filter by date:", ["All Time", "Today", "Last 7 days", "Last 30 days"])
@@ -1526,7 +1682,7 @@ def render_history_page():
                     model_source = chat.get("model_source", "Unknown")
                     
                     # Model icon
-                    model_icon = "🤖" if model_source == "Rasa" else "🧠" if model_source == "Groq" else "⚠️"
+                    model_icon = "🤖" if model_source == "Rasa" else "📚" if model_source == "Retrieval" else "🧠" if model_source == "Groq" else "⚠️"
                     
                     with st.expander(f"{model_icon} Conversation {len(page_data) - i} - {timestamp}"):
                         col1, col2 = st.columns([3, 1])
@@ -1753,7 +1909,7 @@ def render_protected_section():
         with col1:
             if st.button("🗑️ Clear Chat History", type="primary", use_container_width=True):
                 try:
-                    safe_save_json(Config.CHAT_HISTORY_FILE, [])
+                    get_chat_store().clear()
                     st.success("✅ Chat history cleared successfully!")
                     log_activity("Admin", "Chat history cleared")
                     time.sleep(1)
@@ -1832,6 +1988,20 @@ def render_enhanced_protected_logs_section():
                 st.write(f"**Max Retries:** {debug_info.get('max_retries', 3)}")
             except:
                 pass
+            
+            scheduler_state = training_scheduler.get_state()
+            st.markdown("#### ⏱️ Training Scheduler")
+            st.write(f"**State:** {scheduler_state['state']}")
+            if scheduler_state['current_job']:
+                st.write(f"**Running Job:** {scheduler_state['current_job']['id']} ({scheduler_state['current_job']['reason']}) since {format_timestamp(scheduler_state['current_job']['started_at'])}")
+            if scheduler_state['run_in_seconds'] is not None:
+                st.write(f"**Next Run In:** {scheduler_state['run_in_seconds']:.0f}s")
+            st.write(f"**Follow-up Queued:** {'Yes' if scheduler_state['follow_up_queued'] else 'No'}")
+            st.write(f"**Coalesced Triggers:** {scheduler_state['coalesced_requests']} | **Total Runs:** {scheduler_state['total_runs']}")
+            if scheduler_state['last_job']:
+                last_job = scheduler_state['last_job']
+                st.write(f"**Last Job:** {last_job['id']} finished {format_timestamp(last_job['finished_at'])} in {last_job['duration_seconds']}s")
+                st.caption(last_job['error'] or last_job['result'] or "")
         
         # Training operations
         st.markdown("### 🔧 Training Operations")
@@ -1842,7 +2012,7 @@ def render_enhanced_protected_logs_section():
             if st.button("📝 Process Reviews", type="primary", use_container_width=True):
                 with st.spinner("🔄 Processing reviews..."):
                     try:
-                        result = training_manager.process_reviews_manual()
+                        result = training_scheduler.run_now("manual")
                         if "successfully" in result.lower() or "processed" in result.lower():
                             st.success(f"✅ {result}")
                         else:
@@ -1853,10 +2023,12 @@ def render_enhanced_protected_logs_section():
                         log_activity("Error", f"Manual review processing failed: {str(e)}")
         
         with col2:
-            if st.button("🎓 Manual Training", type="primary", use_container_width=True):
+            # Runs through the scheduler so it never overlaps a scheduled training job
+            training_busy = training_scheduler.get_state()["state"] == "running"
+            if st.button("🎓 Manual Training", type="primary", use_container_width=True, disabled=training_busy):
                 with st.spinner("🔄 Training model..."):
                     try:
-                        result = training_manager.manual_training()
+                        result = training_scheduler.run_now("manual training", train_only=True)
                         if "successfully" in result.lower():
                             st.success(f"✅ {result}")
                         else:
@@ -1926,8 +2098,6 @@ def render_enhanced_protected_logs_section():
                     
                     # Check data files
                     data_files = [
-                        ("Chat History", Config.CHAT_HISTORY_FILE),
-                        ("Feedback Data", Config.FEEDBACK_DATA_FILE),
                         ("System Logs", Config.LOGS_FILE),
                         ("Rejected Reviews", training_manager.rejected_reviews_file),
                         ("Processed Reviews", training_manager.processed_reviews_file)
@@ -1944,6 +2114,12 @@ def render_enhanced_protected_logs_section():
                         else:
                             st.write(f"❌ **{file_name}**: Missing")
                     
+                    chat_store = get_chat_store()
+                    st.write(f"✅ **Chat History**: {len(chat_store)}/{chat_store.capacity} turns ({os.path.getsize(chat_store.store_file)} bytes ring buffer)")
+                    feedback_store = get_feedback_store()
+                    feedback_partitions = feedback_store.partitions()
+                    st.write(f"✅ **Feedback Data**: {len(feedback_store)} entries in {len(feedback_partitions)} partitions ({sum(p['bytes'] for p in feedback_partitions)} bytes)")
+                
                 except Exception as e:
                     st.error(f"Error checking files: {str(e)}")
         
@@ -1976,22 +2152,20 @@ def render_enhanced_protected_logs_section():
                     if os.path.exists(rejected_file):
                         rejected_reviews = safe_load_json(rejected_file, [])
                         if rejected_reviews:
-                            # Reset retry counts and move back to feedback
-                            for review in rejected_reviews:
-                                review["retry_count"] = 0
-                                review.pop("rejection_timestamp", None)
-                                review.pop("rejection_reason", None)
-                            
-                            # Add to feedback file
-                            feedback_data = safe_load_json(Config.FEEDBACK_DATA_FILE, [])
-                            feedback_data.extend(rejected_reviews)
-                            safe_save_json(Config.FEEDBACK_DATA_FILE, feedback_data)
+                            # Rejected entries are summaries, so only reset the retry fields on the stored feedback;
+                            # the retry timestamp keeps the generation cache from replaying output that was rejected
+                            retried = get_feedback_store().update_many({
+                                str(review["id"]): {"retry_count": 0, "last_retry_timestamp": Config.get_timestamp(), "processed": False}
+                                for review in rejected_reviews
+                            })
                             
                             # Clear rejected file
                             safe_save_json(rejected_file, [])
                             
-                            st.success(f"✅ Moved {len(rejected_reviews)} reviews back for reprocessing")
-                            log_activity("Admin", f"Retried {len(rejected_reviews)} rejected reviews")
+                            st.success(f"✅ Moved {retried} reviews back for reprocessing")
+                            if retried < len(rejected_reviews):
+                                st.warning(f"{len(rejected_reviews) - retried} rejected reviews no longer exist in the feedback store")
+                            log_activity("Admin", f"Retried {retried} of {len(rejected_reviews)} rejected reviews")
                         else:
                             st.info("No rejected reviews to retry")
                     else:
@@ -2013,7 +2187,8 @@ def process_feedback(message, feedback_type, message_index, issue_description=No
             message.get("model_source", ""),
             feedback_type,
             issue_description,
-            expected_answer
+            expected_answer,
+            model_tier=message.get("model_tier")
         )
         
         log_activity("Feedback", f"User provided {feedback_type} feedback for {message.get('model_source', 'Unknown')} response")
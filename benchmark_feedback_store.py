@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Compare the legacy JSON feedback list with the partitioned JSONL feedback store at scale"""
+
+import os
+import sys
+import time
+import uuid
+import tempfile
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.utils import safe_load_json, safe_save_json
+from src.feedback_store import FeedbackStore
+
+RETENTION_DAYS = 30
+
+def make_feedback(i, age_days=0.0):
+    return {
+        "id": str(uuid.uuid4()),
+        "message_index": i,
+        "user_query": f"how do I reset my password on device {i}",
+        "bot_response": "Go to the account portal and choose 'Forgot password'.",
+        "model_source": "Groq" if i % 2 else "Rasa",
+        "feedback_type": "negative" if i % 3 else "positive",
+        "issue_description": "",
+        "expected_answer": "",
+        "timestamp": (datetime.now() - timedelta(days=age_days)).isoformat(),
+        "processed": False,
+        "retry_count": 0
+    }
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label}: {(time.perf_counter() - start) * 1000:.1f} ms")
+    return result
+
+def bench_legacy(path, records, mark_ids):
+    """Old path: load the full list, modify, rewrite the whole file"""
+    print("Legacy JSON list:")
+    safe_save_json(path, records)
+    
+    def append_one():
+        data = safe_load_json(path, [])
+        data.append(make_feedback(len(data)))
+        safe_save_json(path, data)
+    
+    def mark_processed():
+        data = safe_load_json(path, [])
+        for feedback in data:
+            if feedback["id"] in mark_ids:
+                feedback["processed"] = True
+        safe_save_json(path, data)
+    
+    def stats():
+        data = safe_load_json(path, [])
+        return (sum(1 for f in data if f.get("processed", False)),
+                sum(1 for f in data if f.get("feedback_type") == "positive"))
+    
+    def cleanup_old():
+        cutoff = datetime.now() - timedelta(days=RETENTION_DAYS)
+        data = safe_load_json(path, [])
+        safe_save_json(path, [f for f in data if datetime.fromisoformat(f["timestamp"]) >= cutoff])
+    
+    timed("load", lambda: safe_load_json(path, []))
+    timed("stats (load + scan)", stats)
+    timed("append 1", append_one)
+    timed(f"mark {len(mark_ids)} processed", mark_processed)
+    print(f"  file size: {os.path.getsize(path) / 1e6:.1f} MB")
+    timed(f"retention ({RETENTION_DAYS} days)", cleanup_old)
+
+def bench_store(path, records, mark_ids):
+    """New path: replay once, then append operations"""
+    print("FeedbackStore (monthly JSONL partitions + index):")
+    FeedbackStore(path, legacy_file="").append_many(records)
+    
+    store = timed("load + index", lambda: FeedbackStore(path, legacy_file=""))
+    timed("append 1", lambda: store.append(make_feedback(len(store))))
+    timed(f"mark {len(mark_ids)} processed", lambda: store.update_many({i: {"processed": True} for i in mark_ids}))
+    timed("get by id", lambda: store.get(mark_ids[0]))
+    timed("stats (counters)", store.stats)
+    now = datetime.now()
+    timed("last 7 days", lambda: store.records_between(now - timedelta(days=7), now))
+    partitions = store.partitions()
+    print(f"  size: {sum(p['bytes'] for p in partitions) / 1e6:.1f} MB in {len(partitions)} partitions")
+    timed(f"retention ({RETENTION_DAYS} days)", lambda: store.drop_before(now - timedelta(days=RETENTION_DAYS)))
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    # Spread over the last year
+    records = [make_feedback(i, age_days=365.0 * (count - i) / count) for i in range(count)]
+    mark_ids = [record["id"] for record in records[::max(1, count // 1000)]][:1000]
+    print(f"=== Feedback store benchmark ({count} records) ===")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bench_legacy(os.path.join(temp_dir, "feedback_data.json"), records, mark_ids)
+        bench_store(os.path.join(temp_dir, "feedback"), records, mark_ids)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Compare per-message latency and memory of embedded vs HTTP Rasa modes"""
+
+import os
+import sys
+import time
+import subprocess
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from config.config import Config
+from src.rasa_agent import EmbeddedRasaAgent
+
+SAMPLE_MESSAGES = [
+    "hello",
+    "I forgot my password",
+    "how do I install software",
+    "my internet is not working",
+    "printer is not printing",
+    "my computer is very slow",
+    "how to set up my email",
+    "connect to vpn from home",
+    "goodbye"
+]
+
+def rss_mb(pid=None):
+    """Resident memory of a process in MB (Linux /proc, falls back to psutil)"""
+    pid = pid or os.getpid()
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024.0 * 1024.0)
+    except Exception:
+        return 0.0
+
+def rasa_server_pids():
+    """Find running 'rasa run' server processes"""
+    try:
+        result = subprocess.run(["pgrep", "-f", "rasa run"], capture_output=True, text=True)
+        return [int(pid) for pid in result.stdout.split()]
+    except Exception:
+        return []
+
+def summarize(label, latencies, memory_mb):
+    ordered = sorted(latencies)
+    print(f"{label}:")
+    print(f"  messages: {len(ordered)}")
+    print(f"  avg: {sum(ordered) / len(ordered) * 1000:.1f} ms")
+    print(f"  p50: {ordered[len(ordered) // 2] * 1000:.1f} ms")
+    print(f"  p95: {ordered[int(0.95 * (len(ordered) - 1))] * 1000:.1f} ms")
+    print(f"  memory: {memory_mb:.1f} MB")
+
+def bench_http(rounds):
+    """Webhook + parse round trips against the running server"""
+    latencies = []
+    for _ in range(rounds):
+        for message in SAMPLE_MESSAGES:
+            start = time.perf_counter()
+            requests.post(f"{Config.RASA_SERVER_URL}/webhooks/rest/webhook",
+                          json={"sender": "bench", "message": message}, timeout=10)
+            requests.post(f"{Config.RASA_SERVER_URL}/model/parse", json={"text": message}, timeout=10)
+            latencies.append(time.perf_counter() - start)
+    
+    memory = rss_mb() + sum(rss_mb(pid) for pid in rasa_server_pids())
+    return latencies, memory
+
+def bench_embedded(rounds):
+    """Same calls through the in-process agent"""
+    agent = EmbeddedRasaAgent()
+    if not agent.load():
+        return None, 0.0
+    
+    latencies = []
+    for _ in range(rounds):
+        for message in SAMPLE_MESSAGES:
+            start = time.perf_counter()
+            agent.handle_text(message, sender="bench")
+            agent.parse(message)
+            latencies.append(time.perf_counter() - start)
+    
+    return latencies, rss_mb()
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"=== Rasa mode benchmark ({rounds} rounds x {len(SAMPLE_MESSAGES)} messages) ===")
+    
+    try:
+        requests.get(f"{Config.RASA_SERVER_URL}/status", timeout=5)
+        latencies, memory = bench_http(rounds)
+        summarize("HTTP mode (client + rasa run)", latencies, memory)
+    except requests.exceptions.RequestException:
+        print(f"HTTP mode: skipped, no server at {Config.RASA_SERVER_URL}")
+    
+    latencies, memory = bench_embedded(rounds)
+    if latencies:
+        summarize("Embedded mode (single process)", latencies, memory)
+    else:
+        print("Embedded mode: skipped, model could not be loaded")
+
+if __name__ == "__main__":
+    main()
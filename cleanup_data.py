@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
 Data cleanup script to fix corrupted JSON files
+
+Usage: python cleanup_data.py [--rebuild-counters]
 """
 
 import os
@@ -12,8 +14,19 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.utils import safe_load_json, safe_save_json, log_activity, cleanup_data_files
+from src.feedback_store import get_feedback_store
+from src.chat_ring_buffer import get_chat_store
 from config.config import Config
 
+def rebuild_counters():
+    """Recount feedback from the log and rewrite the counters sidecar"""
+    print("🔧 Rebuilding feedback counters...")
+    try:
+        counters = get_feedback_store().rebuild_counters()
+        print(f"✅ Feedback counters rebuilt: {counters}")
+    except Exception as e:
+        print(f"❌ Rebuild failed: {str(e)}")
+
 def main():
     """Clean up all data files"""
     print("🔧 Starting data cleanup...")
@@ -29,8 +42,6 @@ def main():
     # Verify all files
     files_to_check = [
         Config.LOGS_FILE,
-        Config.CHAT_HISTORY_FILE,
-        Config.FEEDBACK_DATA_FILE,
         os.path.join(Config.DATA_DIR, "processed_reviews.json"),
         os.path.join(Config.DATA_DIR, "rejected.json"),
         os.path.join(Config.DATA_DIR, "settings.json")
@@ -44,7 +55,25 @@ def main():
         except Exception as e:
             print(f"❌ {file_path}: Error - {str(e)}")
     
+    try:
+        chat_store = get_chat_store()
+        print(f"✅ {chat_store.store_file}: OK ({len(chat_store)}/{chat_store.capacity} turns)")
+    except Exception as e:
+        print(f"❌ {Config.CHAT_HISTORY_STORE_FILE}: Error - {str(e)}")
+    
+    # Feedback log: replaying it rebuilds the index; compaction drops dead lines
+    try:
+        feedback_store = get_feedback_store()
+        feedback_store.compact()
+        print(f"✅ {feedback_store.store_dir}: OK ({len(feedback_store)} records in {len(feedback_store.partitions())} partitions, compacted)")
+        print(f"✅ {feedback_store.counters_file}: OK ({feedback_store.stats()})")
+    except Exception as e:
+        print(f"❌ {Config.FEEDBACK_STORE_DIR}: Error - {str(e)}")
+    
     print("\n🎯 Cleanup completed!")
 
 if __name__ == "__main__":
-    main()
+    if "--rebuild-counters" in sys.argv:
+        rebuild_counters()
+    else:
+        main()
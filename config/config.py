@@ -11,16 +11,128 @@ class Config:
     GEMINI_API_KEY = "PLEASE ADD GEMINI API HERE"
     GEMINI_MODEL = "gemini-2.5-flash"
     
+    # LLM Fallback Backends (OpenAI-compatible, tried in order)
+    LLM_BACKENDS = [
+        {"name": "groq", "base_url": GROQ_BASE_URL, "api_key": GROQ_API_KEY, "model": GROQ_MODEL, "timeout": 30},
+        # Uncomment once a local OpenAI-compatible server (e.g. Ollama) is running, to fail over and hedge to it
+        # {"name": "local", "base_url": "http://localhost:11434/v1", "api_key": "local", "model": "llama3.1:8b", "timeout": 30,
+        #  "models": {"small": "llama3.1:8b", "large": "llama3.1:8b"}},  # Per-tier model overrides
+    ]
+    LLM_HEDGING_ENABLED = True  # Only takes effect with a second backend configured
+    LLM_HEDGE_MIN_SAMPLES = 20  # Observed calls needed before p95 drives hedging
+    LLM_HEDGE_DEFAULT_DELAY = 3.0
+    
+    # LLM Model Tiers (fallback queries routed by complexity)
+    LLM_ROUTING_ENABLED = True
+    LLM_ROUTER_LARGE_THRESHOLD = 3  # Complexity score at which the large tier is used
+    LLM_MODEL_TIERS = {
+        "small": {"model": GROQ_MODEL, "max_tokens": 150, "cost_per_1k_tokens": 0.00008},
+        "large": {"model": "llama-3.3-70b-versatile", "max_tokens": 400, "cost_per_1k_tokens": 0.00079}
+    }
+    
+    # Groq Rate Limiting
+    GROQ_RATE_LIMIT_PER_MINUTE = 30
+    GROQ_RATE_LIMIT_BURST = 5
+    GROQ_LIMITER_MAX_WAIT = 10.0  # seconds a request may queue for a token
+    GROQ_LIMITER_MAX_QUEUE = 20
+    
+    # Gemini Training Generation
+    GEMINI_CONCURRENCY = 4  # Feedback items generated and validated in parallel; merges stay serial
+    GEMINI_RATE_LIMIT_PER_MINUTE = 60
+    GEMINI_RATE_LIMIT_BURST = 4
+    GEMINI_BATCH_SIZE = 4  # Feedback items packed into one generation prompt; 1 sends one prompt per item
+    
+    # LLM Quota Governor (sliding window, load shedding when over budget)
+    QUOTA_ENABLED = True
+    QUOTA_WINDOW_SECONDS = 60
+    QUOTA_SESSION_REQUESTS = 6
+    QUOTA_SESSION_TOKENS = 3000
+    QUOTA_GLOBAL_REQUESTS = 25  # Stay under the provider limit so bursts shed instead of failing
+    QUOTA_GLOBAL_TOKENS = 15000
+    QUOTA_BEST_EFFORT_CONFIDENCE = 0.4  # Low-confidence Rasa answers still served when shedding
+    QUOTA_DEFERRED_QUEUE_SIZE = 50
+    QUOTA_DEFERRED_MAX_ATTEMPTS = 3  # A deferred question that keeps failing is dropped after this many tries
+    QUOTA_DEFERRED_RETRY_SECONDS = 10  # Backoff per failed attempt
+    QUOTA_DEFERRED_ANSWERS_MAX = 200  # Background answers remembered until the question is asked again
+    QUOTA_QUEUED_RESPONSE = "We're handling a lot of questions right now. I've queued yours - please ask again in a minute and the answer will be ready."
+    
+    # Follow-up Prefetch (precompute likely next answers while a session is idle)
+    PREFETCH_ENABLED = False
+    PREFETCH_TOP_K = 2
+    PREFETCH_MIN_PAIR_COUNT = 2  # Times a follow-up must have been seen
+    PREFETCH_IDLE_DELAY = 1.0
+    PREFETCH_MAX_GAP_SECONDS = 600  # Questions further apart are not treated as follow-ups
+    PREFETCH_SIMILARITY_THRESHOLD = 0.6
+    PREFETCH_MODEL_REFRESH_SECONDS = 300
+    PREFETCH_MAX_QUOTA_UTILIZATION = 50  # Percent of the global LLM quota prefetching may run under
+    
+    # Latency Budget (per user message, across Rasa and LLM stages)
+    RESPONSE_LATENCY_BUDGET = 15.0
+    LLM_MIN_BUDGET = 2.0  # Skip the LLM call when less than this is left
+    RASA_TIMEOUT = 10
+    GROQ_TIMEOUT = 30
+    RESPONSE_CACHE_SIZE = 500
+    RESPONSE_CACHE_FRESH_TTL = 300  # Served without revalidation when upstream fails
+    RESPONSE_CACHE_STALE_TTL = 86400  # Served stale (and revalidated in the background) until this age
+    BUDGET_EXHAUSTED_RESPONSE = "I'm taking longer than expected to answer this. Please try again in a moment."
+    
     # Rasa Configuration
     RASA_CONFIDENCE_THRESHOLD = 0.67
     RASA_PROJECT_PATH = "rasa_project"
     RASA_SERVER_URL = "http://localhost:5005"
+    RASA_MODEL_DIR = os.path.join(RASA_PROJECT_PATH, "models")
+    TRAINING_SNAPSHOT_OBJECTS_DIR = ".backup_objects"  # Content-addressed files the backup_ snapshots hardlink to, inside the project
+    TRAINING_SNAPSHOT_RETENTION = 10  # Newest backup_ snapshots kept; 0 keeps all
+    TRAINING_SNAPSHOT_MAX_AGE_DAYS = 30  # Older snapshots are pruned, except the newest; 0 disables
+    RASA_EMBEDDED_MODE = False  # Load the model in-process instead of calling rasa run over HTTP
+    RASA_MODEL_RELOAD_CHECK_SECONDS = 30
+    RASA_LOCAL_RESPONSES = True  # Answer static utter_* intents without the webhook call
+    
+    # Local FAQ Retrieval (between Rasa and the LLM)
+    RETRIEVAL_ENABLED = True
+    RETRIEVAL_MIN_SCORE = 3.0  # BM25 score of the best match
+    RETRIEVAL_MIN_COVERAGE = 0.8  # Share of the query's IDF weight the match must contain
+    RETRIEVAL_REFRESH_SECONDS = 30
+    
+    # Rasa Worker Pool
+    RASA_WORKER_COUNT = 1
+    RASA_WORKER_BASE_PORT = 5005
+    RASA_WORKER_STARTUP_TIMEOUT = 60
+    RASA_WORKER_HEALTH_TIMEOUT = 2
+    RASA_WORKER_HEALTH_INTERVAL = 10
+    RASA_WORKER_UNHEALTHY_COOLDOWN = 15
     
     # File Paths
     DATA_DIR = "data"
-    CHAT_HISTORY_FILE = os.path.join(DATA_DIR, "chat_history.json")
-    FEEDBACK_DATA_FILE = os.path.join(DATA_DIR, "feedback_data.json")
+    CHAT_HISTORY_FILE = os.path.join(DATA_DIR, "chat_history.json")  # Legacy list, migrated into the ring buffer
+    CHAT_HISTORY_STORE_FILE = os.path.join(DATA_DIR, "chat_history.ring")
+    CHAT_HISTORY_CAPACITY = 1000  # Turns kept; the oldest slot is overwritten once full
+    CHAT_HISTORY_SLOT_SIZE = 4096  # Bytes per turn; longer answers are trimmed to fit
+    CHAT_HISTORY_FSYNC = True
+    CHAT_WRITER_ENABLED = True  # Persist chat turns from a background writer instead of the request path
+    CHAT_WRITER_JOURNAL_FILE = os.path.join(DATA_DIR, "chat_history.journal")
+    CHAT_WRITER_JOURNAL_FSYNC = False  # Journal lines survive a process crash; fsync them to survive power loss too
+    CHAT_WRITER_QUEUE_SIZE = 1000  # Beyond this the caller writes synchronously
+    CHAT_WRITER_BATCH_SIZE = 50
+    CHAT_WRITER_FLUSH_INTERVAL = 0.5  # Seconds a turn may wait for others to batch with
+    FEEDBACK_DATA_FILE = os.path.join(DATA_DIR, "feedback_data.json")  # Legacy list, migrated into the store
+    FEEDBACK_STORE_FILE = os.path.join(DATA_DIR, "feedback_data.jsonl")  # Single-log format, migrated into partitions
+    FEEDBACK_STORE_DIR = os.path.join(DATA_DIR, "feedback")
+    FEEDBACK_PARTITION_GRANULARITY = "monthly"  # "monthly" or "daily"; fixed once the store exists
+    FEEDBACK_STORE_FSYNC = True
+    FEEDBACK_STORE_COMPACT_MIN_DEAD = 1000  # Compact once this many dead lines outnumber live records
+    DATA_TRANSFER_BATCH_SIZE = 5000  # Records per commit when bulk importing JSONL
     LOGS_FILE = os.path.join(DATA_DIR, "logs.json")
+    RESPONSE_TABLE_FILE = os.path.join(DATA_DIR, "response_table.json")
+    GENERATION_CACHE_ENABLED = True  # Reuse validated Gemini YAML when the same generation request repeats
+    GENERATION_CACHE_DIR = os.path.join(DATA_DIR, "generation_cache")
+    GENERATION_CACHE_MAX_ENTRIES = 2000
+    GENERATION_CACHE_MAX_BYTES = 50 * 1024 * 1024
+    GENERATION_CACHE_TTL_SECONDS = 30 * 86400  # Older entries are regenerated; 0 keeps them until evicted
+    
+    # Training Scheduler
+    TRAINING_DEBOUNCE_SECONDS = 30  # Wait for feedback bursts to settle before training
+    TRAINING_DEBOUNCE_MAX_DELAY = 300
     
     # UI Configuration
     LOGO_PATH = "assets/logo.png"
@@ -29,10 +141,25 @@ class Config:
     # Training Configuration
     FEEDBACK_THRESHOLD = 10
     BATCH_SIZE = 5
+    FEEDBACK_CLUSTERING_ENABLED = True  # Generate once per group of near-duplicate questions
+    FEEDBACK_CLUSTER_SIMILARITY = 0.65  # Char n-gram Jaccard needed to join a group
+    FEEDBACK_CLUSTER_NGRAM = 3
+    FEEDBACK_CLUSTER_MAX_EXAMPLES = 10  # Phrasings from a group used as NLU examples
+    TRAINING_PRIORITY_ENABLED = True  # Process the backlog by impact instead of arrival order
+    TRAINING_PRIORITY_ASKED_WEIGHT = 1.0  # Per similar question in chat history
+    TRAINING_PRIORITY_FALLBACK_WEIGHT = 2.0  # Per similar question answered by the LLM fallback
+    TRAINING_PRIORITY_NEGATIVE_WEIGHT = 5.0  # Per negative feedback item
+    TRAINING_PRIORITY_FALLBACK_SOURCES = ("Groq", "Fallback")
+    TRAINING_TIME_BUDGET_SECONDS = 0  # Per processing run; 0 = no limit
+    TRAINING_TOKEN_BUDGET = 0  # Gemini tokens per processing run; 0 = no limit
     
     # Metrics
     SUPPORTED_METRICS = ["BLEU", "F1", "Precision", "Recall", "Accuracy"]
     
+    @staticmethod
+    def get_rasa_worker_ports():
+        return [Config.RASA_WORKER_BASE_PORT + i for i in range(max(1, Config.RASA_WORKER_COUNT))]
+    
     @staticmethod
     def get_timestamp():
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
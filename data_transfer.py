@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Bulk import/export of feedback and chat records as JSONL
+
+Usage:
+  python data_transfer.py import feedback FILE [--batch-size N] [--replace] [--rejects FILE]
+  python data_transfer.py import chat FILE [--batch-size N] [--rejects FILE]
+  python data_transfer.py export feedback FILE [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+  python data_transfer.py export chat FILE
+
+FILE may end in .gz, or be - for stdin/stdout.
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.data_transfer import import_feedback, import_chat, export_feedback, export_chat
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream feedback and chat records in and out as JSONL")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("kind", choices=["feedback", "chat"])
+    parser.add_argument("path", help="JSONL file (.gz supported), or - for stdin/stdout")
+    parser.add_argument("--batch-size", type=int, default=None, help="Records per commit when importing")
+    parser.add_argument("--replace", action="store_true", help="Overwrite feedback whose id already exists")
+    parser.add_argument("--rejects", default=None, help="Write invalid input lines here with the reason")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Export feedback from this date")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="Export feedback before this date")
+    args = parser.parse_args()
+    
+    try:
+        if args.action == "import" and args.kind == "feedback":
+            report = import_feedback(args.path, batch_size=args.batch_size, replace=args.replace, rejects_path=args.rejects)
+        elif args.action == "import":
+            report = import_chat(args.path, batch_size=args.batch_size, rejects_path=args.rejects)
+        elif args.kind == "feedback":
+            report = export_feedback(args.path, start=args.since, end=args.until)
+        else:
+            report = export_chat(args.path)
+    except Exception as e:
+        print(f"❌ {args.action.capitalize()} failed: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    
+    # Keep stdout clean when it carries the exported records
+    print(f"✅ {json.dumps(report)}", file=sys.stderr if args.path == "-" else sys.stdout)
+
+if __name__ == "__main__":
+    main()
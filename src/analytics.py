@@ -3,6 +3,9 @@ import os
 from datetime import datetime, timedelta
 from config.config import Config
 from src.utils import log_activity, safe_load_json
+from src.metrics import metrics
+from src.feedback_store import get_feedback_store
+from src.chat_ring_buffer import get_chat_history, get_chat_store
 import numpy as np
 from collections import defaultdict
 
@@ -14,8 +17,8 @@ class Analytics:
         """Calculate performance metrics with proper data handling"""
         try:
             # Load data with UTF-8 encoding
-            chat_history = safe_load_json(Config.CHAT_HISTORY_FILE, [])
-            feedback_data = safe_load_json(Config.FEEDBACK_DATA_FILE, [])
+            chat_history = get_chat_history()
+            feedback_data = get_feedback_store().all()
             
             # Calculate metrics
             if len(feedback_data) > 0:
@@ -60,7 +63,7 @@ class Analytics:
     def get_model_comparison(self):
         """Get model usage comparison with actual data"""
         try:
-            chat_history = safe_load_json(Config.CHAT_HISTORY_FILE, [])
+            chat_history = get_chat_history()
             
             model_counts = defaultdict(int)
             
@@ -81,7 +84,7 @@ class Analytics:
     def get_confidence_distribution(self):
         """Get confidence score distribution with actual data"""
         try:
-            chat_history = safe_load_json(Config.CHAT_HISTORY_FILE, [])
+            chat_history = get_chat_history()
             
             confidence_scores = []
             for chat in chat_history:
@@ -103,12 +106,12 @@ class Analytics:
     def get_feedback_analysis(self):
         """Get feedback analysis with actual data"""
         try:
-            feedback_data = safe_load_json(Config.FEEDBACK_DATA_FILE, [])
-            chat_history = safe_load_json(Config.CHAT_HISTORY_FILE, [])
+            feedback_counters = get_feedback_store().stats()
+            chat_history = get_chat_history()
             
-            positive_count = sum(1 for f in feedback_data if f.get("feedback_type") == "positive")
-            negative_count = sum(1 for f in feedback_data if f.get("feedback_type") == "negative")
-            total_feedback = len(feedback_data)
+            positive_count = feedback_counters["positive"]
+            negative_count = feedback_counters["negative"]
+            total_feedback = feedback_counters["total"]
             total_conversations = len(chat_history)
             
             feedback_rate = (total_feedback / total_conversations * 100) if total_conversations > 0 else 0
@@ -129,10 +132,31 @@ class Analytics:
                 "feedback_rate": 0.0
             }
     
+    def get_feedback_trend(self, days=14):
+        """Daily positive/negative feedback counts, reading only the partitions in range"""
+        try:
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            start = today - timedelta(days=days - 1)
+            
+            trend = {
+                (start + timedelta(days=i)).strftime("%Y-%m-%d"): {"positive": 0, "negative": 0}
+                for i in range(days)
+            }
+            for feedback in get_feedback_store().records_between(start, today + timedelta(days=1)):
+                day = trend.get(str(feedback.get("timestamp", ""))[:10])
+                if day is not None and feedback.get("feedback_type") in day:
+                    day[feedback["feedback_type"]] += 1
+            
+            return [{"date": date, **counts} for date, counts in trend.items()]
+        
+        except Exception as e:
+            log_activity("Error", f"Failed to get feedback trend: {str(e)}")
+            return []
+    
     def get_daily_metrics(self, days=7):
         """Get daily conversation metrics"""
         try:
-            chat_history = safe_load_json(Config.CHAT_HISTORY_FILE, [])
+            chat_history = get_chat_history()
             
             # Group conversations by date
             daily_counts = defaultdict(int)
@@ -161,16 +185,248 @@ class Analytics:
             log_activity("Error", f"Failed to get daily metrics: {str(e)}")
             return {}
     
+    def get_runtime_metrics(self):
+        """Get in-process performance metrics for the LLM fallback path"""
+        try:
+            snapshot = metrics.snapshot()
+            counters = snapshot["counters"]
+            gauges = snapshot["gauges"]
+            limiter_wait = snapshot["latencies"].get("groq.limiter_wait", {})
+            
+            groq_requests = counters.get("groq.requests", 0)
+            coalesced = counters.get("groq.coalesced_requests", 0)
+            
+            llm_requests = counters.get("llm.requests", 0)
+            hedges_fired = counters.get("llm.hedge.fired", 0)
+            latency_saved = metrics.get_samples("llm.hedge.latency_saved")
+            
+            retrieval_queries = counters.get("retrieval.queries", 0)
+            retrieval_hits = counters.get("retrieval.hits", 0)
+            
+            prefetch_hits = counters.get("prefetch.hits", 0)
+            prefetch_turns = prefetch_hits + counters.get("prefetch.misses", 0)
+            prefetch_saved = metrics.get_samples("prefetch.latency_saved")
+            chat_commit_lag = snapshot["latencies"].get("chat_writer.commit_lag", {})
+            
+            return {
+                "groq_requests": int(groq_requests),
+                "coalesced_requests": int(coalesced),
+                "coalesced_rate": (coalesced / groq_requests * 100) if groq_requests > 0 else 0.0,
+                "limiter_rejections": int(counters.get("groq.limiter_rejections", 0)),
+                "limiter_wait_avg": limiter_wait.get("avg", 0.0),
+                "limiter_wait_p95": limiter_wait.get("p95", 0.0),
+                "hedges_fired": int(hedges_fired),
+                "hedge_rate": (hedges_fired / llm_requests * 100) if llm_requests > 0 else 0.0,
+                "hedge_wins": int(counters.get("llm.hedge.wins", 0)),
+                "failovers": int(counters.get("llm.failovers", 0)),
+                "latency_saved_total": sum(latency_saved),
+                "latency_saved_avg": (sum(latency_saved) / len(latency_saved)) if latency_saved else 0.0,
+                "retrieval_queries": int(retrieval_queries),
+                "retrieval_hits": int(retrieval_hits),
+                "retrieval_hit_rate": (retrieval_hits / retrieval_queries * 100) if retrieval_queries > 0 else 0.0,
+                "fresh_cache_served": int(counters.get("cache.fresh_served", 0)),
+                "stale_served": int(counters.get("cache.stale_served", 0)),
+                "stale_served_upstream_error": int(counters.get("cache.stale_served.upstream_error", 0)),
+                "stale_served_budget": int(counters.get("cache.stale_served.budget", 0)),
+                "revalidations": int(counters.get("cache.revalidations", 0)),
+                "revalidation_successes": int(counters.get("cache.revalidation_successes", 0)),
+                "revalidation_failures": int(counters.get("cache.revalidation_failures", 0)),
+                "quota_global_requests": int(gauges.get("quota.global.requests", 0)),
+                "quota_request_utilization": gauges.get("quota.global.request_utilization", 0.0),
+                "quota_token_utilization": gauges.get("quota.global.token_utilization", 0.0),
+                "quota_active_sessions": int(gauges.get("quota.active_sessions", 0)),
+                "quota_shed": int(counters.get("quota.shed", 0)),
+                "quota_degraded_rasa": int(counters.get("quota.degraded.rasa", 0)),
+                "quota_degraded_cache": int(counters.get("quota.degraded.cache", 0)),
+                "quota_degraded_queued": int(counters.get("quota.degraded.queued", 0)),
+                "quota_queue_length": int(gauges.get("quota.deferred.queue_length", 0)),
+                "prefetch_computed": int(counters.get("prefetch.computed", 0)),
+                "prefetch_hits": int(prefetch_hits),
+                "prefetch_hit_rate": (prefetch_hits / prefetch_turns * 100) if prefetch_turns > 0 else 0.0,
+                "prefetch_latency_saved_avg": (sum(prefetch_saved) / len(prefetch_saved)) if prefetch_saved else 0.0,
+                "chat_writer_queue_depth": int(gauges.get("chat_writer.queue_depth", 0)),
+                "chat_writer_lag_seconds": gauges.get("chat_writer.lag_seconds", 0.0),
+                "chat_writer_commit_lag_p95": chat_commit_lag.get("p95", 0.0),
+                "chat_writer_written": int(counters.get("chat_writer.written", 0)),
+                "chat_writer_batches": int(counters.get("chat_writer.batches", 0)),
+                "chat_writer_queue_full": int(counters.get("chat_writer.queue_full", 0)),
+                "training_gemini_calls": int(counters.get("training.gemini_calls", 0)),
+                "training_feedback_clustered": int(counters.get("training.feedback_clustered", 0)),
+                "training_gemini_calls_saved": int(counters.get("training.gemini_calls_saved", 0)),
+                "training_gemini_tokens": int(counters.get("training.gemini_tokens", 0)),
+                "training_deferred": int(counters.get("training.deferred", 0)),
+                "training_generation_cache_hits": int(counters.get("training.generation_cache.hits", 0)),
+                "raw": snapshot
+            }
+        
+        except Exception as e:
+            log_activity("Error", f"Failed to get runtime metrics: {str(e)}")
+            return {
+                "groq_requests": 0,
+                "coalesced_requests": 0,
+                "coalesced_rate": 0.0,
+                "limiter_rejections": 0,
+                "limiter_wait_avg": 0.0,
+                "limiter_wait_p95": 0.0,
+                "hedges_fired": 0,
+                "hedge_rate": 0.0,
+                "hedge_wins": 0,
+                "failovers": 0,
+                "latency_saved_total": 0.0,
+                "latency_saved_avg": 0.0,
+                "retrieval_queries": 0,
+                "retrieval_hits": 0,
+                "retrieval_hit_rate": 0.0,
+                "fresh_cache_served": 0,
+                "stale_served": 0,
+                "stale_served_upstream_error": 0,
+                "stale_served_budget": 0,
+                "revalidations": 0,
+                "revalidation_successes": 0,
+                "revalidation_failures": 0,
+                "quota_global_requests": 0,
+                "quota_request_utilization": 0.0,
+                "quota_token_utilization": 0.0,
+                "quota_active_sessions": 0,
+                "quota_shed": 0,
+                "quota_degraded_rasa": 0,
+                "quota_degraded_cache": 0,
+                "quota_degraded_queued": 0,
+                "quota_queue_length": 0,
+                "prefetch_computed": 0,
+                "prefetch_hits": 0,
+                "prefetch_hit_rate": 0.0,
+                "prefetch_latency_saved_avg": 0.0,
+                "chat_writer_queue_depth": 0,
+                "chat_writer_lag_seconds": 0.0,
+                "chat_writer_commit_lag_p95": 0.0,
+                "chat_writer_written": 0,
+                "chat_writer_batches": 0,
+                "chat_writer_queue_full": 0,
+                "training_gemini_calls": 0,
+                "training_feedback_clustered": 0,
+                "training_gemini_calls_saved": 0,
+                "training_gemini_tokens": 0,
+                "training_deferred": 0,
+                "training_generation_cache_hits": 0,
+                "raw": {"counters": {}, "gauges": {}, "latencies": {}}
+            }
+    
+    def get_rasa_worker_metrics(self):
+        """Get per-worker request counts, latency and throughput of the Rasa pool"""
+        try:
+            snapshot = metrics.snapshot()
+            workers = defaultdict(dict)
+            
+            for section in ("counters", "gauges"):
+                for name, value in snapshot[section].items():
+                    if name.startswith("rasa.worker."):
+                        _, _, port, field = name.split(".", 3)
+                        workers[port][field] = value
+            
+            for name, stats in snapshot["latencies"].items():
+                if name.startswith("rasa.worker.") and name.endswith(".latency"):
+                    port = name.split(".")[2]
+                    workers[port]["latency_p50"] = stats["p50"]
+                    workers[port]["latency_p95"] = stats["p95"]
+            
+            return [
+                {
+                    "port": int(port),
+                    "healthy": bool(values.get("healthy", 0)),
+                    "requests": int(values.get("requests", 0)),
+                    "errors": int(values.get("errors", 0)),
+                    "outstanding": int(values.get("outstanding", 0)),
+                    "throughput_rpm": int(values.get("throughput_rpm", 0)),
+                    "latency_p50": values.get("latency_p50", 0.0),
+                    "latency_p95": values.get("latency_p95", 0.0)
+                }
+                for port, values in sorted(workers.items())
+            ]
+        
+        except Exception as e:
+            log_activity("Error", f"Failed to get Rasa worker metrics: {str(e)}")
+            return []
+    
+    def get_model_tier_metrics(self):
+        """Get latency, cost and satisfaction per LLM model tier"""
+        try:
+            snapshot = metrics.snapshot()
+            counters = snapshot["counters"]
+            feedback_data = get_feedback_store().all()
+            
+            tier_stats = []
+            for tier in Config.LLM_MODEL_TIERS:
+                latency = snapshot["latencies"].get(f"llm.tier.{tier}.latency", {})
+                requests_count = int(counters.get(f"llm.tier.{tier}.requests", 0))
+                cost = counters.get(f"llm.tier.{tier}.cost", 0.0)
+                
+                tier_feedback = [f for f in feedback_data if f.get("model_tier") == tier]
+                positive = sum(1 for f in tier_feedback if f.get("feedback_type") == "positive")
+                
+                tier_stats.append({
+                    "tier": tier,
+                    "model": Config.LLM_MODEL_TIERS[tier]["model"],
+                    "requests": requests_count,
+                    "latency_p50": latency.get("p50", 0.0),
+                    "latency_p95": latency.get("p95", 0.0),
+                    "avg_tokens": (counters.get(f"llm.tier.{tier}.tokens", 0) / requests_count) if requests_count > 0 else 0.0,
+                    "total_cost_usd": cost,
+                    "feedback": len(tier_feedback),
+                    "satisfaction": (positive / len(tier_feedback) * 100) if tier_feedback else None
+                })
+            
+            return tier_stats
+        
+        except Exception as e:
+            log_activity("Error", f"Failed to get model tier metrics: {str(e)}")
+            return []
+    
+    def get_generation_batch_metrics(self):
+        """Get Gemini tokens and latency per feedback item for each training prompt batch size"""
+        try:
+            counters = metrics.snapshot()["counters"]
+            sizes = sorted({int(name.split(".")[2]) for name in counters
+                            if name.startswith("training.batch.") and name.endswith(".items")})
+            
+            batch_stats = []
+            for size in sizes:
+                items = counters.get(f"training.batch.{size}.items", 0)
+                if not items:
+                    continue
+                fallbacks = int(counters.get(f"training.batch.{size}.fallbacks", 0))
+                batch_stats.append({
+                    "batch_size": size,
+                    "calls": int(counters.get(f"training.batch.{size}.calls", 0)),
+                    "items": int(items),
+                    "tokens_per_item": counters.get(f"training.batch.{size}.tokens", 0) / items,
+                    "latency_per_item": counters.get(f"training.batch.{size}.seconds", 0.0) / items,
+                    "fallback_rate": fallbacks / items * 100
+                })
+            
+            # Savings are relative to one prompt per item, once that has been measured
+            baseline = next((row for row in batch_stats if row["batch_size"] == 1), None)
+            for row in batch_stats:
+                if baseline is None or row is baseline:
+                    row["token_savings"] = row["latency_savings"] = None
+                    continue
+                row["token_savings"] = (1 - row["tokens_per_item"] / baseline["tokens_per_item"]) * 100 if baseline["tokens_per_item"] else None
+                row["latency_savings"] = (1 - row["latency_per_item"] / baseline["latency_per_item"]) * 100 if baseline["latency_per_item"] else None
+            
+            return batch_stats
+        
+        except Exception as e:
+            log_activity("Error", f"Failed to get generation batch metrics: {str(e)}")
+            return []
+    
     def reset_metrics(self):
         """Reset analytics metrics with UTF-8 encoding"""
         try:
             # Clear chat history
-            with open(Config.CHAT_HISTORY_FILE, 'w', encoding='utf-8') as f:
-                json.dump([], f, indent=2, ensure_ascii=False)
+            get_chat_store().clear()
             
             # Clear feedback data
-            with open(Config.FEEDBACK_DATA_FILE, 'w', encoding='utf-8') as f:
-                json.dump([], f, indent=2, ensure_ascii=False)
+            get_feedback_store().clear()
             
             log_activity("System", "Analytics metrics reset")
             
@@ -0,0 +1,237 @@
+# Fixed-capacity on-disk ring buffer for chat history
+import json
+import os
+import struct
+import threading
+import zlib
+import logging
+from typing import Any, Dict, List, Optional
+from config.config import Config
+from src.utils import log_activity, safe_load_json
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CHATRING"
+VERSION = 2
+# magic, version, capacity, slot size, head (total turns ever written), count
+HEADER_FORMAT = "<8sHIIQI"
+HEADER_SIZE = 64
+# turn number, payload length, CRC32 of the payload
+SLOT_HEADER_FORMAT = "<QII"
+SLOT_HEADER_SIZE = struct.calcsize(SLOT_HEADER_FORMAT)
+# Version 1 slots carried only the payload length; read once to migrate
+LEGACY_SLOT_HEADER_FORMAT = "<I"
+LEGACY_SLOT_HEADER_SIZE = struct.calcsize(LEGACY_SLOT_HEADER_FORMAT)
+
+class ChatRingBuffer:
+    """Last N chat turns in a file of fixed-size slots behind a small header"""
+    
+    # Layout: a 64-byte header, then `capacity` slots of `slot_size` bytes, each the
+    # turn number, length and CRC32 of the UTF-8 JSON of one turn that follows. Turn
+    # `head` goes to slot head % capacity. An append writes its slots first and then
+    # the header. After a crash in between, a slot whose turn number or checksum does
+    # not match what the header expects is skipped. Once the buffer has wrapped, that
+    # includes the oldest turn a torn write partly overwrote.
+    
+    def __init__(self, store_file: str = None, capacity: int = None, slot_size: int = None,
+                 legacy_file: str = None):
+        self.store_file = store_file or Config.CHAT_HISTORY_STORE_FILE
+        self.capacity = capacity or Config.CHAT_HISTORY_CAPACITY
+        self.slot_size = slot_size or Config.CHAT_HISTORY_SLOT_SIZE
+        self.legacy_file = legacy_file if legacy_file is not None else Config.CHAT_HISTORY_FILE
+        self._lock = threading.RLock()
+        self._open()
+    
+    def _open(self) -> None:
+        """Create the file, migrate the legacy list, or rebuild on a layout change"""
+        with self._lock:
+            if not os.path.exists(self.store_file):
+                self._create()
+                self._migrate_legacy()
+                return
+            
+            header = self._read_header()
+            if header is None:
+                logger.error(f"Invalid chat ring buffer header in {self.store_file}, recreating")
+                os.replace(self.store_file, self.store_file + ".corrupt")
+                self._create()
+            elif header["version"] != VERSION or header["capacity"] != self.capacity or header["slot_size"] != self.slot_size:
+                # Config or format changed: carry the newest turns over into the new layout
+                entries = self._read_slots(header, header["count"])
+                self._create()
+                self.append_many(entries[-self.capacity:])
+                log_activity("System", f"Rebuilt chat history buffer with {self.capacity} slots")
+    
+    def _create(self) -> None:
+        os.makedirs(os.path.dirname(self.store_file) or ".", exist_ok=True)
+        temp_path = self.store_file + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self._pack_header(0, 0))
+            f.truncate(HEADER_SIZE + self.capacity * self.slot_size)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.store_file)
+    
+    def _migrate_legacy(self) -> None:
+        """One-time import of the old chat_history.json list"""
+        if not self.legacy_file or not os.path.exists(self.legacy_file):
+            return
+        
+        try:
+            legacy_data = safe_load_json(self.legacy_file, [])
+            entries = [entry for entry in legacy_data if isinstance(entry, dict)] if isinstance(legacy_data, list) else []
+            self.append_many(entries[-self.capacity:])
+            os.replace(self.legacy_file, self.legacy_file + ".migrated")
+            log_activity("System", f"Migrated {min(len(entries), self.capacity)} chat turns to {self.store_file}")
+        
+        except Exception as e:
+            log_activity("Error", f"Failed to migrate legacy chat history: {str(e)}")
+    
+    def _pack_header(self, head: int, count: int) -> bytes:
+        return struct.pack(HEADER_FORMAT, MAGIC, VERSION, self.capacity, self.slot_size, head, count).ljust(HEADER_SIZE, b"\0")
+    
+    def _read_header(self, f=None) -> Optional[Dict[str, int]]:
+        if f is None:
+            with open(self.store_file, "rb") as handle:
+                return self._read_header(handle)
+        
+        f.seek(0)
+        raw = f.read(HEADER_SIZE)
+        if len(raw) < HEADER_SIZE:
+            return None
+        magic, version, capacity, slot_size, head, count = struct.unpack_from(HEADER_FORMAT, raw)
+        if magic != MAGIC or version not in (1, VERSION) or capacity <= 0 or slot_size <= SLOT_HEADER_SIZE:
+            return None
+        return {"version": version, "capacity": capacity, "slot_size": slot_size, "head": head, "count": min(count, capacity)}
+    
+    def _encode(self, entry: Dict[str, Any]) -> bytes:
+        """Serialize one turn to fit a slot, trimming the response and then the query if needed"""
+        limit = self.slot_size - SLOT_HEADER_SIZE
+        payload = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        if len(payload) <= limit:
+            return payload
+        
+        entry = dict(entry, truncated=True)
+        for field in ("bot_response", "user_query"):
+            value = entry.get(field)
+            if not isinstance(value, str):
+                continue
+            overflow = len(json.dumps(entry, ensure_ascii=False).encode("utf-8")) - limit
+            if overflow <= 0:
+                break
+            entry[field] = value[:max(0, len(value) - overflow - 3)] + "..."
+        
+        payload = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        if len(payload) > limit:
+            raise ValueError(f"Chat entry does not fit a {self.slot_size}-byte slot")
+        return payload
+    
+    def _locked_file(self, mode: str):
+        f = open(self.store_file, mode)
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if "+" in mode else fcntl.LOCK_SH)
+        return f
+    
+    def append(self, entry: Dict[str, Any]) -> bool:
+        """Write one turn into the next slot, overwriting the oldest once full"""
+        return self.append_many([entry])
+    
+    def append_many(self, entries: List[Dict[str, Any]]) -> bool:
+        """Write a batch of turns into consecutive slots with one header update and sync"""
+        if not entries:
+            return True
+        try:
+            payloads = [self._encode(entry) for entry in entries][-self.capacity:]
+            with self._lock, self._locked_file("r+b") as f:
+                header = self._read_header(f)
+                if header is None:
+                    raise ValueError("invalid header")
+                
+                for sequence, payload in enumerate(payloads, start=header["head"]):
+                    f.seek(HEADER_SIZE + (sequence % self.capacity) * self.slot_size)
+                    f.write(struct.pack(SLOT_HEADER_FORMAT, sequence, len(payload), zlib.crc32(payload)) + payload)
+                f.flush()
+                
+                f.seek(0)
+                f.write(self._pack_header(header["head"] + len(payloads), min(header["count"] + len(payloads), self.capacity)))
+                f.flush()
+                if Config.CHAT_HISTORY_FSYNC:
+                    os.fsync(f.fileno())
+            return True
+        
+        except Exception as e:
+            log_activity("Error", f"Failed to append chat turns: {str(e)}")
+            return False
+    
+    def _read_slots(self, header: Dict[str, int], limit: int, f=None) -> List[Dict[str, Any]]:
+        """The newest `limit` turns, oldest first"""
+        if f is None:
+            with open(self.store_file, "rb") as handle:
+                return self._read_slots(header, limit, handle)
+        
+        limit = max(0, min(limit, header["count"]))
+        entries = []
+        for sequence in range(header["head"] - limit, header["head"]):
+            f.seek(HEADER_SIZE + (sequence % header["capacity"]) * header["slot_size"])
+            slot = f.read(header["slot_size"])
+            if header["version"] == 1:
+                (length,) = struct.unpack_from(LEGACY_SLOT_HEADER_FORMAT, slot)
+                payload = slot[LEGACY_SLOT_HEADER_SIZE:LEGACY_SLOT_HEADER_SIZE + length]
+            else:
+                slot_sequence, length, checksum = struct.unpack_from(SLOT_HEADER_FORMAT, slot)
+                payload = slot[SLOT_HEADER_SIZE:SLOT_HEADER_SIZE + length]
+                # A slot rewritten by an append whose header never landed, or torn mid-write
+                if slot_sequence != sequence or len(payload) != length or zlib.crc32(payload) != checksum:
+                    logger.warning(f"Skipping chat slot {sequence % header['capacity']}: it does not hold turn {sequence}")
+                    continue
+            try:
+                entries.append(json.loads(payload.decode("utf-8")))
+            except (ValueError, UnicodeDecodeError):
+                logger.error(f"Skipping unreadable chat slot {sequence % header['capacity']}")
+        return entries
+    
+    def read_last(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The newest `limit` turns (all when None), oldest first"""
+        try:
+            with self._lock, self._locked_file("rb") as f:
+                header = self._read_header(f)
+                if header is None:
+                    return []
+                return self._read_slots(header, header["count"] if limit is None else limit, f)
+        except Exception as e:
+            log_activity("Error", f"Failed to read chat history: {str(e)}")
+            return []
+    
+    def clear(self) -> None:
+        """Drop every turn by resetting the header"""
+        with self._lock, self._locked_file("r+b") as f:
+            f.seek(0)
+            f.write(self._pack_header(0, 0))
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def __len__(self) -> int:
+        with self._lock:
+            header = self._read_header()
+            return header["count"] if header else 0
+
+_buffers = {}
+_buffers_lock = threading.Lock()
+
+def get_chat_store(store_file: str = None) -> ChatRingBuffer:
+    """Shared ring buffer per file"""
+    store_file = store_file or Config.CHAT_HISTORY_STORE_FILE
+    with _buffers_lock:
+        if store_file not in _buffers:
+            _buffers[store_file] = ChatRingBuffer(store_file)
+        return _buffers[store_file]
+
+def get_chat_history(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Newest chat turns, oldest first; replaces loading chat_history.json"""
+    return get_chat_store().read_last(limit)
@@ -0,0 +1,196 @@
+# Write-behind persistence for chat turns
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List
+from config.config import Config
+from src.chat_ring_buffer import ChatRingBuffer, get_chat_store
+from src.metrics import metrics
+from src.utils import log_activity
+
+class ChatHistoryWriter:
+    """Bounded queue of chat turns flushed to the ring buffer in batches by a background thread"""
+    
+    # Each submitted turn is first appended to a small journal (one line, no
+    # fsync by default) and then queued. The writer drains up to batch_size turns
+    # at a time into the ring buffer, and after each committed batch rewrites the
+    # journal down to the turns still queued. On start-up, journal entries whose id is not yet in the ring
+    # buffer are written, so turns survive a crash between submit and flush.
+    
+    def __init__(self, store: ChatRingBuffer = None, journal_file: str = None, max_size: int = None,
+                 batch_size: int = None, flush_interval: float = None):
+        self.store = store if store is not None else get_chat_store()
+        self.journal_file = journal_file or Config.CHAT_WRITER_JOURNAL_FILE
+        self.max_size = max_size or Config.CHAT_WRITER_QUEUE_SIZE
+        self.batch_size = batch_size or Config.CHAT_WRITER_BATCH_SIZE
+        self.flush_interval = Config.CHAT_WRITER_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.queue = deque()
+        self.in_flight = 0
+        self.last_flush_at = None
+        self.flush_requested = False
+        self._condition = threading.Condition()
+        self._thread = None
+        self._replay_journal()
+    
+    def _replay_journal(self) -> None:
+        """Write turns a previous process journaled but never flushed"""
+        if not os.path.exists(self.journal_file):
+            return
+        
+        try:
+            entries = []
+            with open(self.journal_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # Torn final line from a crash mid-write
+                        continue
+            
+            stored_ids = {entry.get("id") for entry in self.store.read_last()} if entries else set()
+            missing = [entry for entry in entries if entry.get("id") not in stored_ids]
+            if missing:
+                if not self.store.append_many(missing):
+                    return
+                metrics.increment("chat_writer.replayed", len(missing))
+                log_activity("System", f"Recovered {len(missing)} unflushed chat turns from journal")
+            
+            open(self.journal_file, "w", encoding="utf-8").close()
+        
+        except Exception as e:
+            log_activity("Error", f"Failed to replay chat journal: {str(e)}")
+    
+    def _journal(self, line: str) -> None:
+        """Append one line (called with the lock held, so truncation never races a submit)"""
+        with open(self.journal_file, "a", encoding="utf-8") as f:
+            f.write(line)
+            if Config.CHAT_WRITER_JOURNAL_FSYNC:
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def submit(self, entry: Dict[str, Any]) -> bool:
+        """Hand a turn to the writer; writes synchronously when the queue is full"""
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._condition:
+            if len(self.queue) < self.max_size:
+                self._journal(line)
+                self.queue.append((time.time(), entry))
+                metrics.increment("chat_writer.submitted")
+                self._publish()
+                
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="chat-writer")
+                    self._thread.daemon = True
+                    self._thread.start()
+                self._condition.notify()
+                return True
+            
+            metrics.increment("chat_writer.queue_full")
+        
+        # Backpressure: the caller pays for the write rather than losing the turn
+        return self.store.append(entry)
+    
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self.queue:
+                    self._condition.wait()
+                # Give a burst up to flush_interval to accumulate into one batch
+                deadline = self.queue[0][0] + self.flush_interval
+                while len(self.queue) < self.batch_size and not self.flush_requested and time.time() < deadline:
+                    self._condition.wait(deadline - time.time())
+                batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+                self.in_flight = len(batch)
+            
+            self._flush_batch(batch)
+    
+    def _flush_batch(self, batch: List) -> None:
+        start_time = time.time()
+        entries = [entry for _, entry in batch]
+        success = self.store.append_many(entries)
+        
+        with self._condition:
+            self.in_flight = 0
+            if success:
+                self.last_flush_at = time.time()
+                metrics.increment("chat_writer.written", len(entries))
+                metrics.increment("chat_writer.batches")
+                metrics.observe("chat_writer.flush_latency", self.last_flush_at - start_time)
+                metrics.observe("chat_writer.commit_lag", self.last_flush_at - batch[0][0])
+                if not self.queue:
+                    self.flush_requested = False
+                # Committed turns leave the journal after every batch, so it stays bounded under steady traffic
+                self._compact_journal()
+            else:
+                # Keep the turns (and their journal lines) for the next attempt
+                self.queue.extendleft(reversed(batch))
+                metrics.increment("chat_writer.flush_failures")
+            self._publish()
+            self._condition.notify_all()
+        
+        if success:
+            log_activity("Chat", f"Saved {len(entries)} chat turn(s)")
+        else:
+            time.sleep(1.0)
+    
+    def _compact_journal(self) -> None:
+        """Rewrite the journal to the turns still queued (called with the lock held, so no submit lands in between)"""
+        try:
+            if not self.queue:
+                open(self.journal_file, "w", encoding="utf-8").close()
+                return
+            
+            temp_path = self.journal_file + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for _, entry in self.queue:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                if Config.CHAT_WRITER_JOURNAL_FSYNC:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_path, self.journal_file)
+            metrics.increment("chat_writer.journal_compactions")
+        
+        except OSError as e:
+            log_activity("Error", f"Failed to compact chat journal: {str(e)}")
+    
+    def _publish(self) -> None:
+        """Queue depth and age of the oldest unflushed turn (called with the lock held)"""
+        metrics.set_gauge("chat_writer.queue_depth", len(self.queue) + self.in_flight)
+        metrics.set_gauge("chat_writer.lag_seconds", time.time() - self.queue[0][0] if self.queue else 0.0)
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything submitted so far is written; False on timeout"""
+        deadline = time.time() + timeout
+        with self._condition:
+            self.flush_requested = True
+            self._condition.notify_all()
+            while self.queue or self.in_flight:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """How far the writer is behind"""
+        with self._condition:
+            return {
+                "queue_depth": len(self.queue) + self.in_flight,
+                "lag_seconds": time.time() - self.queue[0][0] if self.queue else 0.0,
+                "last_flush_at": self.last_flush_at
+            }
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_chat_writer() -> ChatHistoryWriter:
+    """Shared writer for the process, flushed at interpreter exit"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ChatHistoryWriter()
+            atexit.register(_writer.flush)
+        return _writer
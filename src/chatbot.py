@@ -2,74 +2,224 @@
 import requests
 import json
 import logging
+import time
+import threading
+from collections import OrderedDict
 from config.config import Config
-from src.utils import log_activity
+from src.utils import log_activity, normalize_query
+from src.concurrency import Deadline, SingleFlight, TokenBucket
+from src.metrics import metrics
+from src.rasa_agent import EmbeddedRasaAgent
+from src.rasa_pool import get_rasa_pool
+from src.llm_backends import HedgedBackendPool, LLMBackendError, LLMRateLimited
+from src.response_cache import ResponseCache
+from src.response_table import ResponseTable
+from src.retrieval import FAQIndexer, FAQRetriever
+from src.quota_governor import DeferredQueue, QuotaGovernor, estimate_tokens
+from src.model_router import ModelRouter
+from src.prefetcher import FollowUpPrefetcher
 import subprocess
 import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = """You are an IT support specialist. Provide concise, accurate, and helpful responses to IT-related questions. 
+            Keep responses short and focused on practical solutions. If the question is not IT-related, politely redirect to IT topics."""
+
 class ChatBot:
     def __init__(self):
         self.config = Config()
         self.rasa_url = Config.RASA_SERVER_URL
-        self.groq_headers = {
-            "Authorization": f"Bearer {Config.GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        self.start_rasa_server()
+        
+        # Ordered fallback backends with hedged requests
+        self.llm_backends = HedgedBackendPool.from_config()
+        
+        # Small model for simple questions, large one for multi-part troubleshooting
+        self.model_router = ModelRouter()
+        
+        # Static utter_* answers resolved locally from the parse result
+        self.response_table = ResponseTable() if Config.RASA_LOCAL_RESPONSES else None
+        
+        # Local FAQ tier between Rasa and the LLM
+        self.retriever = None
+        self.faq_indexer = None
+        if Config.RETRIEVAL_ENABLED:
+            self.retriever = FAQRetriever()
+            self.faq_indexer = FAQIndexer(self.retriever, self.response_table)
+            self.faq_indexer.refresh(force=True)
+        
+        # Recent answers, served stale when upstream fails or the latency budget runs out
+        self.response_cache = ResponseCache(
+            Config.RESPONSE_CACHE_SIZE,
+            fresh_ttl=Config.RESPONSE_CACHE_FRESH_TTL,
+            stale_ttl=Config.RESPONSE_CACHE_STALE_TTL
+        )
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+        
+        # Per-session and global LLM budgets; shed questions are answered later to warm the cache
+        self.quota_governor = QuotaGovernor() if Config.QUOTA_ENABLED else None
+        self.deferred_queue = DeferredQueue(self.quota_governor, self._answer_deferred) if self.quota_governor else None
+        # Questions answered in the background, oldest first; touched by request threads and the deferred thread
+        self._deferred_answers = OrderedDict()
+        self._deferred_lock = threading.Lock()
+        
+        # Answers to likely follow-up questions, computed while the session is idle
+        self.prefetcher = None
+        if Config.PREFETCH_ENABLED:
+            self.prefetcher = FollowUpPrefetcher(self._prefetch_answer, self._is_fresh_cached, self._prefetch_allowed)
+        
+        # Identical in-flight Groq queries share one upstream call
+        self.groq_inflight = SingleFlight()
+        self.groq_limiter = TokenBucket(
+            rate_per_second=Config.GROQ_RATE_LIMIT_PER_MINUTE / 60.0,
+            capacity=Config.GROQ_RATE_LIMIT_BURST,
+            max_queue=Config.GROQ_LIMITER_MAX_QUEUE
+        )
+        
+        # Embedded mode answers in-process; HTTP mode is the fallback
+        self.embedded_agent = None
+        self.rasa_pool = None
+        if Config.RASA_EMBEDDED_MODE:
+            agent = EmbeddedRasaAgent()
+            if agent.load():
+                self.embedded_agent = agent
+                logger.info("Using embedded Rasa agent")
+            else:
+                logger.warning("Embedded Rasa agent unavailable, falling back to HTTP mode")
+                log_activity("System", "Embedded Rasa agent unavailable, using HTTP mode")
+        
+        if self.embedded_agent is None:
+            self.start_rasa_server()
     
     def start_rasa_server(self):
-        """Start Rasa server if not running"""
+        """Start Rasa server workers if not running"""
         try:
-            # Check if Rasa server is running
-            response = requests.get(f"{self.rasa_url}/status", timeout=5)
-            if response.status_code == 200:
-                logger.info("Rasa server is already running")
-                return
-        except requests.exceptions.RequestException:
-            pass
-        
-        # Start Rasa server
-        try:
-            logger.info("Starting Rasa server...")
-            subprocess.Popen([
-                "rasa", "run", "--enable-api", "--cors", "*",
-                "--port", "5005", "--model", f"{Config.RASA_PROJECT_PATH}/models"
-            ], cwd=Config.RASA_PROJECT_PATH)
-            
-            # Wait for server to start
-            import time
-            time.sleep(10)
-            
-            log_activity("System", "Rasa server started")
-            logger.info("Rasa server started successfully")
+            self.rasa_pool = get_rasa_pool()
+            self.rasa_pool.start()
+            logger.info(f"Rasa worker pool ready on ports {Config.get_rasa_worker_ports()}")
             
         except Exception as e:
             logger.error(f"Failed to start Rasa server: {str(e)}")
             log_activity("Error", f"Failed to start Rasa server: {str(e)}")
     
-    def get_response(self, user_message):
-        """Get response from Rasa or Groq based on confidence"""
+    def get_response(self, user_message, session_id=None):
+        """Get response from Rasa or Groq based on confidence, within the latency budget"""
+        start_time = time.time()
+        
+        if self.prefetcher is not None and session_id:
+            prefetched = self.prefetcher.take(session_id, user_message)
+            cached = self.response_cache.get(normalize_query(user_message)) if prefetched else None
+            if cached and not cached["stale"]:
+                if prefetched["compute_latency"] is not None:
+                    metrics.observe("prefetch.latency_saved", max(0.0, prefetched["compute_latency"] - (time.time() - start_time)))
+                self.prefetcher.schedule(session_id, user_message)
+                return {
+                    "response": cached["response"],
+                    "confidence": cached["confidence"],
+                    "model_source": cached["model_source"]
+                }
+        
+        response_data = self._respond(user_message, Deadline(Config.RESPONSE_LATENCY_BUDGET), serve_stale=True, session_id=session_id)
+        
+        if self.prefetcher is not None and session_id:
+            self.prefetcher.schedule(session_id, user_message)
+        return response_data
+    
+    def _prefetch_answer(self, question):
+        """Answer a predicted question into the cache; returns how long it took, or None"""
+        start_time = time.time()
+        self._respond(question, Deadline(Config.RESPONSE_LATENCY_BUDGET), serve_stale=False)
+        entry = self.response_cache.get(normalize_query(question))
+        if entry and entry["cached_at"] >= start_time:
+            return time.time() - start_time
+        return None
+    
+    def _is_fresh_cached(self, key):
+        entry = self.response_cache.get(key)
+        return bool(entry) and not entry["stale"]
+    
+    def _prefetch_allowed(self):
+        """Only spend LLM quota on guesses while there is plenty of it left"""
+        if self.quota_governor is None:
+            return True
+        stats = self.quota_governor.get_stats()
+        utilization = stats["global_requests"] / stats["global_requests_limit"] * 100
+        return utilization < Config.PREFETCH_MAX_QUOTA_UTILIZATION
+    
+    def _respond(self, user_message, deadline, serve_stale, session_id=None):
+        """Run the Rasa -> retrieval -> Groq chain; optionally fall back to cached answers"""
+        cache_key = normalize_query(user_message)
+        
         try:
             # First, try Rasa
-            rasa_response = self.query_rasa(user_message)
+            rasa_response = self.query_rasa(user_message, deadline)
             
             if rasa_response and rasa_response.get("confidence", 0) >= Config.RASA_CONFIDENCE_THRESHOLD:
-                return {
+                response_data = {
                     "response": rasa_response["response"],
                     "confidence": rasa_response["confidence"],
                     "model_source": "Rasa"
                 }
+                self.response_cache.put(cache_key, response_data)
+                return response_data
+            
+            # Known answer for a question Rasa was unsure about
+            retrieved = self.query_retrieval(user_message)
+            if retrieved:
+                response_data = {
+                    "response": retrieved["response"],
+                    "confidence": retrieved["coverage"],
+                    "model_source": "Retrieval"
+                }
+                self.response_cache.put(cache_key, response_data)
+                return response_data
+            
+            # Not enough budget left for a useful LLM call
+            if deadline.expired(Config.LLM_MIN_BUDGET):
+                return self._budget_exhausted_response(user_message, deadline, "groq", serve_stale)
+            
+            # A question we queued earlier has been answered in the background
+            if serve_stale and self._take_deferred_answer(cache_key):
+                cached = self._cached_response(user_message, "deferred")
+                if cached:
+                    metrics.increment("quota.deferred.served")
+                    return cached
+            
+            # Over the session or global LLM budget: degrade instead of queueing on Groq
+            tier = self.model_router.route(user_message)
+            admission = self._admit_llm_call(user_message, session_id, tier)
+            if not admission["admitted"]:
+                return self._shed_load(user_message, rasa_response, admission["reason"], serve_stale)
             
             # If Rasa confidence is low, use Groq
-            groq_response = self.query_groq(user_message)
+            groq_response = None
+            try:
+                with deadline.stage("groq"):
+                    groq_response = self.query_groq(user_message, deadline, tier)
+            except LLMBackendError as e:
+                if deadline.expired():
+                    return self._budget_exhausted_response(user_message, deadline, "groq", serve_stale)
+                
+                cached = self._cached_response(user_message, "upstream_error") if serve_stale else None
+                if cached:
+                    return cached
+                groq_response = self._llm_error_message(e)
+            else:
+                self.response_cache.put(cache_key, {
+                    "response": groq_response,
+                    "confidence": 0.9,
+                    "model_source": "Groq"
+                })
+            finally:
+                self._settle_llm_call(admission, user_message, groq_response)
             
             return {
                 "response": groq_response,
                 "confidence": 0.9,  # Groq responses are considered high confidence
-                "model_source": "Groq"
+                "model_source": "Groq",
+                "model_tier": tier
             }
             
         except Exception as e:
@@ -81,40 +231,194 @@ class ChatBot:
                 "model_source": "Error"
             }
     
-    def query_rasa(self, message):
-        """Query Rasa server"""
+    def _admit_llm_call(self, user_message, session_id, tier):
+        """Reserve quota for one LLM call (prompt plus the tier's completion limit)"""
+        if self.quota_governor is None:
+            return {"admitted": True, "reason": None, "ticket": None}
+        estimated = estimate_tokens(SYSTEM_PROMPT + user_message) + self.model_router.tier_config(tier)["max_tokens"]
+        return self.quota_governor.admit(session_id, estimated)
+    
+    def _settle_llm_call(self, admission, user_message, answer):
+        """Charge the tokens actually used instead of the reservation"""
+        if self.quota_governor is None or not admission.get("ticket"):
+            return
+        used = estimate_tokens(SYSTEM_PROMPT + user_message) + (estimate_tokens(answer) if answer else 0)
+        self.quota_governor.settle(admission["ticket"], used)
+    
+    def _shed_load(self, user_message, rasa_response, reason, serve_stale=True):
+        """Degrade when over quota: best-effort Rasa answer, then cached answer, then queue"""
+        metrics.increment("quota.shed")
+        log_activity("Quota", f"LLM call shed ({reason})")
+        
+        if rasa_response and rasa_response.get("confidence", 0) >= Config.QUOTA_BEST_EFFORT_CONFIDENCE:
+            metrics.increment("quota.degraded.rasa")
+            return {
+                "response": rasa_response["response"],
+                "confidence": rasa_response["confidence"],
+                "model_source": "Rasa (best effort)"
+            }
+        
+        if serve_stale:
+            cached = self._cached_response(user_message, "quota")
+            if cached:
+                metrics.increment("quota.degraded.cache")
+                return cached
+            
+            if self.deferred_queue.submit(normalize_query(user_message), user_message):
+                metrics.increment("quota.degraded.queued")
+                return {
+                    "response": Config.QUOTA_QUEUED_RESPONSE,
+                    "confidence": 0.0,
+                    "model_source": "Queued"
+                }
+        
+        metrics.increment("quota.degraded.fallback")
+        return {
+            "response": self._llm_error_message(LLMRateLimited(reason)),
+            "confidence": 0.0,
+            "model_source": "Fallback"
+        }
+    
+    def _answer_deferred(self, user_message):
+        """Answer a shed question once the global budget allows, so the next ask hits the cache"""
+        tier = self.model_router.route(user_message)
+        admission = self._admit_llm_call(user_message, None, tier)
+        if not admission["admitted"]:
+            raise LLMRateLimited(admission["reason"])
+        
+        answer = None
         try:
-            payload = {
-                "sender": "user",
-                "message": message
+            answer = self.query_groq(user_message, Deadline(Config.GROQ_TIMEOUT), tier)
+            self.response_cache.put(normalize_query(user_message), {
+                "response": answer,
+                "confidence": 0.9,
+                "model_source": "Groq"
+            })
+            with self._deferred_lock:
+                self._deferred_answers[normalize_query(user_message)] = True
+                # Questions never asked again would otherwise be remembered forever
+                while len(self._deferred_answers) > Config.QUOTA_DEFERRED_ANSWERS_MAX:
+                    self._deferred_answers.popitem(last=False)
+        finally:
+            self._settle_llm_call(admission, user_message, answer)
+    
+    def _take_deferred_answer(self, cache_key):
+        """Whether a queued question was answered in the background, forgetting it once asked"""
+        with self._deferred_lock:
+            return self._deferred_answers.pop(cache_key, None) is not None
+    
+    def _budget_exhausted_response(self, user_message, deadline, next_stage, serve_stale=True):
+        """Answer from cache (even if stale) or with a canned reply when out of time"""
+        # Blame the stage that used up the budget, else the one that no longer fits
+        stage = deadline.overrun_stage or next_stage
+        metrics.increment("deadline.exhausted")
+        metrics.increment(f"deadline.overrun.{stage}")
+        log_activity("Latency", f"Response budget of {deadline.budget:.1f}s exhausted in stage '{stage}' ({deadline.stage_summary()}, {deadline.remaining():.2f}s left)")
+        
+        cached = self._cached_response(user_message, "budget") if serve_stale else None
+        if cached:
+            return cached
+        
+        return {
+            "response": Config.BUDGET_EXHAUSTED_RESPONSE,
+            "confidence": 0.0,
+            "model_source": "Fallback"
+        }
+    
+    def _cached_response(self, user_message, reason):
+        """Serve a cached answer when upstream cannot; stale ones are revalidated in the background"""
+        cached = self.response_cache.get(normalize_query(user_message))
+        if not cached:
+            return None
+        
+        if not cached["stale"]:
+            metrics.increment("cache.fresh_served")
+            return {
+                "response": cached["response"],
+                "confidence": cached["confidence"],
+                "model_source": "Cache"
             }
+        
+        metrics.increment("cache.stale_served")
+        metrics.increment(f"cache.stale_served.{reason}")
+        metrics.observe("cache.stale_age", cached["age"])
+        log_activity("Cache", f"Served stale answer ({cached['age']:.0f}s old) after {reason}")
+        self._revalidate_async(user_message)
+        
+        return {
+            "response": cached["response"],
+            "confidence": cached["confidence"],
+            "model_source": "Cache (stale)"
+        }
+    
+    def _revalidate_async(self, user_message):
+        """Refresh a stale cache entry on a background thread, once per query at a time"""
+        key = normalize_query(user_message)
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+        
+        def revalidate():
+            try:
+                metrics.increment("cache.revalidations")
+                started_at = time.time()
+                
+                # Successful answers are written back to the cache by the chain itself
+                self._respond(user_message, Deadline(Config.RESPONSE_LATENCY_BUDGET), serve_stale=False)
+                entry = self.response_cache.get(key)
+                if entry and entry["cached_at"] >= started_at:
+                    metrics.increment("cache.revalidation_successes")
+                else:
+                    metrics.increment("cache.revalidation_failures")
+            except Exception as e:
+                metrics.increment("cache.revalidation_failures")
+                logger.error(f"Cache revalidation failed: {str(e)}")
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(key)
+        
+        thread = threading.Thread(target=revalidate, name="cache-revalidate")
+        thread.daemon = True
+        thread.start()
+    
+    def query_rasa(self, message, deadline=None):
+        """Query Rasa (embedded agent or server) within the remaining budget"""
+        deadline = deadline or Deadline()
+        try:
+            if deadline.expired():
+                return None
             
-            response = requests.post(
-                f"{self.rasa_url}/webhooks/rest/webhook",
-                json=payload,
-                timeout=10
-            )
+            # Parse first: intent and confidence decide whether the webhook is needed
+            with deadline.stage("rasa_parse"):
+                parse_data = self._rasa_parse(message, timeout=deadline.timeout(Config.RASA_TIMEOUT))
+            
+            intent = parse_data.get("intent", {}) if parse_data else {}
+            confidence = intent.get("confidence", 0.0)
             
-            if response.status_code == 200:
-                data = response.json()
-                if data and len(data) > 0:
-                    # Get confidence from parse endpoint
-                    parse_response = requests.post(
-                        f"{self.rasa_url}/model/parse",
-                        json={"text": message},
-                        timeout=10
-                    )
-                    
-                    confidence = 0.0
-                    if parse_response.status_code == 200:
-                        parse_data = parse_response.json()
-                        confidence = parse_data.get("intent", {}).get("confidence", 0.0)
-                    
+            # Single-step static intents are answered from the response table
+            if self.response_table is not None:
+                local_response = self.response_table.lookup(intent.get("name"))
+                if local_response:
+                    metrics.increment("rasa.local_responses")
                     return {
-                        "response": data[0].get("text", "I don't understand."),
+                        "response": local_response,
                         "confidence": confidence
                     }
             
+            if deadline.expired():
+                return None
+            
+            with deadline.stage("rasa_webhook"):
+                data = self._rasa_webhook(message, timeout=deadline.timeout(Config.RASA_TIMEOUT))
+            
+            if data and len(data) > 0:
+                metrics.increment("rasa.webhook_responses")
+                return {
+                    "response": data[0].get("text", "I don't understand."),
+                    "confidence": confidence
+                }
+            
             return None
             
         except requests.exceptions.RequestException as e:
@@ -124,40 +428,121 @@ class ChatBot:
             logger.error(f"Unexpected error in Rasa query: {str(e)}")
             return None
     
-    def query_groq(self, message):
-        """Query Groq API"""
+    def query_retrieval(self, message):
+        """Look the question up in the local FAQ index"""
+        if self.retriever is None:
+            return None
+        
         try:
-            # Create IT support context
-            system_message = """You are an IT support specialist. Provide concise, accurate, and helpful responses to IT-related questions. 
-            Keep responses short and focused on practical solutions. If the question is not IT-related, politely redirect to IT topics."""
-            
-            payload = {
-                "model": Config.GROQ_MODEL,
-                "messages": [
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": message}
-                ],
-                "max_tokens": 150,
-                "temperature": 0.1
-            }
-            
-            response = requests.post(
-                f"{Config.GROQ_BASE_URL}/chat/completions",
-                headers=self.groq_headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data["choices"][0]["message"]["content"].strip()
-            else:
-                logger.error(f"Groq API error: {response.status_code} - {response.text}")
-                return "I'm having trouble connecting to the knowledge base. Please try again."
-                
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Groq query failed: {str(e)}")
-            return "I'm experiencing connectivity issues. Please try again later."
+            self.faq_indexer.refresh()
+            metrics.increment("retrieval.queries")
+            result = self.retriever.best_answer(message)
+            if result:
+                # Every hit is a question that would otherwise have gone to the LLM
+                metrics.increment("retrieval.hits")
+                metrics.increment(f"retrieval.hits.{result['source']}")
+            return result
+        
         except Exception as e:
-            logger.error(f"Unexpected error in Groq query: {str(e)}")
-            return "I encountered an unexpected error. Please try again."
+            logger.error(f"Error querying FAQ index: {str(e)}")
+            log_activity("Error", f"Error querying FAQ index: {str(e)}")
+            return None
+    
+    def _rasa_webhook(self, message, timeout=10):
+        """Get bot messages for a user message"""
+        if self.embedded_agent is not None:
+            return self.embedded_agent.handle_text(message, sender="user", timeout=timeout)
+        
+        payload = {
+            "sender": "user",
+            "message": message
+        }
+        
+        response = self.rasa_pool.post("/webhooks/rest/webhook", payload, timeout)
+        
+        if response.status_code == 200:
+            return response.json()
+        return None
+    
+    def _rasa_parse(self, message, timeout=10):
+        """Get intent prediction for a user message"""
+        if self.embedded_agent is not None:
+            return self.embedded_agent.parse(message, timeout=timeout)
+        
+        parse_response = self.rasa_pool.post("/model/parse", {"text": message}, timeout)
+        
+        if parse_response.status_code == 200:
+            return parse_response.json()
+        return None
+    
+    def query_groq(self, message, deadline=None, tier=None):
+        """Query Groq API, coalescing identical in-flight questions; raises LLMBackendError on failure"""
+        deadline = deadline or Deadline()
+        tier = tier or self.model_router.route(message)
+        metrics.increment("groq.requests")
+        
+        try:
+            result, shared = self.groq_inflight.do(
+                normalize_query(message),
+                lambda: self._query_groq_rate_limited(message, deadline, tier),
+                timeout=None if deadline.budget is None else deadline.remaining()
+            )
+        except TimeoutError as e:
+            raise LLMBackendError(str(e))
+        
+        if shared:
+            metrics.increment("groq.coalesced_requests")
+            logger.info("Groq request coalesced with an identical in-flight query")
+        
+        return result
+    
+    def _query_groq_rate_limited(self, message, deadline, tier):
+        """Wait for a rate limit token, rejecting if the wait would not fit the budget"""
+        max_wait = min(Config.GROQ_LIMITER_MAX_WAIT, max(0.0, deadline.remaining() - Config.LLM_MIN_BUDGET))
+        wait_time = self.groq_limiter.acquire(max_wait=max_wait)
+        
+        if wait_time is None:
+            metrics.increment("groq.limiter_rejections")
+            log_activity("RateLimit", f"Groq request rejected, limiter queue: {self.groq_limiter.queue_length()}")
+            raise LLMRateLimited("Groq rate limit wait exceeds the remaining budget")
+        
+        metrics.observe("groq.limiter_wait", wait_time)
+        return self._query_groq_upstream(message, deadline, tier)
+    
+    def _query_groq_upstream(self, message, deadline, tier):
+        """Send the request to the tier's models on the LLM backends, hedging slow calls"""
+        # Create IT support context
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": message}
+        ]
+        
+        tier_config = self.model_router.tier_config(tier)
+        start_time = time.time()
+        text, backend_name = self.llm_backends.complete(
+            messages,
+            max_tokens=tier_config["max_tokens"],
+            temperature=0.1,
+            timeout=deadline.timeout(Config.GROQ_TIMEOUT),
+            tier=tier
+        )
+        
+        # Per-tier latency and estimated cost
+        tokens = estimate_tokens(SYSTEM_PROMPT + message) + estimate_tokens(text)
+        metrics.increment(f"llm.tier.{tier}.requests")
+        metrics.increment(f"llm.tier.{tier}.tokens", tokens)
+        metrics.increment(f"llm.tier.{tier}.cost", self.model_router.estimate_cost(tier, tokens))
+        metrics.observe(f"llm.tier.{tier}.latency", time.time() - start_time)
+        
+        if backend_name != self.llm_backends.backends[0].name:
+            logger.info(f"LLM answer served by fallback backend {backend_name}")
+        
+        return text
+    
+    def _llm_error_message(self, error):
+        """User-facing text for a failed LLM call"""
+        if isinstance(error, LLMRateLimited):
+            return "We're receiving a lot of questions right now. Please try again in a moment."
+        
+        logger.error(f"Groq query failed: {str(error)}")
+        return "I'm experiencing connectivity issues. Please try again later."
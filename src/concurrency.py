@@ -0,0 +1,151 @@
+# Concurrency helpers for upstream API calls
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+class _InFlightCall:
+    """State of a single shared call"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesce identical concurrent calls into one execution"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+    
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Run fn once per key; returns (result, shared) where shared means another caller ran it"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _InFlightCall()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+        
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"Timed out waiting for in-flight call '{key}'")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+    
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running"""
+        with self._lock:
+            return len(self._calls)
+
+class TokenBucket:
+    """Token-bucket rate limiter with FIFO reservations and bounded queue"""
+    
+    def __init__(self, rate_per_second: float, capacity: float, max_queue: Optional[int] = None):
+        self.rate = max(rate_per_second, 1e-9)
+        self.capacity = max(capacity, 1)
+        self.max_queue = max_queue
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._waiting = 0
+        self._lock = threading.Lock()
+    
+    def _refill(self) -> None:
+        """Add tokens earned since last update"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def acquire(self, tokens: float = 1, max_wait: Optional[float] = None) -> Optional[float]:
+        """Reserve tokens and wait for them; returns seconds waited, or None if rejected"""
+        with self._lock:
+            self._refill()
+            
+            # Tokens are reserved up front, so callers are served in arrival order
+            wait_time = max(0.0, (tokens - self._tokens) / self.rate)
+            
+            if wait_time > 0 and self.max_queue is not None and self._waiting >= self.max_queue:
+                return None
+            
+            # Reject early when the wait would blow the caller's deadline
+            if max_wait is not None and wait_time > max_wait:
+                return None
+            
+            self._tokens -= tokens
+            if wait_time > 0:
+                self._waiting += 1
+        
+        if wait_time > 0:
+            try:
+                time.sleep(wait_time)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+        
+        return wait_time
+    
+    def queue_length(self) -> int:
+        """Number of callers currently waiting for tokens"""
+        with self._lock:
+            return self._waiting
+    
+    def available_tokens(self) -> float:
+        """Tokens currently available (negative when reservations are queued)"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+class Deadline:
+    """Latency budget shared by every stage of one request"""
+    
+    def __init__(self, budget_seconds: Optional[float] = None):
+        self.budget = budget_seconds
+        self.started = time.monotonic()
+        self.stages = []
+        self.overrun_stage = None
+    
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+    
+    def remaining(self) -> float:
+        """Seconds left in the budget (infinite when unbudgeted)"""
+        if self.budget is None:
+            return float("inf")
+        return max(0.0, self.budget - self.elapsed())
+    
+    def timeout(self, cap: float) -> float:
+        """Timeout for the next call: its own cap or whatever budget is left"""
+        return min(cap, self.remaining())
+    
+    def expired(self, reserve: float = 0.0) -> bool:
+        return self.remaining() <= reserve
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage; the first stage that ends with no budget left overran it"""
+        stage_start = time.monotonic()
+        try:
+            yield self
+        finally:
+            self.stages.append((name, time.monotonic() - stage_start))
+            if self.overrun_stage is None and self.budget is not None and self.expired():
+                self.overrun_stage = name
+    
+    def stage_summary(self) -> str:
+        return ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.stages)
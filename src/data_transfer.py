@@ -0,0 +1,253 @@
+# Streaming JSONL import/export for feedback and chat records
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from config.config import Config
+from src.chat_ring_buffer import ChatRingBuffer, get_chat_store
+from src.feedback_store import FeedbackStore, get_feedback_store
+from src.utils import log_activity
+
+FEEDBACK_TYPES = ("positive", "negative")
+
+@contextmanager
+def _open_input(path: str):
+    """Text lines from a file, a .gz file, or stdin for '-'"""
+    if path == "-":
+        yield sys.stdin
+    elif path.endswith(".gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            yield f
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            yield f
+
+@contextmanager
+def _open_output(path: str):
+    """Write to a temp file renamed into place on success, or to stdout for '-'"""
+    if path == "-":
+        yield sys.stdout
+        sys.stdout.flush()
+        return
+    
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + "_", suffix=".tmp")
+    os.close(temp_fd)
+    try:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(temp_path, "wt", encoding="utf-8") as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+@contextmanager
+def _open_rejects(path: Optional[str]):
+    """Where invalid lines are copied, if anywhere"""
+    if not path:
+        yield None
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        yield f
+
+def _content_id(record: Dict[str, Any]) -> str:
+    """Stable id for records from sources without one, so re-importing the same file deduplicates"""
+    key = "|".join(str(record.get(field, "")) for field in ("timestamp", "user_query", "bot_response", "feedback_type"))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+def _validate_timestamp(record: Dict[str, Any]) -> Optional[str]:
+    if not record.get("timestamp"):
+        return None
+    try:
+        datetime.fromisoformat(str(record["timestamp"]))
+        return None
+    except ValueError:
+        return f"invalid timestamp {record['timestamp']!r}"
+
+def _assign_id(record: Dict[str, Any]) -> None:
+    """Content id taken before a missing timestamp is defaulted, since the import time differs on every run"""
+    record["id"] = str(record.get("id") or _content_id(record))
+    record["timestamp"] = record.get("timestamp") or datetime.now().isoformat()
+
+def validate_feedback(record: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Normalized feedback record, or None and the reason it was rejected"""
+    if not isinstance(record, dict):
+        return None, "not an object"
+    if not isinstance(record.get("user_query"), str) or not record["user_query"].strip():
+        return None, "missing user_query"
+    if record.get("feedback_type") not in FEEDBACK_TYPES:
+        return None, f"feedback_type must be one of {', '.join(FEEDBACK_TYPES)}"
+    
+    record = dict(record)
+    error = _validate_timestamp(record)
+    if error:
+        return None, error
+    for field in ("bot_response", "issue_description", "expected_answer"):
+        record[field] = str(record.get(field) or "").strip()
+    record["user_query"] = record["user_query"].strip()
+    record.setdefault("model_source", "Import")
+    record["processed"] = bool(record.get("processed", False))
+    record["retry_count"] = int(record.get("retry_count") or 0)
+    _assign_id(record)
+    return record, None
+
+def validate_chat(record: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Normalized chat turn, or None and the reason it was rejected"""
+    if not isinstance(record, dict):
+        return None, "not an object"
+    if not isinstance(record.get("user_query"), str) or not isinstance(record.get("bot_response"), str):
+        return None, "user_query and bot_response must be strings"
+    
+    record = dict(record)
+    error = _validate_timestamp(record)
+    if error:
+        return None, error
+    try:
+        record["confidence"] = float(record.get("confidence") or 0.0)
+    except (TypeError, ValueError):
+        return None, f"invalid confidence {record.get('confidence')!r}"
+    record.setdefault("model_source", "Import")
+    _assign_id(record)
+    return record, None
+
+def _parse_lines(lines: Iterable[str], validator, report: Dict[str, Any], rejects) -> Iterator[Dict[str, Any]]:
+    """Valid records from JSONL lines; invalid ones are counted and copied to the rejects file"""
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        report["read"] += 1
+        try:
+            raw = json.loads(line)
+        except ValueError as e:
+            record, error = None, f"invalid JSON: {str(e)}"
+        else:
+            try:
+                record, error = validator(raw)
+            except (TypeError, ValueError) as e:
+                record, error = None, str(e)
+        
+        if record is None:
+            report["invalid"] += 1
+            if rejects is not None:
+                rejects.write(json.dumps({"line": line_number, "error": error, "raw": line.rstrip("\n")}, ensure_ascii=False) + "\n")
+            continue
+        yield record
+
+def _new_report(kind: str, path: str) -> Dict[str, Any]:
+    return {"kind": kind, "path": path, "read": 0, "imported": 0, "duplicates": 0, "invalid": 0, "batches": 0, "seconds": 0.0}
+
+def import_feedback(path: str, store: FeedbackStore = None, batch_size: int = None, replace: bool = False,
+                    rejects_path: str = None) -> Dict[str, Any]:
+    """Stream a JSONL file of feedback into the store, committing every batch_size records"""
+    store = store if store is not None else get_feedback_store()
+    batch_size = batch_size or Config.DATA_TRANSFER_BATCH_SIZE
+    report = _new_report("feedback", path)
+    start_time = time.time()
+    
+    with _open_input(path) as lines, _open_rejects(rejects_path) as rejects:
+        batch = OrderedDict()
+        for record in _parse_lines(lines, validate_feedback, report, rejects):
+            if record["id"] in batch:
+                report["duplicates"] += 1
+                if not replace:
+                    continue
+            batch[record["id"]] = record
+            if len(batch) >= batch_size:
+                _commit_feedback(store, batch, report, replace)
+        _commit_feedback(store, batch, report, replace)
+    
+    report["seconds"] = round(time.time() - start_time, 3)
+    log_activity("Data", f"Imported {report['imported']} feedback records from {path} "
+                         f"({report['duplicates']} duplicates, {report['invalid']} invalid) in {report['seconds']}s")
+    return report
+
+def _commit_feedback(store: FeedbackStore, batch: "OrderedDict[str, Dict[str, Any]]", report: Dict[str, Any],
+                     replace: bool) -> None:
+    """One append per partition for the batch; ids already committed are skipped unless replacing"""
+    if not batch:
+        return
+    existing = store.existing_ids(batch.keys())
+    report["duplicates"] += len(existing)
+    records = list(batch.values()) if replace else [record for record_id, record in batch.items() if record_id not in existing]
+    if records and not store.append_many(records):
+        raise IOError(f"Failed to commit feedback batch after {report['imported']} records")
+    report["imported"] += len(records)
+    report["batches"] += 1
+    batch.clear()
+
+def import_chat(path: str, store: ChatRingBuffer = None, batch_size: int = None,
+                rejects_path: str = None) -> Dict[str, Any]:
+    """Stream a JSONL file of chat turns into the ring buffer, committing every batch_size turns"""
+    store = store if store is not None else get_chat_store()
+    batch_size = batch_size or Config.DATA_TRANSFER_BATCH_SIZE
+    report = _new_report("chat", path)
+    start_time = time.time()
+    
+    # The ring keeps only the newest `capacity` turns, so remembering that many ids is
+    # enough to keep duplicates out of what survives the import
+    recent_ids = OrderedDict((turn.get("id"), True) for turn in store.read_last())
+    
+    with _open_input(path) as lines, _open_rejects(rejects_path) as rejects:
+        batch = []
+        for record in _parse_lines(lines, validate_chat, report, rejects):
+            if record["id"] in recent_ids:
+                report["duplicates"] += 1
+                continue
+            recent_ids[record["id"]] = True
+            if len(recent_ids) > store.capacity:
+                recent_ids.popitem(last=False)
+            
+            batch.append(record)
+            if len(batch) >= batch_size:
+                _commit_chat(store, batch, report)
+        _commit_chat(store, batch, report)
+    
+    report["seconds"] = round(time.time() - start_time, 3)
+    log_activity("Data", f"Imported {report['imported']} chat turns from {path} "
+                         f"({report['duplicates']} duplicates, {report['invalid']} invalid) in {report['seconds']}s")
+    return report
+
+def _commit_chat(store: ChatRingBuffer, batch: list, report: Dict[str, Any]) -> None:
+    if not batch:
+        return
+    if not store.append_many(batch):
+        raise IOError(f"Failed to commit chat batch after {report['imported']} turns")
+    report["imported"] += len(batch)
+    report["batches"] += 1
+    batch.clear()
+
+def _export(records: Iterable[Dict[str, Any]], path: str, kind: str) -> Dict[str, Any]:
+    start_time = time.time()
+    exported = 0
+    with _open_output(path) as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            exported += 1
+    
+    report = {"kind": kind, "path": path, "exported": exported, "seconds": round(time.time() - start_time, 3)}
+    if path != "-":
+        log_activity("Data", f"Exported {exported} {kind} records to {path} in {report['seconds']}s")
+    return report
+
+def export_feedback(path: str, store: FeedbackStore = None, start: datetime = None,
+                    end: datetime = None) -> Dict[str, Any]:
+    """Write feedback as JSONL, one partition in memory at a time, optionally limited to [start, end)"""
+    store = store if store is not None else get_feedback_store()
+    return _export(store.iter_records(start, end), path, "feedback")
+
+def export_chat(path: str, store: ChatRingBuffer = None) -> Dict[str, Any]:
+    """Write the chat turns in the ring buffer as JSONL, oldest first"""
+    store = store if store is not None else get_chat_store()
+    return _export(store.read_last(), path, "chat")
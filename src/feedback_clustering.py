@@ -0,0 +1,112 @@
+# Near-duplicate grouping of feedback before training generation
+import hashlib
+from collections import defaultdict
+from typing import Any, Dict, List, Set
+from config.config import Config
+from src.utils import normalize_query
+
+def char_ngrams(text: str, n: int = 3) -> Set[str]:
+    """Character n-grams of the normalized text, padded so short words still count"""
+    normalized = f" {normalize_query(text)} "
+    if len(normalized) <= n:
+        return {normalized}
+    return {normalized[i:i + n] for i in range(len(normalized) - n + 1)}
+
+def jaccard(left: Set[str], right: Set[str]) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+class FeedbackCluster:
+    """Feedback items that ask the same question, trained from one representative"""
+    
+    def __init__(self, feedback: Dict[str, Any], ngrams: Set[str]):
+        self.members = [feedback]
+        self.ngrams = ngrams
+        self.keys = {feedback_key(feedback)}
+        self.answer = answer_key(feedback)
+    
+    def accepts(self, feedback: Dict[str, Any]) -> bool:
+        """Only the representative's answer is trained, so a different correction needs its own cluster"""
+        answer = answer_key(feedback)
+        return not answer or not self.answer or answer == self.answer
+    
+    def add(self, feedback: Dict[str, Any], key: str) -> None:
+        self.members.append(feedback)
+        self.keys.add(key)
+        self.answer = self.answer or answer_key(feedback)
+    
+    @property
+    def representative(self) -> Dict[str, Any]:
+        """The member whose answer the generated response is built from"""
+        for feedback in self.members:
+            if (feedback.get("expected_answer") or "").strip():
+                return feedback
+        return self.members[0]
+    
+    def variants(self, limit: int = None) -> List[str]:
+        """Distinct phrasings of the question, representative first"""
+        limit = limit or Config.FEEDBACK_CLUSTER_MAX_EXAMPLES
+        queries = []
+        seen = set()
+        for feedback in [self.representative] + self.members:
+            query = (feedback.get("user_query") or "").strip()
+            key = normalize_query(query)
+            if query and key not in seen:
+                seen.add(key)
+                queries.append(query)
+        return queries[:limit]
+    
+    def __len__(self) -> int:
+        return len(self.members)
+
+def feedback_key(feedback: Dict[str, Any]) -> str:
+    """Hash of the normalized query; identical questions always share a cluster"""
+    text = f"{feedback.get('feedback_type', '')}|{normalize_query(feedback.get('user_query', ''))}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def answer_key(feedback: Dict[str, Any]) -> str:
+    """Normalized expected answer, empty when the feedback gave none"""
+    return normalize_query(feedback.get("expected_answer") or "")
+
+def cluster_feedback(feedback_items: List[Dict[str, Any]], threshold: float = None,
+                     n: int = None) -> List[FeedbackCluster]:
+    """Group feedback by exact normalized query, then merge groups whose n-gram similarity reaches threshold"""
+    threshold = Config.FEEDBACK_CLUSTER_SIMILARITY if threshold is None else threshold
+    n = n or Config.FEEDBACK_CLUSTER_NGRAM
+    
+    clusters = []
+    by_key = {}
+    # n-gram -> clusters containing it, so each item is only compared with clusters it overlaps
+    postings = defaultdict(set)
+    
+    for feedback in feedback_items:
+        key = feedback_key(feedback)
+        if key in by_key and by_key[key].accepts(feedback):
+            by_key[key].add(feedback, key)
+            continue
+        
+        ngrams = char_ngrams(feedback.get("user_query", ""), n)
+        feedback_type = feedback.get("feedback_type")
+        best, best_score = None, threshold
+        candidates = set()
+        for gram in ngrams:
+            candidates.update(postings[gram])
+        for index in sorted(candidates):
+            cluster = clusters[index]
+            if cluster.members[0].get("feedback_type") != feedback_type or not cluster.accepts(feedback):
+                continue
+            score = jaccard(ngrams, cluster.ngrams)
+            if score >= best_score:
+                best, best_score = cluster, score
+        
+        if best is None:
+            best = FeedbackCluster(feedback, ngrams)
+            clusters.append(best)
+            for gram in ngrams:
+                postings[gram].add(len(clusters) - 1)
+        else:
+            best.add(feedback, key)
+        by_key[key] = best
+    
+    return clusters
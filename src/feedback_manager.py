@@ -5,11 +5,15 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from config.config import Config
 from src.utils import safe_load_json, safe_save_json, log_activity
+from src.feedback_store import get_feedback_store
+from src.chat_ring_buffer import get_chat_store
 
 class FeedbackManager:
     def __init__(self):
-        self.feedback_file = Config.FEEDBACK_DATA_FILE
-        self.chat_history_file = Config.CHAT_HISTORY_FILE
+        self.feedback_store = get_feedback_store()
+        self.feedback_file = self.feedback_store.store_dir
+        self.chat_store = get_chat_store()
+        self.chat_history_file = self.chat_store.store_file
         
         # Ensure files exist and are valid
         self._initialize_feedback_files()
@@ -17,16 +21,7 @@ class FeedbackManager:
     def _initialize_feedback_files(self) -> None:
         """Initialize feedback files with proper structure"""
         try:
-            # Initialize feedback data file
-            feedback_data = safe_load_json(self.feedback_file, [])
-            if not isinstance(feedback_data, list):
-                safe_save_json(self.feedback_file, [])
-            
-            # Initialize chat history file
-            chat_history = safe_load_json(self.chat_history_file, [])
-            if not isinstance(chat_history, list):
-                safe_save_json(self.chat_history_file, [])
-            
+            # Chat history and feedback stores create (or migrate) their files on open
             log_activity("FeedbackManager", "Feedback files initialized successfully")
             
         except Exception as e:
@@ -35,7 +30,8 @@ class FeedbackManager:
     def process_feedback(self, message_index: int, user_query: str, bot_response: str, 
                         model_source: str, feedback_type: str, 
                         issue_description: Optional[str] = None, 
-                        expected_answer: Optional[str] = None) -> bool:
+                        expected_answer: Optional[str] = None,
+                        model_tier: Optional[str] = None) -> bool:
         """Process and store feedback with enhanced error handling"""
         try:
             # Create feedback entry
@@ -52,19 +48,11 @@ class FeedbackManager:
                 "processed": False,
                 "retry_count": 0
             }
+            if model_tier:
+                feedback_entry["model_tier"] = model_tier
             
-            # Load existing feedback
-            feedback_data = safe_load_json(self.feedback_file, [])
-            
-            # Ensure it's a list
-            if not isinstance(feedback_data, list):
-                feedback_data = []
-            
-            # Add new feedback
-            feedback_data.append(feedback_entry)
-            
-            # Save feedback
-            success = safe_save_json(self.feedback_file, feedback_data)
+            # Append to the feedback log
+            success = self.feedback_store.append(feedback_entry)
             
             if success:
                 log_activity("Feedback", f"Feedback stored: {feedback_type} for {model_source}")
@@ -86,38 +74,23 @@ class FeedbackManager:
         """Check if auto-training threshold is reached"""
         try:
             # Get unprocessed feedback count
-            unprocessed_count = len(self.get_unprocessed_feedback())
+            unprocessed_count = self.feedback_store.stats()["unprocessed"]
             
             # Get threshold
             from src.training_manager import TrainingManager
-            training_manager = TrainingManager()
-            threshold = training_manager.load_feedback_threshold()
+            threshold = TrainingManager.load_feedback_threshold()
             
             if unprocessed_count >= threshold:
                 log_activity("Training", f"Auto-training threshold reached: {unprocessed_count}/{threshold}")
                 
-                # Trigger training in a separate thread to avoid blocking UI
-                import threading
-                training_thread = threading.Thread(
-                    target=self._trigger_auto_training,
-                    args=(training_manager,)
-                )
-                training_thread.daemon = True
-                training_thread.start()
+                # The shared scheduler debounces triggers and runs one job at a time in the background
+                from src.training_scheduler import training_scheduler
+                training_scheduler.request_run(f"threshold {unprocessed_count}/{threshold}")
                 
         except Exception as e:
             log_activity("Error", f"Auto-training check failed: {str(e)}")
     
-    def _trigger_auto_training(self, training_manager) -> None:
-        """Trigger auto-training in background"""
-        try:
-            log_activity("Training", "Triggering automatic training")
-            result = training_manager.process_reviews_manual()
-            log_activity("Training", f"Auto-training result: {result}")
-        except Exception as e:
-            log_activity("Error", f"Auto-training failed: {str(e)}")
-    
-    def save_chat_history(self, user_query: str, response_data: Dict[str, Any]) -> None:
+    def save_chat_history(self, user_query: str, response_data: Dict[str, Any], session_id: Optional[str] = None) -> None:
         """Save chat history with enhanced error handling"""
         try:
             # Create chat entry
@@ -129,23 +102,19 @@ class FeedbackManager:
                 "confidence": response_data.get("confidence", 0.0),
                 "model_source": response_data.get("model_source", "Unknown")
             }
+            if response_data.get("model_tier"):
+                chat_entry["model_tier"] = response_data["model_tier"]
+            if session_id:
+                chat_entry["session_id"] = session_id
+            
+            if Config.CHAT_WRITER_ENABLED:
+                # Journaled and queued; the background writer batches it into the ring buffer
+                from src.chat_writer import get_chat_writer
+                get_chat_writer().submit(chat_entry)
+                return
             
-            # Load existing chat history
-            chat_history = safe_load_json(self.chat_history_file, [])
-            
-            # Ensure it's a list
-            if not isinstance(chat_history, list):
-                chat_history = []
-            
-            # Add new chat entry
-            chat_history.append(chat_entry)
-            
-            # Keep only last 1000 entries to prevent file bloat
-            if len(chat_history) > 1000:
-                chat_history = chat_history[-1000:]
-            
-            # Save chat history
-            success = safe_save_json(self.chat_history_file, chat_history)
+            # One slot write plus the header; the oldest turn is overwritten once full
+            success = self.chat_store.append(chat_entry)
             
             if success:
                 log_activity("Chat", f"Chat saved: {user_query[:50]}... -> {response_data.get('model_source', 'Unknown')}")
@@ -158,18 +127,8 @@ class FeedbackManager:
     def get_unprocessed_feedback(self) -> List[Dict[str, Any]]:
         """Get unprocessed feedback with error handling"""
         try:
-            feedback_data = safe_load_json(self.feedback_file, [])
-            
-            if not isinstance(feedback_data, list):
-                return []
-            
-            # Filter unprocessed feedback
-            unprocessed = [
-                feedback for feedback in feedback_data
-                if not feedback.get("processed", False)
-            ]
-            
-            return unprocessed
+            # Served from the store's unprocessed-id set
+            return self.feedback_store.unprocessed()
             
         except Exception as e:
             log_activity("Error", f"Failed to get unprocessed feedback: {str(e)}")
@@ -178,26 +137,15 @@ class FeedbackManager:
     def mark_feedback_processed(self, feedback_ids: List[str]) -> None:
         """Mark feedback as processed"""
         try:
-            feedback_data = safe_load_json(self.feedback_file, [])
+            # One batched patch write for all ids
+            processed_timestamp = datetime.now().isoformat()
+            updated_count = self.feedback_store.update_many({
+                feedback_id: {"processed": True, "processed_timestamp": processed_timestamp}
+                for feedback_id in set(feedback_ids)
+            })
             
-            if not isinstance(feedback_data, list):
-                return
-            
-            # Mark specified feedback as processed
-            updated_count = 0
-            for feedback in feedback_data:
-                if feedback.get("id") in feedback_ids:
-                    feedback["processed"] = True
-                    feedback["processed_timestamp"] = datetime.now().isoformat()
-                    updated_count += 1
-            
-            # Save updated feedback
             if updated_count > 0:
-                success = safe_save_json(self.feedback_file, feedback_data)
-                if success:
-                    log_activity("Feedback", f"Marked {updated_count} feedback entries as processed")
-                else:
-                    log_activity("Error", "Failed to save processed feedback updates")
+                log_activity("Feedback", f"Marked {updated_count} feedback entries as processed")
             
         except Exception as e:
             log_activity("Error", f"Failed to mark feedback as processed: {str(e)}")
@@ -205,60 +153,32 @@ class FeedbackManager:
     def get_feedback_stats(self) -> Dict[str, int]:
         """Get feedback statistics"""
         try:
-            feedback_data = safe_load_json(self.feedback_file, [])
-            
-            if not isinstance(feedback_data, list):
-                return {"total": 0, "processed": 0, "unprocessed": 0, "positive": 0, "negative": 0}
-            
-            total = len(feedback_data)
-            processed = sum(1 for f in feedback_data if f.get("processed", False))
-            unprocessed = total - processed
-            positive = sum(1 for f in feedback_data if f.get("feedback_type") == "positive")
-            negative = sum(1 for f in feedback_data if f.get("feedback_type") == "negative")
-            
-            return {
-                "total": total,
-                "processed": processed,
-                "unprocessed": unprocessed,
-                "positive": positive,
-                "negative": negative
-            }
+            # Counters are maintained on every write, no scan needed
+            return self.feedback_store.stats()
             
         except Exception as e:
             log_activity("Error", f"Failed to get feedback stats: {str(e)}")
             return {"total": 0, "processed": 0, "unprocessed": 0, "positive": 0, "negative": 0}
     
+    def rebuild_feedback_counters(self) -> Dict[str, int]:
+        """Recount feedback from the log and rewrite the counters sidecar"""
+        try:
+            return self.feedback_store.rebuild_counters()
+        except Exception as e:
+            log_activity("Error", f"Failed to rebuild feedback counters: {str(e)}")
+            return self.get_feedback_stats()
+    
     def cleanup_old_feedback(self, days: int = 30) -> None:
         """Clean up old feedback entries"""
         try:
-            feedback_data = safe_load_json(self.feedback_file, [])
-            
-            if not isinstance(feedback_data, list):
-                return
-            
             # Calculate cutoff date
             cutoff_date = datetime.now() - timedelta(days=days)
             
-            # Filter out old feedback
-            filtered_feedback = []
-            removed_count = 0
-            
-            for feedback in feedback_data:
-                try:
-                    feedback_date = datetime.fromisoformat(feedback.get("timestamp", ""))
-                    if feedback_date >= cutoff_date:
-                        filtered_feedback.append(feedback)
-                    else:
-                        removed_count += 1
-                except:
-                    # Keep feedback with invalid timestamps
-                    filtered_feedback.append(feedback)
-            
-            # Save cleaned feedback
-            if removed_count > 0:
-                success = safe_save_json(self.feedback_file, filtered_feedback)
-                if success:
-                    log_activity("Cleanup", f"Removed {removed_count} old feedback entries")
+            # Whole partitions before the cutoff are unlinked; only the boundary one is filtered.
+            # Feedback with invalid timestamps lives in the undated partition and is kept.
+            removed_count = self.feedback_store.drop_before(cutoff_date)
+            if removed_count:
+                log_activity("Cleanup", f"Removed {removed_count} old feedback entries")
             
         except Exception as e:
             log_activity("Error", f"Failed to cleanup old feedback: {str(e)}")
@@ -0,0 +1,624 @@
+# Log-structured feedback store, partitioned by time (JSONL files with an in-memory index)
+import json
+import os
+import tempfile
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from config.config import Config
+from src.utils import log_activity, safe_load_json, safe_save_json
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COUNTER_KEYS = ("total", "processed", "unprocessed", "positive", "negative")
+UNDATED_PARTITION = "undated"
+PARTITION_FORMATS = {"monthly": "%Y-%m", "daily": "%Y-%m-%d"}
+
+class _Partition:
+    """One period's log file and what the store knows about it"""
+    
+    def __init__(self, key: str, path: str):
+        self.key = key
+        self.path = path
+        self.ids = {}  # Ordered set of record ids
+        self.counters = dict.fromkeys(COUNTER_KEYS, 0)
+        self.dead_lines = 0
+        self.read_offset = 0
+        self.file_id = None
+
+class FeedbackStore:
+    """Feedback records as append-only JSONL logs, one per month (or day), with an id -> {partition, offset, record} index"""
+    
+    # Each line is one operation: a full record ("put"), field updates ("patch")
+    # or a removal ("delete"). A record lives in the partition of its timestamp;
+    # manifest.json lists the partitions. The logs are replayed once into the
+    # index; after that writes only append and reads come from memory. Dropping
+    # a whole partition (retention) is a file unlink plus a manifest update, and
+    # date-range queries only touch the partitions that overlap the range.
+    # Puts carry a write sequence number, so when a record has moved between
+    # partitions the newest copy wins whatever order the partitions replay in.
+    #
+    # Counters (total/processed/positive/...) and the set of unprocessed ids are
+    # adjusted as each line is applied, per partition and in total, so stats never
+    # scan the records. After every write they are checkpointed to a sidecar with
+    # the log offsets they cover; a sidecar that disagrees is rebuilt on open.
+    
+    def __init__(self, store_dir: str = None, legacy_file: str = None):
+        self.store_dir = store_dir or Config.FEEDBACK_STORE_DIR
+        self.manifest_file = os.path.join(self.store_dir, "manifest.json")
+        self.counters_file = os.path.join(self.store_dir, "counters.json")
+        self.legacy_files = [legacy_file] if legacy_file is not None else \
+            [Config.FEEDBACK_STORE_FILE, Config.FEEDBACK_DATA_FILE]
+        self.granularity = Config.FEEDBACK_PARTITION_GRANULARITY
+        self._partitions = {}
+        self._index = {}
+        self._counters = dict.fromkeys(COUNTER_KEYS, 0)
+        self._unprocessed_ids = {}
+        self._manifest_version = None
+        self._lock = threading.RLock()
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._load()
+        self._migrate_legacy()
+        self._check_counters_sidecar()
+    
+    def _partition_key(self, record: Dict[str, Any]) -> str:
+        try:
+            timestamp = datetime.fromisoformat(str(record.get("timestamp", "")))
+            return timestamp.strftime(PARTITION_FORMATS[self.granularity])
+        except (ValueError, KeyError):
+            return UNDATED_PARTITION
+    
+    def _partition_bounds(self, key: str):
+        """[start, end) of a partition's period"""
+        start = datetime.strptime(key, PARTITION_FORMATS[self.granularity])
+        if self.granularity == "daily":
+            return start, start + timedelta(days=1)
+        return start, (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    
+    def _read_manifest(self) -> Dict[str, Any]:
+        manifest = safe_load_json(self.manifest_file, {})
+        return manifest if isinstance(manifest, dict) else {}
+    
+    def _manifest_lock(self):
+        """Exclusive lock held across a manifest read-modify-write"""
+        f = open(self.manifest_file + ".lock", "a")
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return f
+    
+    def _write_manifest(self, removed: Iterable[str] = ()) -> None:
+        """Merge our partitions into the manifest on disk, keeping ones other processes added"""
+        removed = set(removed)
+        with self._manifest_lock():
+            listed = self._read_manifest().get("partitions") or {}
+            partitions = {key: info for key, info in listed.items() if key not in removed}
+            partitions.update({key: {"file": os.path.basename(partition.path)} for key, partition in self._partitions.items()})
+            safe_save_json(self.manifest_file, {
+                "granularity": self.granularity,
+                "partitions": dict(sorted(partitions.items())),
+                "updated_at": datetime.now().isoformat()
+            })
+            self._manifest_version = self._current_manifest_version()
+        
+        for key, info in partitions.items():
+            if key not in self._partitions:
+                self._partitions[key] = _Partition(key, os.path.join(self.store_dir, info.get("file", f"{key}.jsonl")))
+    
+    def _current_manifest_version(self) -> Optional[tuple]:
+        """Changes on every rewrite: the manifest is replaced atomically, so the inode changes even within one mtime tick"""
+        try:
+            stat = os.stat(self.manifest_file)
+            return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def _get_partition(self, key: str) -> _Partition:
+        """Existing partition, or a new one registered in the manifest"""
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = _Partition(key, os.path.join(self.store_dir, f"{key}.jsonl"))
+            open(partition.path, "a", encoding="utf-8").close()
+            self._partitions[key] = partition
+            self._write_manifest()
+        return partition
+    
+    def _load(self) -> None:
+        """Replay every partition listed in the manifest"""
+        with self._lock:
+            manifest = self._read_manifest()
+            self.granularity = manifest.get("granularity", self.granularity)
+            self._partitions = {}
+            self._index = {}
+            self._counters = dict.fromkeys(COUNTER_KEYS, 0)
+            self._unprocessed_ids = {}
+            for key, info in sorted((manifest.get("partitions") or {}).items()):
+                self._partitions[key] = _Partition(key, os.path.join(self.store_dir, info.get("file", f"{key}.jsonl")))
+            if not manifest:
+                self._write_manifest()
+            self._manifest_version = self._current_manifest_version()
+            for partition in self._partitions.values():
+                self._replay_tail(partition)
+    
+    def _sync(self) -> None:
+        """Pick up partitions and lines written by other processes"""
+        if self._current_manifest_version() != self._manifest_version:
+            version = self._current_manifest_version()
+            listed = self._read_manifest().get("partitions") or {}
+            if set(self._partitions) - set(listed):
+                # Partitions were dropped elsewhere: start over
+                self._load()
+                return
+            for key in sorted(set(listed) - set(self._partitions)):
+                self._partitions[key] = _Partition(key, os.path.join(self.store_dir, listed[key].get("file", f"{key}.jsonl")))
+            self._manifest_version = version
+        for partition in self._partitions.values():
+            self._replay_tail(partition)
+    
+    def _replay_tail(self, partition: _Partition) -> None:
+        """Apply lines appended to one partition since the last read"""
+        try:
+            stat = os.stat(partition.path)
+        except OSError:
+            return
+        
+        file_id = (stat.st_ino, stat.st_dev)
+        if partition.file_id is not None and (file_id != partition.file_id or stat.st_size < partition.read_offset):
+            # Compacted or replaced elsewhere: forget this partition and replay it
+            self._forget_partition(partition)
+            partition.read_offset = 0
+        partition.file_id = file_id
+        
+        if stat.st_size == partition.read_offset:
+            return
+        
+        with open(partition.path, "rb") as f:
+            f.seek(partition.read_offset)
+            offset = partition.read_offset
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    # Partially written line; pick it up on the next read
+                    break
+                self._apply_line(partition, raw_line, offset)
+                offset += len(raw_line)
+            partition.read_offset = offset
+    
+    def _forget_partition(self, partition: _Partition) -> None:
+        """Remove a partition's records from the index and totals without touching the file"""
+        for record_id in partition.ids:
+            self._index.pop(record_id, None)
+            self._unprocessed_ids.pop(record_id, None)
+        for key in COUNTER_KEYS:
+            self._counters[key] -= partition.counters[key]
+        partition.ids = {}
+        partition.counters = dict.fromkeys(COUNTER_KEYS, 0)
+        partition.dead_lines = 0
+    
+    def _count(self, partition: _Partition, record: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one record's contribution to the counters"""
+        record_id = str(record.get("id", ""))
+        changes = ["total"]
+        if record.get("processed", False):
+            changes.append("processed")
+        else:
+            changes.append("unprocessed")
+            if sign > 0:
+                self._unprocessed_ids[record_id] = True
+            else:
+                self._unprocessed_ids.pop(record_id, None)
+        if record.get("feedback_type") in ("positive", "negative"):
+            changes.append(record["feedback_type"])
+        for key in changes:
+            self._counters[key] += sign
+            partition.counters[key] += sign
+    
+    def _apply_line(self, partition: _Partition, raw_line: bytes, offset: int) -> None:
+        try:
+            operation = json.loads(raw_line.decode("utf-8"))
+        except (ValueError, UnicodeDecodeError):
+            logger.error(f"Skipping corrupt line at offset {offset} in {partition.path}")
+            partition.dead_lines += 1
+            return
+        self._apply_operation(partition, operation, offset)
+    
+    def _apply_operation(self, partition: _Partition, operation: Dict[str, Any], offset: int) -> None:
+        op = operation.get("op")
+        if op == "put":
+            record = operation.get("record") or {}
+            record_id = str(record.get("id", ""))
+            seq = operation.get("seq", 0)
+            existing = self._index.get(record_id)
+            owner = self._partitions.get(existing["partition"]) if existing else None
+            if owner is not None and record_id in owner.ids:
+                if owner is not partition and existing["seq"] > seq:
+                    # A newer copy filed under another period was replayed first
+                    partition.dead_lines += 1
+                    return
+                # Replaces the record, possibly one filed under another period
+                self._count(owner, existing["record"], -1)
+                owner.ids.pop(record_id)
+                owner.dead_lines += 1
+            partition.ids[record_id] = True
+            self._index[record_id] = {"partition": partition.key, "offset": offset, "seq": seq, "record": record}
+            self._count(partition, record, 1)
+        elif op == "patch":
+            record_id = str(operation.get("id", ""))
+            if record_id in partition.ids:
+                entry = self._index[record_id]
+                self._count(partition, entry["record"], -1)
+                entry["record"].update(operation.get("fields") or {})
+                self._count(partition, entry["record"], 1)
+            partition.dead_lines += 1
+        elif op == "delete":
+            record_id = str(operation.get("id", ""))
+            if record_id in partition.ids:
+                partition.ids.pop(record_id)
+                self._count(partition, self._index.pop(record_id)["record"], -1)
+                partition.dead_lines += 1
+            partition.dead_lines += 1
+        else:
+            partition.dead_lines += 1
+    
+    def _append_operations(self, operations_by_partition: Dict[str, List[Dict[str, Any]]]) -> bool:
+        """Write each partition's batch of operations with a single append and sync"""
+        with self._lock:
+            self._sync()
+            try:
+                for key, operations in operations_by_partition.items():
+                    if not operations:
+                        continue
+                    partition = self._get_partition(key)
+                    lines = [(json.dumps(operation, ensure_ascii=False) + "\n").encode("utf-8") for operation in operations]
+                    data = b"".join(lines)
+                    with open(partition.path, "ab") as f:
+                        start = f.tell()
+                        f.write(data)
+                        f.flush()
+                        end = f.tell()
+                        if Config.FEEDBACK_STORE_FSYNC:
+                            os.fsync(f.fileno())
+                    
+                    if start == partition.read_offset and end == start + len(data):
+                        # Nothing else was appended around our write: index the operations
+                        # directly instead of reading back and re-parsing our own lines
+                        offset = start
+                        for operation, line in zip(operations, lines):
+                            self._apply_operation(partition, operation, offset)
+                            offset += len(line)
+                        partition.read_offset = end
+            except Exception as e:
+                log_activity("Error", f"Failed to append to feedback store: {str(e)}")
+                self._sync()
+                return False
+            
+            # Picks up anything another process appended meanwhile (and our lines if interleaved with it)
+            self._sync()
+            self._save_counters()
+            return True
+    
+    def _write_atomic(self, path: str, operations: List[Dict[str, Any]]) -> None:
+        temp_fd, temp_path = tempfile.mkstemp(dir=self.store_dir, prefix=os.path.basename(path) + "_", suffix=".tmp")
+        try:
+            with os.fdopen(temp_fd, "w", encoding="utf-8") as f:
+                for operation in operations:
+                    f.write(json.dumps(operation, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except Exception:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+    
+    def _save_counters(self) -> None:
+        """Checkpoint the counters with the log offsets they were computed at"""
+        safe_save_json(self.counters_file, {
+            "counters": dict(self._counters),
+            "log_offsets": {key: partition.read_offset for key, partition in self._partitions.items()},
+            "updated_at": datetime.now().isoformat()
+        })
+    
+    def _check_counters_sidecar(self) -> None:
+        """Rewrite the sidecar if it is missing or was left behind by an interrupted write"""
+        sidecar = safe_load_json(self.counters_file, {})
+        offsets = {key: partition.read_offset for key, partition in self._partitions.items()}
+        if not isinstance(sidecar, dict) or sidecar.get("log_offsets") != offsets \
+                or sidecar.get("counters") != self._counters:
+            if sidecar:
+                log_activity("System", f"Feedback counters sidecar out of date, rebuilding {self.counters_file}")
+            with self._lock:
+                self._save_counters()
+    
+    def _migrate_legacy(self) -> None:
+        """One-time import of the old feedback_data.json list or single feedback_data.jsonl log"""
+        for legacy_file in self.legacy_files:
+            if not legacy_file or not os.path.exists(legacy_file):
+                continue
+            
+            try:
+                if legacy_file.endswith(".jsonl"):
+                    records = {}
+                    with open(legacy_file, "r", encoding="utf-8") as f:
+                        for line in f:
+                            try:
+                                operation = json.loads(line)
+                            except ValueError:
+                                continue
+                            if operation.get("op") == "put":
+                                records[str(operation["record"].get("id", ""))] = operation["record"]
+                            elif operation.get("op") == "patch" and str(operation.get("id")) in records:
+                                records[str(operation["id"])].update(operation.get("fields") or {})
+                            elif operation.get("op") == "delete":
+                                records.pop(str(operation.get("id")), None)
+                    records = list(records.values())
+                else:
+                    legacy_data = safe_load_json(legacy_file, [])
+                    records = [record for record in legacy_data if isinstance(record, dict) and record.get("id")] \
+                        if isinstance(legacy_data, list) else []
+                
+                if not self.append_many(records):
+                    continue
+                os.replace(legacy_file, legacy_file + ".migrated")
+                log_activity("System", f"Migrated {len(records)} feedback records from {legacy_file} to {self.store_dir}")
+            
+            except Exception as e:
+                log_activity("Error", f"Failed to migrate legacy feedback data from {legacy_file}: {str(e)}")
+    
+    def rebuild_counters(self) -> Dict[str, int]:
+        """Recount every record from the logs and rewrite the sidecar (recovery)"""
+        with self._lock:
+            self._load()
+            self._save_counters()
+            log_activity("System", f"Rebuilt feedback counters: {self._counters}")
+            return dict(self._counters)
+    
+    def append(self, record: Dict[str, Any]) -> bool:
+        """Add one record"""
+        return self.append_many([record])
+    
+    def append_many(self, records: Iterable[Dict[str, Any]]) -> bool:
+        """Add records in one write per partition; a record with an existing id replaces it"""
+        with self._lock:
+            self._sync()
+            # Within one batch the last record for an id wins
+            latest = {}
+            for record in records:
+                latest[str(record.get("id", ""))] = dict(record)
+            
+            operations = {}
+            seq = time.time_ns()
+            for record_id, record in latest.items():
+                key = self._partition_key(record)
+                existing = self._index.get(record_id)
+                if existing is not None and existing["partition"] != key:
+                    # Timestamp moved to another period: remove it from the old partition
+                    operations.setdefault(existing["partition"], []).append({"op": "delete", "id": record_id})
+                operations.setdefault(key, []).append({"op": "put", "seq": seq, "record": record})
+            return self._append_operations(operations)
+    
+    def update_many(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """Apply field updates to existing records in one batched write per partition; returns records updated"""
+        with self._lock:
+            self._sync()
+            operations = {}
+            for record_id, fields in updates.items():
+                entry = self._index.get(str(record_id))
+                if entry is not None and fields:
+                    operations.setdefault(entry["partition"], []).append({"op": "patch", "id": str(record_id), "fields": fields})
+            if not self._append_operations(operations):
+                return 0
+            self._maybe_compact(operations)
+            return sum(len(ops) for ops in operations.values())
+    
+    def delete_many(self, record_ids: Iterable[str]) -> int:
+        """Remove records by id; returns records removed"""
+        with self._lock:
+            self._sync()
+            operations = {}
+            for record_id in set(map(str, record_ids)):
+                entry = self._index.get(record_id)
+                if entry is not None:
+                    operations.setdefault(entry["partition"], []).append({"op": "delete", "id": record_id})
+            if not self._append_operations(operations):
+                return 0
+            self._maybe_compact(operations)
+            return sum(len(ops) for ops in operations.values())
+    
+    def drop_before(self, cutoff: datetime) -> int:
+        """Retention: unlink partitions that end before the cutoff, trim the one it falls in; returns records removed"""
+        with self._lock:
+            self._sync()
+            removed = 0
+            dropped = []
+            boundary_ids = []
+            cutoff_iso = cutoff.isoformat()
+            for key, partition in list(self._partitions.items()):
+                if key == UNDATED_PARTITION:
+                    continue
+                start, end = self._partition_bounds(key)
+                if end <= cutoff:
+                    removed += len(partition.ids)
+                    self._forget_partition(partition)
+                    del self._partitions[key]
+                    dropped.append(partition)
+                elif start < cutoff:
+                    boundary_ids.extend(
+                        record_id for record_id in partition.ids
+                        if str(self._index[record_id]["record"].get("timestamp", "")) < cutoff_iso
+                    )
+            
+            if dropped:
+                self._write_manifest(removed=[partition.key for partition in dropped])
+                for partition in dropped:
+                    try:
+                        os.remove(partition.path)
+                    except OSError:
+                        pass
+                self._save_counters()
+                log_activity("Cleanup", f"Dropped {len(dropped)} feedback partition(s): {', '.join(p.key for p in dropped)}")
+            
+            if boundary_ids:
+                removed += self.delete_many(boundary_ids)
+            return removed
+    
+    def records_between(self, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Copies of records with start <= timestamp < end, reading only overlapping partitions"""
+        with self._lock:
+            self._sync()
+            start_iso, end_iso = start.isoformat(), end.isoformat()
+            records = []
+            for key, partition in sorted(self._partitions.items()):
+                if key == UNDATED_PARTITION:
+                    continue
+                partition_start, partition_end = self._partition_bounds(key)
+                if partition_end <= start or partition_start >= end:
+                    continue
+                for record_id in partition.ids:
+                    record = self._index[record_id]["record"]
+                    if start_iso <= str(record.get("timestamp", "")) < end_iso:
+                        records.append(dict(record))
+            return sorted(records, key=lambda record: str(record.get("timestamp", "")))
+    
+    def partitions(self) -> List[Dict[str, Any]]:
+        """Per-partition record counts and log sizes, oldest first"""
+        with self._lock:
+            self._sync()
+            return [
+                {
+                    "partition": key,
+                    "records": len(partition.ids),
+                    "bytes": os.path.getsize(partition.path) if os.path.exists(partition.path) else 0,
+                    **partition.counters
+                }
+                for key, partition in sorted(self._partitions.items())
+            ]
+    
+    def clear(self) -> None:
+        """Remove every record"""
+        with self._lock:
+            self._sync()
+            removed = list(self._partitions)
+            for partition in self._partitions.values():
+                try:
+                    os.remove(partition.path)
+                except OSError:
+                    pass
+            self._partitions = {}
+            self._write_manifest(removed=removed)
+            self._load()
+            self._save_counters()
+    
+    def compact(self, keys: Iterable[str] = None) -> None:
+        """Rewrite partition logs with one line per live record"""
+        with self._lock:
+            self._sync()
+            for key in list(keys if keys is not None else self._partitions.keys()):
+                partition = self._partitions.get(key)
+                if partition is None:
+                    continue
+                live = [self._index[record_id] for record_id in partition.ids]
+                self._write_atomic(partition.path, [{"op": "put", "seq": entry["seq"], "record": entry["record"]} for entry in live])
+                # Re-index just this partition from the rewritten file
+                self._forget_partition(partition)
+                partition.read_offset = 0
+                partition.file_id = None
+                self._replay_tail(partition)
+                log_activity("System", f"Compacted feedback partition {key} to {len(live)} records")
+            self._save_counters()
+    
+    def _maybe_compact(self, operations: Dict[str, List[Dict[str, Any]]]) -> None:
+        keys = [
+            key for key in operations
+            if key in self._partitions
+            and self._partitions[key].dead_lines >= Config.FEEDBACK_STORE_COMPACT_MIN_DEAD
+            and self._partitions[key].dead_lines > len(self._partitions[key].ids)
+        ]
+        if keys:
+            self.compact(keys)
+    
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._sync()
+            entry = self._index.get(str(record_id))
+            return dict(entry["record"]) if entry else None
+    
+    def all(self) -> List[Dict[str, Any]]:
+        """Copies of all live records, partitions oldest first"""
+        with self._lock:
+            self._sync()
+            return [
+                dict(self._index[record_id]["record"])
+                for _, partition in sorted(self._partitions.items())
+                for record_id in partition.ids
+            ]
+    
+    def iter_records(self, start: datetime = None, end: datetime = None) -> Iterator[Dict[str, Any]]:
+        """Copies of live records, partitions oldest first, holding one partition in memory at a time"""
+        with self._lock:
+            self._sync()
+            keys = sorted(self._partitions)
+        
+        start_iso = start.isoformat() if start else ""
+        end_iso = end.isoformat() if end else None
+        for key in keys:
+            if key == UNDATED_PARTITION:
+                if start or end:
+                    continue
+            elif start or end:
+                partition_start, partition_end = self._partition_bounds(key)
+                if (start and partition_end <= start) or (end and partition_start >= end):
+                    continue
+            
+            with self._lock:
+                partition = self._partitions.get(key)
+                if partition is None:
+                    continue
+                records = [dict(self._index[record_id]["record"]) for record_id in partition.ids]
+            
+            for record in records:
+                timestamp = str(record.get("timestamp", ""))
+                if timestamp >= start_iso and (end_iso is None or timestamp < end_iso):
+                    yield record
+    
+    def unprocessed(self) -> List[Dict[str, Any]]:
+        """Copies of records not yet processed, without scanning the rest"""
+        with self._lock:
+            self._sync()
+            return [dict(self._index[record_id]["record"]) for record_id in self._unprocessed_ids]
+    
+    def stats(self) -> Dict[str, int]:
+        """Current counters (O(1) apart from replaying lines other processes appended)"""
+        with self._lock:
+            self._sync()
+            return dict(self._counters)
+    
+    def existing_ids(self, record_ids: Iterable[str]) -> set:
+        """The given ids that are already in the store, checked with one sync"""
+        with self._lock:
+            self._sync()
+            return {str(record_id) for record_id in record_ids if str(record_id) in self._index}
+    
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return len(self._index)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_feedback_store(store_dir: str = None) -> FeedbackStore:
+    """Shared store per directory, so every component sees the same index"""
+    store_dir = store_dir or Config.FEEDBACK_STORE_DIR
+    with _stores_lock:
+        if store_dir not in _stores:
+            _stores[store_dir] = FeedbackStore(store_dir)
+        return _stores[store_dir]
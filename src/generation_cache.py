@@ -0,0 +1,160 @@
+# Persistent cache of validated Gemini generations, addressed by a hash of the request
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from config.config import Config
+from src.utils import log_activity
+
+class GenerationCache:
+    """One file per request hash; least recently used entries are evicted past the entry and byte limits"""
+    
+    def __init__(self, cache_dir: str = None, max_entries: int = None, max_bytes: int = None, ttl: float = None):
+        self.cache_dir = cache_dir or Config.GENERATION_CACHE_DIR
+        self.max_entries = max_entries or Config.GENERATION_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or Config.GENERATION_CACHE_MAX_BYTES
+        self.ttl = Config.GENERATION_CACHE_TTL_SECONDS if ttl is None else ttl
+        # key -> file size, least recently used first
+        self._index = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+    
+    @staticmethod
+    def key(prompt: str, model: str, generation_config: Dict[str, Any]) -> str:
+        """Content address of one generation request"""
+        payload = json.dumps({"prompt": prompt, "model": model, "config": generation_config}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def _load_index(self) -> None:
+        """Rebuild the LRU order from file modification times, which record the last hit"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-len(".json")], stat.st_size))
+        
+        with self._lock:
+            for _, key, size in sorted(entries):
+                self._index[key] = size
+                self._bytes += size
+            self._evict()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached entry for a request, or None; a hit becomes the most recently used"""
+        if not key:
+            return None
+        
+        with self._lock:
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except FileNotFoundError:
+                self._forget(key)
+                return None
+            except (OSError, ValueError) as e:
+                log_activity("Error", f"Discarding unreadable generation cache entry {key[:12]}: {str(e)}")
+                self._remove(key)
+                return None
+            
+            if self.ttl and time.time() - entry.get("created_at", 0) > self.ttl:
+                self._remove(key)
+                return None
+            
+            # Entries written by another process join the index on their first hit here
+            if key not in self._index:
+                self._index[key] = os.path.getsize(path)
+                self._bytes += self._index[key]
+            self._index.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return entry
+    
+    def put(self, key: str, text: str, parsed_data: Dict[str, Any]) -> None:
+        """Store a generation that passed validation, evicting the least recently used past the limits"""
+        if not key:
+            return
+        
+        entry = {"key": key, "text": text, "parsed_data": parsed_data, "created_at": time.time()}
+        try:
+            data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+            with self._lock:
+                temp_fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{key}_", suffix=".tmp")
+                try:
+                    with os.fdopen(temp_fd, "wb") as f:
+                        f.write(data)
+                    os.replace(temp_path, self._path(key))
+                except BaseException:
+                    if os.path.exists(temp_path):
+                        os.unlink(temp_path)
+                    raise
+                
+                self._forget(key)
+                self._index[key] = len(data)
+                self._bytes += len(data)
+                self._evict()
+        
+        except (OSError, TypeError, ValueError) as e:
+            log_activity("Error", f"Failed to cache generation {key[:12]}: {str(e)}")
+    
+    def discard(self, key: str) -> None:
+        """Drop an entry whose output turned out to be unusable"""
+        if not key:
+            return
+        with self._lock:
+            self._remove(key)
+    
+    def _forget(self, key: str) -> None:
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._bytes -= size
+    
+    def _remove(self, key: str) -> None:
+        self._forget(key)
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log_activity("Error", f"Failed to remove generation cache entry {key[:12]}: {str(e)}")
+    
+    def _evict(self) -> None:
+        """Caller holds the lock"""
+        while self._index and (len(self._index) > self.max_entries or self._bytes > self.max_bytes):
+            key = next(iter(self._index))
+            self._remove(key)
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+    
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_generation_cache(cache_dir: str = None) -> GenerationCache:
+    """Shared cache per directory"""
+    cache_dir = cache_dir or Config.GENERATION_CACHE_DIR
+    with _caches_lock:
+        if cache_dir not in _caches:
+            _caches[cache_dir] = GenerationCache(cache_dir)
+        return _caches[cache_dir]
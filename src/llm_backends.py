@@ -0,0 +1,206 @@
+# OpenAI-compatible LLM backends with hedged requests
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, List, Optional, Tuple
+import requests
+from config.config import Config
+from src.metrics import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class LLMBackendError(Exception):
+    """Raised when a backend (or every backend) fails to answer"""
+
+class LLMRateLimited(LLMBackendError):
+    """Raised when the local rate limiter rejects a request"""
+
+class OpenAICompatibleBackend:
+    """A /chat/completions endpoint such as Groq or a local server"""
+    
+    def __init__(self, name: str, base_url: str, api_key: str, model: str, timeout: float = 30,
+                 models: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.models = models or {}
+        self.timeout = timeout
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+    
+    def model_for(self, tier: Optional[str]) -> str:
+        """Model to use for a tier: backend override, then the tier default, then the backend model"""
+        if not tier:
+            return self.model
+        if tier in self.models:
+            return self.models[tier]
+        return Config.LLM_MODEL_TIERS.get(tier, {}).get("model", self.model)
+    
+    def complete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                 timeout: Optional[float] = None, model: Optional[str] = None) -> str:
+        """Send one chat completion request"""
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+        
+        start_time = time.time()
+        try:
+            response = requests.post(
+                f"{self.base_url}/chat/completions",
+                headers=self.headers,
+                json=payload,
+                timeout=min(timeout, self.timeout) if timeout else self.timeout
+            )
+        except requests.exceptions.RequestException as e:
+            metrics.increment(f"llm.backend.{self.name}.errors")
+            raise LLMBackendError(f"{self.name} request failed: {str(e)}")
+        
+        if response.status_code != 200:
+            metrics.increment(f"llm.backend.{self.name}.errors")
+            raise LLMBackendError(f"{self.name} API error: {response.status_code} - {response.text}")
+        
+        metrics.observe(f"llm.backend.{self.name}.latency", time.time() - start_time)
+        data = response.json()
+        return data["choices"][0]["message"]["content"].strip()
+    
+    def p95_latency(self) -> Optional[float]:
+        """Observed p95 latency of successful calls"""
+        return metrics.percentile(f"llm.backend.{self.name}.latency", 95)
+    
+    def sample_count(self) -> int:
+        return len(metrics.get_samples(f"llm.backend.{self.name}.latency"))
+
+class HedgedBackendPool:
+    """Ordered backend list; hedges to the next backend when the current one runs past its p95"""
+    
+    def __init__(self, backends: List[OpenAICompatibleBackend], hedging_enabled: bool = True,
+                 min_samples: int = 20, default_hedge_delay: float = 3.0, max_workers: int = 16):
+        self.backends = backends
+        self.hedging_enabled = hedging_enabled
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-backend")
+    
+    @classmethod
+    def from_config(cls) -> "HedgedBackendPool":
+        backends = [
+            OpenAICompatibleBackend(
+                name=backend["name"],
+                base_url=backend["base_url"],
+                api_key=backend.get("api_key", ""),
+                model=backend["model"],
+                timeout=backend.get("timeout", 30),
+                models=backend.get("models")
+            )
+            for backend in Config.LLM_BACKENDS
+        ]
+        return cls(
+            backends,
+            hedging_enabled=Config.LLM_HEDGING_ENABLED,
+            min_samples=Config.LLM_HEDGE_MIN_SAMPLES,
+            default_hedge_delay=Config.LLM_HEDGE_DEFAULT_DELAY
+        )
+    
+    def _hedge_delay(self, backend: OpenAICompatibleBackend) -> float:
+        """Wait this long for a backend before firing the next one"""
+        if backend.sample_count() >= self.min_samples:
+            return backend.p95_latency()
+        return self.default_hedge_delay
+    
+    def complete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float,
+                 timeout: float = 30, tier: Optional[str] = None) -> Tuple[str, str]:
+        """Get the first successful answer on a model tier; returns (text, backend name)"""
+        if not self.backends:
+            raise LLMBackendError("No LLM backends configured")
+        
+        start_time = time.time()
+        deadline = start_time + timeout
+        remaining_backends = list(self.backends)
+        pending = {}
+        launched = []
+        errors = []
+        
+        def launch() -> Optional[OpenAICompatibleBackend]:
+            if not remaining_backends:
+                return None
+            backend = remaining_backends.pop(0)
+            future = self._executor.submit(
+                backend.complete, messages, max_tokens, temperature,
+                max(0.1, deadline - time.time()), backend.model_for(tier)
+            )
+            pending[future] = (backend, time.time())
+            launched.append(backend.name)
+            return backend
+        
+        primary = launch()
+        metrics.increment("llm.requests")
+        
+        while pending and time.time() < deadline:
+            # The newest in-flight backend decides when to hedge
+            newest_backend = list(pending.values())[-1][0]
+            wait_time = deadline - time.time()
+            if self.hedging_enabled and remaining_backends:
+                wait_time = min(wait_time, self._hedge_delay(newest_backend))
+            
+            done, _ = wait(list(pending.keys()), timeout=max(0.0, wait_time), return_when=FIRST_COMPLETED)
+            
+            if not done:
+                # Slower than its p95: fire a hedge on the next backend
+                if self.hedging_enabled and launch() is not None:
+                    metrics.increment("llm.hedge.fired")
+                    logger.info(f"Hedging LLM request to {launched[-1]} after {time.time() - start_time:.2f}s")
+                continue
+            
+            for future in done:
+                backend, _ = pending.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    errors.append(str(e))
+                    logger.error(f"LLM backend {backend.name} failed: {str(e)}")
+                    continue
+                
+                elapsed = time.time() - start_time
+                metrics.observe("llm.latency", elapsed)
+                if backend is not primary:
+                    self._record_hedge_win(backend, primary, pending, start_time, elapsed)
+                return text, backend.name
+            
+            # Everything in flight failed: fail over to the next backend
+            if not pending:
+                launch()
+        
+        metrics.increment("llm.failures")
+        if not errors:
+            errors.append(f"timed out after {timeout:.1f}s (tried {', '.join(launched)})")
+        raise LLMBackendError("; ".join(errors))
+    
+    def _record_hedge_win(self, winner: OpenAICompatibleBackend, primary: OpenAICompatibleBackend,
+                          pending: Dict[Any, Tuple[OpenAICompatibleBackend, float]],
+                          start_time: float, elapsed: float) -> None:
+        """Count a non-primary win and measure the saving once the primary finishes"""
+        metrics.increment(f"llm.backend.{winner.name}.wins")
+        primary_futures = [future for future, (backend, _) in pending.items() if backend is primary]
+        
+        if not primary_futures:
+            # Primary already failed, so this was a failover rather than a hedge
+            metrics.increment("llm.failovers")
+            return
+        
+        metrics.increment("llm.hedge.wins")
+        
+        def on_primary_done(future):
+            # A primary that failed or was cancelled would never have answered, so nothing was saved
+            if future.cancelled() or future.exception() is not None:
+                return
+            saved = (time.time() - start_time) - elapsed
+            if saved > 0:
+                metrics.observe("llm.hedge.latency_saved", saved)
+        
+        primary_futures[0].add_done_callback(on_primary_done)
@@ -0,0 +1,87 @@
+# Runtime performance metrics
+import threading
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional
+
+class MetricsRegistry:
+    """Process-wide counters, gauges and latency samples"""
+    
+    def __init__(self, max_samples: int = 1000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._gauges = {}
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+    
+    def increment(self, name: str, value: float = 1) -> None:
+        """Increase a counter"""
+        with self._lock:
+            self._counters[name] += value
+    
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to its current value"""
+        with self._lock:
+            self._gauges[name] = value
+    
+    def observe(self, name: str, value: float) -> None:
+        """Record a sample (latencies are recorded in seconds)"""
+        with self._lock:
+            self._samples[name].append(value)
+    
+    def get_counter(self, name: str) -> float:
+        """Get current counter value"""
+        with self._lock:
+            return self._counters.get(name, 0)
+    
+    def get_gauge(self, name: str, default: float = 0) -> float:
+        """Get current gauge value"""
+        with self._lock:
+            return self._gauges.get(name, default)
+    
+    def get_samples(self, name: str) -> List[float]:
+        """Get a copy of the recorded samples"""
+        with self._lock:
+            return list(self._samples.get(name, []))
+    
+    def percentile(self, name: str, pct: float) -> Optional[float]:
+        """Get a percentile (0-100) of the recorded samples"""
+        samples = sorted(self.get_samples(name))
+        if not samples:
+            return None
+        
+        index = min(len(samples) - 1, max(0, int(round(pct / 100.0 * (len(samples) - 1)))))
+        return samples[index]
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get all metrics as plain data"""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+            snapshot = {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "latencies": {}
+            }
+        
+        for name, values in samples.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            snapshot["latencies"][name] = {
+                "count": len(ordered),
+                "avg": sum(ordered) / len(ordered),
+                "p50": ordered[int(0.50 * (len(ordered) - 1))],
+                "p95": ordered[int(0.95 * (len(ordered) - 1))],
+                "max": ordered[-1]
+            }
+        
+        return snapshot
+    
+    def reset(self) -> None:
+        """Clear all metrics"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._samples.clear()
+
+# Shared registry for the whole process
+metrics = MetricsRegistry()
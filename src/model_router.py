@@ -0,0 +1,59 @@
+# Query complexity routing between LLM model tiers
+import re
+from typing import Any, Dict
+from config.config import Config
+from src.utils import normalize_query
+
+TROUBLESHOOTING_TERMS = {
+    'error', 'errors', 'crash', 'crashes', 'crashing', 'fails', 'failed', 'failing', 'freeze', 'freezes',
+    'stuck', 'tried', 'already', 'still', 'after', 'since', 'reinstalled', 'restarted', 'rebooted',
+    'update', 'updated', 'intermittent', 'sometimes', 'randomly', 'why', 'configure', 'troubleshoot'
+}
+CONJUNCTIONS = {'and', 'also', 'then', 'but', 'plus', 'however', 'otherwise'}
+ERROR_CODE_PATTERN = re.compile(r'(0x[0-9a-f]+|\b[a-z]*\d{3,}\b|exception|traceback|stack trace)', re.IGNORECASE)
+
+class ModelRouter:
+    """Scores fallback queries with cheap local features and picks a model tier"""
+    
+    def __init__(self, tiers: Dict[str, Dict[str, Any]] = None, large_threshold: int = None):
+        self.tiers = tiers or Config.LLM_MODEL_TIERS
+        self.large_threshold = large_threshold if large_threshold is not None else Config.LLM_ROUTER_LARGE_THRESHOLD
+    
+    def features(self, message: str) -> Dict[str, int]:
+        """Local complexity signals of a query"""
+        words = normalize_query(message).split()
+        return {
+            "words": len(words),
+            "questions": message.count("?"),
+            "sentences": len([part for part in re.split(r'[.!?\n]+', message) if part.strip()]),
+            "conjunctions": sum(1 for word in words if word in CONJUNCTIONS),
+            "troubleshooting_terms": sum(1 for word in words if word in TROUBLESHOOTING_TERMS),
+            "list_items": len(re.findall(r'(^|\n)\s*(\d+[.)]|[-*•])\s+', message)),
+            "error_codes": len(ERROR_CODE_PATTERN.findall(message))
+        }
+    
+    def score(self, message: str) -> int:
+        """Higher means a multi-part or troubleshooting question"""
+        features = self.features(message)
+        score = 0
+        score += 2 if features["words"] > 40 else 1 if features["words"] > 15 else 0
+        score += min(features["questions"], 3) - 1 if features["questions"] > 1 else 0
+        score += 1 if features["sentences"] > 2 else 0
+        score += min(features["conjunctions"], 2)
+        score += min(features["troubleshooting_terms"], 2)
+        score += 1 if features["list_items"] else 0
+        score += 1 if features["error_codes"] else 0
+        return score
+    
+    def route(self, message: str) -> str:
+        """Pick the tier name for a query"""
+        if not Config.LLM_ROUTING_ENABLED or "large" not in self.tiers:
+            return "small"
+        return "large" if self.score(message) >= self.large_threshold else "small"
+    
+    def tier_config(self, tier: str) -> Dict[str, Any]:
+        return self.tiers.get(tier) or self.tiers["small"]
+    
+    def estimate_cost(self, tier: str, tokens: int) -> float:
+        """Estimated USD cost of a call on a tier"""
+        return tokens / 1000.0 * self.tier_config(tier).get("cost_per_1k_tokens", 0.0)
@@ -0,0 +1,162 @@
+# Predictive prefetch of likely follow-up answers
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from config.config import Config
+from src.metrics import metrics
+from src.utils import log_activity, normalize_query, safe_load_json
+
+class FollowUpModel:
+    """Question -> next question counts mined from chat history"""
+    
+    def __init__(self):
+        self.transitions = defaultdict(Counter)
+        self.examples = {}
+        self.loaded_at = 0.0
+    
+    def mine(self, chat_history: List[Dict[str, Any]], max_gap_seconds: float) -> None:
+        """Count consecutive questions of the same conversation"""
+        transitions = defaultdict(Counter)
+        examples = {}
+        previous = {}
+        
+        for chat in chat_history:
+            query = (chat.get("user_query") or "").strip()
+            key = normalize_query(query)
+            if not key:
+                continue
+            
+            try:
+                timestamp = datetime.fromisoformat(chat.get("timestamp", "")).timestamp()
+            except (TypeError, ValueError):
+                continue
+            
+            # Older entries have no session id; a short gap means the same conversation
+            conversation = chat.get("session_id") or "_"
+            last = previous.get(conversation)
+            if last and last[0] != key and timestamp - last[1] <= max_gap_seconds:
+                transitions[last[0]][key] += 1
+            
+            previous[conversation] = (key, timestamp)
+            examples.setdefault(key, query)
+        
+        self.transitions = transitions
+        self.examples = examples
+        self.loaded_at = time.time()
+    
+    def _similar_key(self, key: str) -> Optional[str]:
+        """Closest known question by word overlap, for paraphrases"""
+        words = set(key.split())
+        best, best_score = None, 0.0
+        for known in self.transitions:
+            known_words = set(known.split())
+            score = len(words & known_words) / len(words | known_words) if words | known_words else 0.0
+            if score > best_score:
+                best, best_score = known, score
+        return best if best_score >= Config.PREFETCH_SIMILARITY_THRESHOLD else None
+    
+    def predict(self, question: str, top_k: int, min_count: int) -> List[str]:
+        """Most frequent follow-up questions (original wording)"""
+        key = normalize_query(question)
+        if key not in self.transitions:
+            key = self._similar_key(key)
+        if not key:
+            return []
+        
+        return [
+            self.examples.get(next_key, next_key)
+            for next_key, count in self.transitions[key].most_common(top_k)
+            if count >= min_count
+        ]
+
+class FollowUpPrefetcher:
+    """Precomputes answers to predicted next questions while a session is idle"""
+    
+    def __init__(self, answer_fn: Callable[[str], Optional[float]], is_cached: Callable[[str], bool],
+                 can_spend: Callable[[], bool]):
+        self.answer_fn = answer_fn
+        self.is_cached = is_cached
+        self.can_spend = can_spend
+        self.model = FollowUpModel()
+        self.prefetched = {}
+        self.timers = {}
+        self._lock = threading.Lock()
+    
+    def refresh_model(self) -> None:
+        """Re-mine follow-up pairs when the model is older than the refresh interval"""
+        if time.time() - self.model.loaded_at < Config.PREFETCH_MODEL_REFRESH_SECONDS:
+            return
+        try:
+            from src.chat_ring_buffer import get_chat_history
+            self.model.mine(get_chat_history(), Config.PREFETCH_MAX_GAP_SECONDS)
+        except Exception as e:
+            log_activity("Error", f"Failed to mine follow-up pairs: {str(e)}")
+    
+    def take(self, session_id: str, question: str) -> Optional[Dict[str, Any]]:
+        """Called on each new turn: cancel idle work and report whether this question was prefetched"""
+        with self._lock:
+            timer = self.timers.pop(session_id, None)
+            if timer:
+                timer.cancel()
+            prefetched = self.prefetched.pop(session_id, {})
+        
+        if not prefetched:
+            return None
+        
+        entry = prefetched.get(normalize_query(question))
+        if entry is None:
+            metrics.increment("prefetch.misses")
+            return None
+        
+        metrics.increment("prefetch.hits")
+        return entry
+    
+    def schedule(self, session_id: str, question: str) -> None:
+        """Prefetch follow-ups once the session has been idle for a moment"""
+        timer = threading.Timer(Config.PREFETCH_IDLE_DELAY, self._prefetch, args=(session_id, question))
+        timer.daemon = True
+        with self._lock:
+            previous = self.timers.pop(session_id, None)
+            if previous:
+                previous.cancel()
+            self.timers[session_id] = timer
+        timer.start()
+    
+    def _prefetch(self, session_id: str, question: str) -> None:
+        self.refresh_model()
+        predictions = self.model.predict(question, Config.PREFETCH_TOP_K, Config.PREFETCH_MIN_PAIR_COUNT)
+        if not predictions:
+            with self._lock:
+                if self.timers.get(session_id) is threading.current_thread():
+                    self.timers.pop(session_id, None)
+            return
+        
+        metrics.increment("prefetch.predictions", len(predictions))
+        prefetched = {}
+        
+        current = threading.current_thread()
+        for predicted in predictions:
+            with self._lock:
+                # The user already sent the next message
+                if self.timers.get(session_id) is not current:
+                    return
+            
+            key = normalize_query(predicted)
+            if self.is_cached(key):
+                prefetched[key] = {"question": predicted, "compute_latency": None}
+                continue
+            if not self.can_spend():
+                metrics.increment("prefetch.skipped_quota")
+                break
+            
+            latency = self.answer_fn(predicted)
+            if latency is not None:
+                metrics.increment("prefetch.computed")
+                prefetched[key] = {"question": predicted, "compute_latency": latency}
+        
+        with self._lock:
+            if self.timers.get(session_id) is current:
+                self.prefetched[session_id] = prefetched
+                self.timers.pop(session_id, None)
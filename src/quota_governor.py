@@ -0,0 +1,224 @@
+# Per-session and global LLM quota governor
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+from config.config import Config
+from src.metrics import metrics
+from src.utils import log_activity
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return max(1, len(text or "") // 4)
+
+class QuotaWindow:
+    """Requests and tokens spent within a sliding time window"""
+    
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self.entries = deque()
+        self.tokens = 0
+    
+    def prune(self, now: float) -> None:
+        while self.entries and self.entries[0][0] <= now - self.window_seconds:
+            _, ticket = self.entries.popleft()
+            self.tokens -= ticket[0]
+            ticket[0] = None
+    
+    def add(self, now: float, tokens: int) -> list:
+        ticket = [tokens]
+        self.entries.append((now, ticket))
+        self.tokens += tokens
+        return ticket
+    
+    def requests(self) -> int:
+        return len(self.entries)
+    
+    def next_expiry(self, now: float) -> float:
+        """Seconds until the oldest entry leaves the window"""
+        if not self.entries:
+            return 0.0
+        return max(0.0, self.entries[0][0] + self.window_seconds - now)
+
+class QuotaGovernor:
+    """Admits LLM calls only while both the session and the global budgets have room"""
+    
+    def __init__(self, window_seconds: float = None, session_requests: int = None, session_tokens: int = None,
+                 global_requests: int = None, global_tokens: int = None):
+        self.window_seconds = window_seconds or Config.QUOTA_WINDOW_SECONDS
+        self.session_requests = session_requests or Config.QUOTA_SESSION_REQUESTS
+        self.session_tokens = session_tokens or Config.QUOTA_SESSION_TOKENS
+        self.global_requests = global_requests or Config.QUOTA_GLOBAL_REQUESTS
+        self.global_tokens = global_tokens or Config.QUOTA_GLOBAL_TOKENS
+        self.global_window = QuotaWindow(self.window_seconds)
+        self.sessions = {}
+        self._lock = threading.Lock()
+    
+    def _session_window(self, session_id: str) -> QuotaWindow:
+        window = self.sessions.get(session_id)
+        if window is None:
+            window = self.sessions[session_id] = QuotaWindow(self.window_seconds)
+        return window
+    
+    def _prune(self, now: float) -> None:
+        self.global_window.prune(now)
+        for session_id in list(self.sessions.keys()):
+            window = self.sessions[session_id]
+            window.prune(now)
+            if not window.entries:
+                del self.sessions[session_id]
+    
+    def admit(self, session_id: Optional[str], estimated_tokens: int) -> Dict[str, Any]:
+        """Reserve budget for one call; returns {"admitted", "reason", "ticket"}"""
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            
+            reason = None
+            if self.global_window.requests() >= self.global_requests:
+                reason = "global_requests"
+            elif self.global_window.tokens + estimated_tokens > self.global_tokens:
+                reason = "global_tokens"
+            elif session_id is not None:
+                window = self.sessions.get(session_id)
+                if window and window.requests() >= self.session_requests:
+                    reason = "session_requests"
+                elif window and window.tokens + estimated_tokens > self.session_tokens:
+                    reason = "session_tokens"
+            
+            if reason:
+                metrics.increment("quota.rejected")
+                metrics.increment(f"quota.rejected.{reason}")
+                self._publish()
+                return {"admitted": False, "reason": reason, "ticket": None}
+            
+            tickets = [self.global_window.add(now, estimated_tokens)]
+            if session_id is not None:
+                tickets.append(self._session_window(session_id).add(now, estimated_tokens))
+            
+            metrics.increment("quota.admitted")
+            self._publish()
+            return {"admitted": True, "reason": None, "ticket": (session_id, tickets)}
+    
+    def settle(self, ticket, actual_tokens: int) -> None:
+        """Replace the reserved token estimate with what the call actually used"""
+        if not ticket:
+            return
+        
+        session_id, tickets = ticket
+        with self._lock:
+            windows = [self.global_window]
+            if session_id is not None and session_id in self.sessions:
+                windows.append(self.sessions[session_id])
+            
+            for window, entry in zip(windows, tickets):
+                if entry[0] is None:
+                    # Already left the window
+                    continue
+                window.tokens += actual_tokens - entry[0]
+                entry[0] = actual_tokens
+            self._publish()
+    
+    def global_wait_time(self, estimated_tokens: int = 0) -> float:
+        """Seconds until the global budget could admit another call"""
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            if (self.global_window.requests() < self.global_requests
+                    and self.global_window.tokens + estimated_tokens <= self.global_tokens):
+                return 0.0
+            return max(self.global_window.next_expiry(now), 0.1)
+    
+    def _publish(self) -> None:
+        """Live gauges (called with the lock held)"""
+        metrics.set_gauge("quota.global.requests", self.global_window.requests())
+        metrics.set_gauge("quota.global.tokens", self.global_window.tokens)
+        metrics.set_gauge("quota.global.request_utilization", self.global_window.requests() / self.global_requests * 100)
+        metrics.set_gauge("quota.global.token_utilization", self.global_window.tokens / self.global_tokens * 100)
+        metrics.set_gauge("quota.active_sessions", len(self.sessions))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Current usage against the configured policy"""
+        with self._lock:
+            self._prune(time.time())
+            return {
+                "window_seconds": self.window_seconds,
+                "global_requests": self.global_window.requests(),
+                "global_requests_limit": self.global_requests,
+                "global_tokens": self.global_window.tokens,
+                "global_tokens_limit": self.global_tokens,
+                "active_sessions": len(self.sessions)
+            }
+
+class DeferredQueue:
+    """Bounded queue of shed questions, answered in the background when the global budget frees up"""
+    
+    def __init__(self, governor: QuotaGovernor, handler: Callable[[str], None], max_size: int = None):
+        self.governor = governor
+        self.handler = handler
+        self.max_size = max_size or Config.QUOTA_DEFERRED_QUEUE_SIZE
+        self.queue = deque()
+        self.keys = set()
+        self._condition = threading.Condition()
+        self._thread = None
+    
+    def submit(self, key: str, message: str) -> bool:
+        """Queue a question once; False when the queue is full"""
+        with self._condition:
+            if key in self.keys:
+                return True
+            if len(self.queue) >= self.max_size:
+                metrics.increment("quota.deferred.dropped")
+                return False
+            
+            # (key, message, failed attempts, earliest retry time)
+            self.queue.append((key, message, 0, 0.0))
+            self.keys.add(key)
+            metrics.increment("quota.deferred.queued")
+            metrics.set_gauge("quota.deferred.queue_length", len(self.queue))
+            
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="quota-deferred")
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+            return True
+    
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self.queue:
+                    self._condition.wait()
+                key, message, attempts, not_before = self.queue[0]
+            
+            wait_time = max(self.governor.global_wait_time(), not_before - time.time())
+            if wait_time > 0:
+                time.sleep(wait_time)
+                continue
+            
+            with self._condition:
+                self.queue.popleft()
+                metrics.set_gauge("quota.deferred.queue_length", len(self.queue))
+            
+            try:
+                self.handler(message)
+                metrics.increment("quota.deferred.completed")
+            except Exception as e:
+                attempts += 1
+                with self._condition:
+                    if attempts < Config.QUOTA_DEFERRED_MAX_ATTEMPTS and len(self.queue) < self.max_size:
+                        # Behind everything already queued, and later after each failure
+                        self.queue.append((key, message, attempts, time.time() + Config.QUOTA_DEFERRED_RETRY_SECONDS * attempts))
+                        metrics.increment("quota.deferred.retried")
+                        metrics.set_gauge("quota.deferred.queue_length", len(self.queue))
+                        log_activity("Error", f"Deferred question failed on attempt {attempts}, requeued: {str(e)}")
+                        continue
+                metrics.increment("quota.deferred.failed")
+                log_activity("Error", f"Deferred question dropped after {attempts} attempts: {str(e)}")
+            
+            with self._condition:
+                self.keys.discard(key)
+    
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self.queue)
@@ -0,0 +1,138 @@
+# Embedded Rasa agent
+import asyncio
+import os
+import threading
+import time
+import logging
+from typing import Any, Dict, List, Optional
+from config.config import Config
+from src.utils import log_activity
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class EmbeddedRasaAgent:
+    """Runs the trained Rasa model in-process through the Agent API"""
+    
+    def __init__(self, model_dir: str = None, endpoints_file: str = None):
+        self.model_dir = model_dir or Config.RASA_MODEL_DIR
+        self.endpoints_file = endpoints_file or os.path.join(Config.RASA_PROJECT_PATH, "endpoints.yml")
+        self.agent = None
+        self.loaded_model = None
+        self._loop = None
+        self._loop_thread = None
+        self._load_lock = threading.Lock()
+        self._last_reload_check = 0.0
+        self._reloading = False
+    
+    def _start_loop(self) -> None:
+        """Run a dedicated asyncio loop so sync callers can await the agent"""
+        if self._loop is not None:
+            return
+        
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="rasa-agent-loop")
+        self._loop_thread.daemon = True
+        self._loop_thread.start()
+    
+    def _latest_model(self) -> Optional[str]:
+        """Get path of the newest packaged model"""
+        if not os.path.isdir(self.model_dir):
+            return None
+        
+        models = [
+            os.path.join(self.model_dir, name)
+            for name in os.listdir(self.model_dir)
+            if name.endswith(".tar.gz")
+        ]
+        
+        return max(models, key=os.path.getmtime) if models else None
+    
+    def load(self) -> bool:
+        """Load the latest model; returns False so callers can fall back to HTTP"""
+        model_path = self._latest_model()
+        if not model_path:
+            logger.error(f"No trained model found in {self.model_dir}")
+            return False
+        
+        start_time = time.time()
+        agent = self._build_agent(model_path)
+        if agent is None:
+            return False
+        
+        # Requests keep using the previous agent until this swap
+        with self._load_lock:
+            self._start_loop()
+            self.agent = agent
+            self.loaded_model = model_path
+            self._last_reload_check = time.time()
+        
+        log_activity("System", f"Embedded Rasa agent loaded {os.path.basename(model_path)} in {time.time() - start_time:.1f}s")
+        return True
+    
+    def _build_agent(self, model_path: str) -> Any:
+        """Load an Agent for a model without touching the one serving requests"""
+        try:
+            from rasa.core.agent import Agent
+            from rasa.core.utils import AvailableEndpoints
+        except ImportError as e:
+            logger.error(f"Rasa is not importable, embedded mode unavailable: {str(e)}")
+            return None
+        
+        try:
+            endpoints = AvailableEndpoints.read_endpoints(self.endpoints_file)
+            agent = Agent.load(model_path, action_endpoint=endpoints.action)
+            
+            if not agent.is_ready():
+                logger.error(f"Embedded Rasa agent not ready for model {model_path}")
+                return None
+            return agent
+        
+        except Exception as e:
+            logger.error(f"Failed to load embedded Rasa agent: {str(e)}")
+            log_activity("Error", f"Failed to load embedded Rasa agent: {str(e)}")
+            return None
+    
+    def is_ready(self) -> bool:
+        """Check if a model is loaded"""
+        return self.agent is not None
+    
+    def maybe_reload(self) -> None:
+        """Pick up a newly trained model, checking at most every few seconds"""
+        now = time.time()
+        if now - self._last_reload_check < Config.RASA_MODEL_RELOAD_CHECK_SECONDS:
+            return
+        
+        self._last_reload_check = now
+        latest = self._latest_model()
+        
+        if latest and latest != self.loaded_model:
+            with self._load_lock:
+                if self._reloading:
+                    return
+                self._reloading = True
+            
+            logger.info(f"New Rasa model detected: {latest}, loading in the background")
+            threading.Thread(target=self._reload_in_background, name="rasa-agent-reload", daemon=True).start()
+    
+    def _reload_in_background(self) -> None:
+        try:
+            self.load()
+        finally:
+            self._reloading = False
+    
+    def _run(self, coroutine, timeout: float) -> Any:
+        """Run a coroutine on the agent loop and wait for the result"""
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        return future.result(timeout=timeout)
+    
+    def parse(self, message: str, timeout: float = 10) -> Dict[str, Any]:
+        """Equivalent of POST /model/parse"""
+        self.maybe_reload()
+        return self._run(self.agent.parse_message(message), timeout)
+    
+    def handle_text(self, message: str, sender: str = "user", timeout: float = 10) -> List[Dict[str, Any]]:
+        """Equivalent of POST /webhooks/rest/webhook"""
+        self.maybe_reload()
+        responses = self._run(self.agent.handle_text(message, sender_id=sender), timeout)
+        return responses or []
@@ -0,0 +1,233 @@
+# Pool of Rasa server workers
+import os
+import subprocess
+import threading
+import time
+import logging
+from collections import deque
+from typing import Any, Dict, List, Optional
+import requests
+from config.config import Config
+from src.utils import log_activity
+from src.metrics import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class RasaWorker:
+    """One rasa run process serving the shared model directory"""
+    
+    def __init__(self, port: int):
+        self.port = port
+        self.url = f"http://localhost:{port}"
+        self.process = None
+        self.outstanding = 0
+        self.healthy = False
+        self.unhealthy_until = 0.0
+        self.completed = deque()
+    
+    def is_available(self) -> bool:
+        """Healthy, or unhealthy long enough ago to be retried"""
+        return self.healthy or time.time() >= self.unhealthy_until
+    
+    def metric_name(self, name: str) -> str:
+        return f"rasa.worker.{self.port}.{name}"
+
+class RasaWorkerPool:
+    """Client-side load balancer over N Rasa workers (least outstanding requests)"""
+    
+    def __init__(self, ports: List[int] = None):
+        self.workers = [RasaWorker(port) for port in (ports or Config.get_rasa_worker_ports())]
+        self._lock = threading.Lock()
+        self._health_thread = None
+        self._stop = threading.Event()
+    
+    def start(self) -> None:
+        """Start workers that are not already running and wait until they serve"""
+        started = False
+        for worker in self.workers:
+            if self.check_health(worker):
+                logger.info(f"Rasa worker on port {worker.port} is already running")
+                continue
+            
+            started = self._launch(worker) or started
+        
+        if started:
+            self.wait_until_ready(Config.RASA_WORKER_STARTUP_TIMEOUT)
+        healthy = sum(1 for worker in self.workers if worker.healthy)
+        log_activity("System", f"Rasa worker pool started: {healthy}/{len(self.workers)} workers healthy")
+        
+        if len(self.workers) > 1 and self._health_thread is None:
+            self._health_thread = threading.Thread(target=self._health_loop, name="rasa-pool-health")
+            self._health_thread.daemon = True
+            self._health_thread.start()
+    
+    def _launch(self, worker: RasaWorker) -> bool:
+        """Start a rasa run process for a worker on the newest model"""
+        try:
+            logger.info(f"Starting Rasa worker on port {worker.port}...")
+            worker.process = subprocess.Popen([
+                "rasa", "run", "--enable-api", "--cors", "*",
+                "--port", str(worker.port), "--model", "models"
+            ], cwd=Config.RASA_PROJECT_PATH)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to start Rasa worker on port {worker.port}: {str(e)}")
+            log_activity("Error", f"Failed to start Rasa worker on port {worker.port}: {str(e)}")
+            return False
+    
+    def _reload_model(self, worker: RasaWorker, model_file: str) -> bool:
+        """Ask a worker this pool did not start to load a model through its HTTP API"""
+        try:
+            response = requests.put(f"{worker.url}/model", json={"model_file": model_file},
+                                    timeout=Config.RASA_WORKER_STARTUP_TIMEOUT)
+            return response.status_code < 300
+        except requests.exceptions.RequestException:
+            return False
+    
+    def restart(self) -> bool:
+        """Put every worker on the newest model: relaunch the ones this pool started, reload the others over the API"""
+        model_file = latest_model_file()
+        for worker in self.workers:
+            with self._lock:
+                # Nothing is routed here until the worker answers /status again
+                worker.healthy = False
+                worker.unhealthy_until = time.time() + Config.RASA_WORKER_STARTUP_TIMEOUT
+            
+            if worker.process is None and model_file and self._reload_model(worker, model_file):
+                continue
+            if worker.process is not None and worker.process.poll() is None:
+                worker.process.terminate()
+                try:
+                    worker.process.wait(timeout=Config.RASA_WORKER_STARTUP_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    worker.process.kill()
+                    worker.process.wait()
+            self._launch(worker)
+        
+        ready = self.wait_until_ready(Config.RASA_WORKER_STARTUP_TIMEOUT)
+        healthy = sum(1 for worker in self.workers if worker.healthy)
+        log_activity("System", f"Rasa worker pool restarted: {healthy}/{len(self.workers)} workers healthy")
+        return ready
+    
+    def wait_until_ready(self, timeout: float) -> bool:
+        """Poll worker status until all are up or the timeout expires"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if all(self.check_health(worker) for worker in self.workers if not worker.healthy):
+                return True
+            time.sleep(1)
+        return False
+    
+    def check_health(self, worker: RasaWorker) -> bool:
+        """Probe /status and update worker health"""
+        try:
+            response = requests.get(f"{worker.url}/status", timeout=Config.RASA_WORKER_HEALTH_TIMEOUT)
+            healthy = response.status_code == 200
+        except requests.exceptions.RequestException:
+            healthy = False
+        
+        with self._lock:
+            worker.healthy = healthy
+            if not healthy:
+                worker.unhealthy_until = time.time() + Config.RASA_WORKER_UNHEALTHY_COOLDOWN
+        metrics.set_gauge(worker.metric_name("healthy"), 1 if healthy else 0)
+        return healthy
+    
+    def _health_loop(self) -> None:
+        """Background health checks so routing skips dead workers"""
+        while not self._stop.wait(Config.RASA_WORKER_HEALTH_INTERVAL):
+            for worker in self.workers:
+                self.check_health(worker)
+    
+    def acquire(self) -> RasaWorker:
+        """Pick the available worker with the fewest outstanding requests"""
+        with self._lock:
+            candidates = [worker for worker in self.workers if worker.is_available()] or self.workers
+            worker = min(candidates, key=lambda w: (w.outstanding, len(w.completed)))
+            worker.outstanding += 1
+            metrics.set_gauge(worker.metric_name("outstanding"), worker.outstanding)
+            return worker
+    
+    def release(self, worker: RasaWorker, latency: float, success: bool) -> None:
+        """Record the result of a request routed to a worker"""
+        now = time.time()
+        with self._lock:
+            worker.outstanding = max(0, worker.outstanding - 1)
+            
+            # Requests completed in the last minute give the current throughput
+            worker.completed.append(now)
+            while worker.completed and worker.completed[0] < now - 60:
+                worker.completed.popleft()
+            
+            if success:
+                worker.healthy = True
+            else:
+                worker.healthy = False
+                worker.unhealthy_until = now + Config.RASA_WORKER_UNHEALTHY_COOLDOWN
+            
+            outstanding = worker.outstanding
+            throughput = len(worker.completed)
+        
+        metrics.increment(worker.metric_name("requests"))
+        if not success:
+            metrics.increment(worker.metric_name("errors"))
+        metrics.observe(worker.metric_name("latency"), latency)
+        metrics.set_gauge(worker.metric_name("outstanding"), outstanding)
+        metrics.set_gauge(worker.metric_name("throughput_rpm"), throughput)
+        metrics.set_gauge(worker.metric_name("healthy"), 1 if success else 0)
+    
+    def post(self, path: str, payload: Dict[str, Any], timeout: float) -> requests.Response:
+        """POST to the least loaded worker"""
+        worker = self.acquire()
+        start_time = time.time()
+        success = False
+        try:
+            response = requests.post(f"{worker.url}{path}", json=payload, timeout=timeout)
+            success = response.status_code < 500
+            return response
+        finally:
+            self.release(worker, time.time() - start_time, success)
+    
+    def get_worker_stats(self) -> List[Dict[str, Any]]:
+        """Per-worker load and throughput"""
+        stats = []
+        with self._lock:
+            for worker in self.workers:
+                stats.append({
+                    "port": worker.port,
+                    "healthy": worker.healthy,
+                    "outstanding": worker.outstanding,
+                    "throughput_rpm": len(worker.completed)
+                })
+        return stats
+    
+    def stop(self) -> None:
+        """Stop health checks and workers started by this pool"""
+        self._stop.set()
+        for worker in self.workers:
+            if worker.process is not None and worker.process.poll() is None:
+                worker.process.terminate()
+
+def latest_model_file() -> Optional[str]:
+    """Path of the newest packaged model"""
+    if not os.path.isdir(Config.RASA_MODEL_DIR):
+        return None
+    models = [os.path.join(Config.RASA_MODEL_DIR, name) for name in os.listdir(Config.RASA_MODEL_DIR) if name.endswith(".tar.gz")]
+    return max(models, key=os.path.getmtime) if models else None
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_rasa_pool() -> RasaWorkerPool:
+    """Shared pool for the process, so training restarts the workers chat requests are routed to"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = RasaWorkerPool(Config.get_rasa_worker_ports())
+        return _pool
+
+def active_rasa_pool() -> Optional[RasaWorkerPool]:
+    """The shared pool if HTTP mode has created it"""
+    with _pool_lock:
+        return _pool
@@ -0,0 +1,53 @@
+# Cache of recent answers
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+class ResponseCache:
+    """LRU cache of answers keyed by normalized query, fresh for fresh_ttl and servable stale until stale_ttl"""
+    
+    def __init__(self, max_entries: int = 500, fresh_ttl: Optional[float] = None, stale_ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached answer with its age in seconds and whether it is stale"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            age = time.time() - entry["cached_at"]
+            if self.stale_ttl is not None and age > self.stale_ttl:
+                # Too old to serve at all
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+            stale = self.fresh_ttl is not None and age > self.fresh_ttl
+            return dict(entry, age=age, stale=stale)
+    
+    def put(self, key: str, response_data: Dict[str, Any]) -> None:
+        """Store an answer, evicting the least recently used entry when full"""
+        if not key:
+            return
+        
+        with self._lock:
+            self._entries[key] = {
+                "response": response_data.get("response", ""),
+                "confidence": response_data.get("confidence", 0.0),
+                "model_source": response_data.get("model_source", "Unknown"),
+                "cached_at": time.time()
+            }
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,162 @@
+# Intent to static response lookup table
+import os
+import random
+import threading
+import yaml
+from typing import Any, Dict, List, Optional
+from config.config import Config
+from src.utils import log_activity, safe_load_json, safe_save_json
+
+class ResponseTable:
+    """Precompiled intent -> utter_* texts for single-step rules and stories"""
+    
+    def __init__(self, project_path: str = None, table_file: str = None):
+        project_path = project_path or Config.RASA_PROJECT_PATH
+        self.source_files = {
+            "domain": os.path.join(project_path, "domain.yml"),
+            "rules": os.path.join(project_path, "data", "rules.yml"),
+            "stories": os.path.join(project_path, "data", "stories.yml")
+        }
+        self.table_file = table_file or Config.RESPONSE_TABLE_FILE
+        self.table = {}
+        self._source_mtimes = {}
+        self._lock = threading.Lock()
+        self.load()
+    
+    def _current_mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        for name, path in self.source_files.items():
+            try:
+                mtimes[name] = os.path.getmtime(path)
+            except OSError:
+                mtimes[name] = 0.0
+        return mtimes
+    
+    def load(self) -> None:
+        """Use the compiled table if it matches the sources, otherwise recompile"""
+        mtimes = self._current_mtimes()
+        compiled = safe_load_json(self.table_file, {})
+        
+        if isinstance(compiled, dict) and compiled.get("source_mtimes") == mtimes:
+            with self._lock:
+                self.table = compiled.get("intents", {})
+                self._source_mtimes = mtimes
+            return
+        
+        self.rebuild(mtimes)
+    
+    def rebuild(self, mtimes: Dict[str, float] = None) -> None:
+        """Compile the table from domain, rules and stories"""
+        try:
+            mtimes = mtimes or self._current_mtimes()
+            table = self.compile(
+                self._load_yaml(self.source_files["domain"]),
+                self._load_yaml(self.source_files["rules"]).get("rules", []) or [],
+                self._load_yaml(self.source_files["stories"]).get("stories", []) or []
+            )
+            
+            with self._lock:
+                self.table = table
+                self._source_mtimes = mtimes
+            
+            safe_save_json(self.table_file, {"source_mtimes": mtimes, "intents": table})
+            log_activity("System", f"Response table compiled: {len(table)} static intents")
+        
+        except Exception as e:
+            log_activity("Error", f"Failed to compile response table: {str(e)}")
+    
+    def _load_yaml(self, file_path: str) -> Dict:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return yaml.safe_load(f) or {}
+        except Exception:
+            return {}
+    
+    @staticmethod
+    def compile(domain: Dict, rules: List[Dict], stories: List[Dict]) -> Dict[str, Dict[str, Any]]:
+        """Map intents to texts where the only behaviour is 'intent -> one static utter_*'"""
+        static_responses = {}
+        for name, variations in (domain.get("responses") or {}).items():
+            if not isinstance(variations, list) or not variations:
+                continue
+            
+            texts = []
+            for variation in variations:
+                # Buttons, images, conditions, channels or slot templates need Rasa
+                if not isinstance(variation, dict) or set(variation.keys()) != {"text"}:
+                    texts = []
+                    break
+                text = str(variation["text"])
+                if "{" in text:
+                    texts = []
+                    break
+                texts.append(text)
+            
+            if texts:
+                static_responses[name] = texts
+        
+        candidates = {}
+        ambiguous = set()
+        
+        for flow in list(rules) + list(stories):
+            if not isinstance(flow, dict):
+                continue
+            steps = flow.get("steps") or []
+            intents_in_flow = [step["intent"] for step in steps if isinstance(step, dict) and "intent" in step]
+            
+            is_single_step = (
+                len(steps) == 2
+                and isinstance(steps[0], dict) and set(steps[0].keys()) == {"intent"}
+                and isinstance(steps[1], dict) and set(steps[1].keys()) == {"action"}
+                and not flow.get("condition")
+                and not flow.get("conversation_start")
+            )
+            
+            if not is_single_step:
+                ambiguous.update(intents_in_flow)
+                continue
+            
+            intent = steps[0]["intent"]
+            action = steps[1]["action"]
+            if candidates.get(intent, action) != action:
+                ambiguous.add(intent)
+            candidates[intent] = action
+        
+        table = {}
+        for intent, action in candidates.items():
+            if intent in ambiguous or action not in static_responses:
+                continue
+            table[intent] = {"action": action, "texts": static_responses[action]}
+        
+        return table
+    
+    def lookup(self, intent: str) -> Optional[str]:
+        """Get the response text for an intent, recompiling first if sources changed"""
+        if not intent:
+            return None
+        
+        self.refresh_if_stale()
+        
+        with self._lock:
+            entry = self.table.get(intent)
+        
+        if not entry:
+            return None
+        return random.choice(entry["texts"])
+    
+    def refresh_if_stale(self) -> None:
+        """Recompile when a source file changed since the table was built"""
+        with self._lock:
+            compiled_mtimes = self._source_mtimes
+        if self._current_mtimes() != compiled_mtimes:
+            self.rebuild()
+    
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """Copy of intent -> entry, recompiled first if sources changed"""
+        self.refresh_if_stale()
+        with self._lock:
+            return dict(self.table)
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.table)
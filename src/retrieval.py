@@ -0,0 +1,231 @@
+# Local FAQ retrieval tier (BM25)
+import math
+import os
+import threading
+import time
+import yaml
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from config.config import Config
+from src.utils import log_activity, normalize_query, safe_load_json
+from src.response_table import ResponseTable
+from src.feedback_store import get_feedback_store
+
+STOP_WORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'be', 'to', 'of', 'and', 'or', 'in', 'on', 'at', 'for',
+    'with', 'my', 'me', 'i', 'you', 'your', 'it', 'this', 'that', 'do', 'does', 'can', 'could',
+    'how', 'what', 'please', 'help', 'need', 'want', 'would', 'should', 'am', 'im', 'from', 'by'
+}
+
+def tokenize(text: str) -> List[str]:
+    """Normalized terms without stop words"""
+    return [term for term in normalize_query(text).split() if term not in STOP_WORDS]
+
+class FAQRetriever:
+    """BM25 inverted index over known answers and the questions that lead to them"""
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents = {}
+        self.postings = defaultdict(dict)
+        self.total_length = 0
+        self._lock = threading.RLock()
+    
+    def add_document(self, doc_id: str, questions: List[str], response: str, source: str) -> None:
+        """Index or re-index one answer"""
+        terms = []
+        for text in list(questions) + [response]:
+            terms.extend(tokenize(text))
+        
+        with self._lock:
+            self.remove_document(doc_id)
+            term_counts = Counter(terms)
+            for term, count in term_counts.items():
+                self.postings[term][doc_id] = count
+            
+            self.documents[doc_id] = {
+                "response": response,
+                "source": source,
+                "length": len(terms),
+                "terms": list(term_counts.keys()),
+                "fingerprint": hash((tuple(questions), response))
+            }
+            self.total_length += len(terms)
+    
+    def remove_document(self, doc_id: str) -> None:
+        with self._lock:
+            document = self.documents.pop(doc_id, None)
+            if not document:
+                return
+            
+            for term in document["terms"]:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[term]
+            self.total_length -= document["length"]
+    
+    def _idf(self, term: str) -> float:
+        document_count = len(self.documents)
+        frequency = len(self.postings.get(term, {}))
+        return math.log(1 + (document_count - frequency + 0.5) / (frequency + 0.5))
+    
+    def search(self, query: str, top_k: int = 1) -> List[Tuple[str, float, float]]:
+        """Rank documents; returns (doc_id, bm25 score, share of query idf matched)"""
+        query_terms = set(tokenize(query))
+        
+        with self._lock:
+            if not query_terms or not self.documents:
+                return []
+            
+            average_length = self.total_length / len(self.documents)
+            idf = {term: self._idf(term) for term in query_terms}
+            total_idf = sum(idf.values())
+            scores = defaultdict(float)
+            matched_idf = defaultdict(float)
+            
+            for term in query_terms:
+                for doc_id, frequency in self.postings.get(term, {}).items():
+                    length = self.documents[doc_id]["length"]
+                    norm = frequency + self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[doc_id] += idf[term] * frequency * (self.k1 + 1) / norm
+                    matched_idf[doc_id] += idf[term]
+            
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+            return [(doc_id, score, matched_idf[doc_id] / total_idf if total_idf else 0.0) for doc_id, score in ranked]
+    
+    def best_answer(self, query: str) -> Optional[Dict[str, Any]]:
+        """Top match if it clears both the score and coverage thresholds"""
+        results = self.search(query, top_k=1)
+        if not results:
+            return None
+        
+        doc_id, score, coverage = results[0]
+        if score < Config.RETRIEVAL_MIN_SCORE or coverage < Config.RETRIEVAL_MIN_COVERAGE:
+            return None
+        
+        with self._lock:
+            document = self.documents.get(doc_id)
+        if not document:
+            return None
+        
+        return {
+            "doc_id": doc_id,
+            "response": document["response"],
+            "source": document["source"],
+            "score": score,
+            "coverage": coverage
+        }
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.documents)
+
+class FAQIndexer:
+    """Keeps a FAQRetriever in sync with the Rasa project and reviewed feedback"""
+    
+    def __init__(self, retriever: FAQRetriever, response_table: ResponseTable = None):
+        self.retriever = retriever
+        self.response_table = response_table or ResponseTable()
+        self.nlu_file = os.path.join(Config.RASA_PROJECT_PATH, "data", "nlu.yml")
+        self.removable_reviews_file = os.path.join(Config.DATA_DIR, "removable_reviews.json")
+        self._source_mtimes = {}
+        self._last_check = 0.0
+        self._refresh_lock = threading.Lock()
+    
+    def _sources(self) -> Dict[str, str]:
+        return {
+            "nlu": self.nlu_file,
+            "domain": self.response_table.source_files["domain"],
+            "rules": self.response_table.source_files["rules"],
+            "stories": self.response_table.source_files["stories"],
+            "feedback": get_feedback_store().counters_file,
+            "reviews": self.removable_reviews_file
+        }
+    
+    def _collect_documents(self) -> Dict[str, Tuple[List[str], str, str]]:
+        """Current documents: static intent answers and reviewed feedback answers"""
+        documents = {}
+        
+        examples = defaultdict(list)
+        try:
+            with open(self.nlu_file, 'r', encoding='utf-8') as f:
+                nlu_data = yaml.safe_load(f) or {}
+            for item in nlu_data.get("nlu", []) or []:
+                if isinstance(item, dict) and "intent" in item:
+                    for line in str(item.get("examples", "")).splitlines():
+                        line = line.strip().lstrip("-").strip()
+                        if line:
+                            examples[item["intent"]].append(line)
+        except Exception as e:
+            log_activity("Error", f"Failed to read NLU examples for retrieval: {str(e)}")
+        
+        # entries() recompiles first, so the table reflects the latest merge
+        for intent, entry in self.response_table.entries().items():
+            documents[f"intent:{intent}"] = (examples.get(intent, []), entry["texts"][0], "domain")
+        
+        # Reviewed feedback that has been trained: the expected answer, or the approved bot answer
+        feedback_store = get_feedback_store()
+        for review in safe_load_json(self.removable_reviews_file, []):
+            review_id = str(review.get("id"))
+            feedback = feedback_store.get(review_id) or {}
+            answer = (review.get("expected_answer") or feedback.get("expected_answer") or "").strip()
+            if not answer and feedback.get("feedback_type") == "positive":
+                answer = (feedback.get("bot_response") or "").strip()
+            user_query = (review.get("user_query") or feedback.get("user_query") or "").strip()
+            if answer and user_query:
+                documents[f"review:{review_id}"] = ([user_query], answer, "review")
+        
+        return documents
+    
+    def refresh(self, force: bool = False) -> None:
+        """Apply added, changed and removed documents when a source file changed"""
+        # Request threads skip the check while another thread is applying changes
+        if not self._refresh_lock.acquire(blocking=force):
+            return
+        try:
+            self._refresh(force)
+        finally:
+            self._refresh_lock.release()
+    
+    def _refresh(self, force: bool) -> None:
+        """Called with the refresh lock held"""
+        now = time.time()
+        if not force and now - self._last_check < Config.RETRIEVAL_REFRESH_SECONDS:
+            return
+        self._last_check = now
+        
+        mtimes = {}
+        for name, path in self._sources().items():
+            try:
+                mtimes[name] = os.path.getmtime(path)
+            except OSError:
+                mtimes[name] = 0.0
+        
+        if not force and mtimes == self._source_mtimes:
+            return
+        
+        try:
+            documents = self._collect_documents()
+            added = removed = 0
+            
+            for doc_id in list(self.retriever.documents.keys()):
+                if doc_id not in documents:
+                    self.retriever.remove_document(doc_id)
+                    removed += 1
+            
+            for doc_id, (questions, response, source) in documents.items():
+                existing = self.retriever.documents.get(doc_id)
+                if existing and existing["fingerprint"] == hash((tuple(questions), response)):
+                    continue
+                self.retriever.add_document(doc_id, questions, response, source)
+                added += 1
+            
+            self._source_mtimes = mtimes
+            if added or removed:
+                log_activity("System", f"FAQ index updated: +{added} -{removed}, {len(self.retriever)} documents")
+        
+        except Exception as e:
+            log_activity("Error", f"Failed to refresh FAQ index: {str(e)}")
@@ -0,0 +1,205 @@
+# In-memory Rasa training data for one training run
+import os
+import tempfile
+from typing import Any, Callable, Dict, List
+import yaml
+from config.config import Config
+from src.utils import log_activity
+
+CORPUS_FILES = {
+    "nlu": os.path.join("data", "nlu.yml"),
+    "domain": "domain.yml",
+    "stories": os.path.join("data", "stories.yml"),
+    "rules": os.path.join("data", "rules.yml")
+}
+
+# Sections that are lists of named entries: section -> (list key, name field, log label)
+NAMED_LISTS = {
+    "nlu": ("nlu", "intent", "NLU intent"),
+    "stories": ("stories", "story", "story"),
+    "rules": ("rules", "rule", "rule")
+}
+
+class TrainingCorpus:
+    """nlu, domain, stories and rules loaded once; merges are applied in memory and each changed file is written once"""
+    
+    def __init__(self, project_path: str = None):
+        self.project_path = project_path or Config.RASA_PROJECT_PATH
+        self.paths = {section: os.path.join(self.project_path, relative) for section, relative in CORPUS_FILES.items()}
+        self.data = {section: self._load(path) for section, path in self.paths.items()}
+        self.dirty = set()
+        
+        # Name indexes, so duplicate checks do not scan the lists
+        self.names = {}
+        for section, (list_key, name_field, _) in NAMED_LISTS.items():
+            entries = self.data[section].get(list_key)
+            self.names[section] = {entry[name_field] for entry in entries
+                                   if isinstance(entry, dict) and name_field in entry} if isinstance(entries, list) else set()
+        
+        domain = self.data["domain"]
+        # Domain intents are names, or single-key mappings carrying intent properties
+        self.domain_intents = {next(iter(intent)) if isinstance(intent, dict) else intent
+                               for intent in domain["intents"] if intent} if isinstance(domain.get("intents"), list) else set()
+        self.actions = set(domain["actions"]) if isinstance(domain.get("actions"), list) else set()
+    
+    @staticmethod
+    def _load(file_path: str) -> Dict[str, Any]:
+        try:
+            if os.path.exists(file_path):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = yaml.safe_load(f)
+                    return data if isinstance(data, dict) else {}
+            return {}
+        except Exception as e:
+            log_activity("Error", f"Failed to load {file_path}: {str(e)}")
+            return {}
+    
+    def merge(self, parsed_sections: Dict[str, Any], feedback_id: str) -> bool:
+        """Add new intents, responses, stories and rules; on any failure the corpus is left as it was"""
+        undo = []
+        added = 0
+        try:
+            for section_name, new_data in parsed_sections.items():
+                if section_name == "domain":
+                    added += self._merge_domain(new_data, undo)
+                elif section_name in NAMED_LISTS:
+                    added += self._merge_named_list(section_name, new_data, undo)
+                else:
+                    log_activity("Training", f"❌ Unknown section type: {section_name}")
+                    self._rollback(undo)
+                    return False
+            
+            for section_name, data in self.data.items():
+                if not data:
+                    log_activity("Training", f"❌ Empty {section_name} data after merge for feedback {feedback_id}")
+                    self._rollback(undo)
+                    return False
+            
+            # Every name was already taken, so the feedback would be marked trained with nothing added
+            if not added:
+                log_activity("Training", f"❌ Nothing new to merge for feedback {feedback_id}, all names already exist")
+                self._rollback(undo)
+                return False
+            
+            return True
+        
+        except Exception as e:
+            log_activity("Error", f"In-memory merge failed for feedback {feedback_id}: {str(e)}")
+            self._rollback(undo)
+            return False
+    
+    def _rollback(self, undo: List[Callable[[], None]]) -> None:
+        for step in reversed(undo):
+            step()
+    
+    def _section(self, section_name: str, undo: list) -> Dict[str, Any]:
+        """Section data, started as an empty version 3.1 file when missing"""
+        data = self.data[section_name]
+        if not data:
+            self._set(data, "version", "3.1", undo)
+        return data
+    
+    def _container(self, data: Dict[str, Any], key: str, container_type: type, undo: list) -> Any:
+        """data[key], replaced with an empty container when missing or of the wrong type"""
+        if not isinstance(data.get(key), container_type):
+            self._set(data, key, container_type(), undo)
+        return data[key]
+    
+    def _set(self, data: Dict[str, Any], key: str, value: Any, undo: list) -> None:
+        if key in data:
+            previous = data[key]
+            undo.append(lambda: data.__setitem__(key, previous))
+        else:
+            undo.append(lambda: data.pop(key, None))
+        data[key] = value
+    
+    def _append(self, entries: list, entry: Any, undo: list) -> None:
+        entries.append(entry)
+        undo.append(entries.pop)
+    
+    def _index(self, names: set, name: str, undo: list) -> None:
+        names.add(name)
+        undo.append(lambda: names.discard(name))
+    
+    def _mark_dirty(self, section_name: str, undo: list) -> None:
+        if section_name not in self.dirty:
+            self.dirty.add(section_name)
+            undo.append(lambda: self.dirty.discard(section_name))
+    
+    def _merge_named_list(self, section_name: str, new: Dict, undo: list) -> int:
+        """Entries added"""
+        list_key, name_field, label = NAMED_LISTS[section_name]
+        new_entries = new.get(list_key) if isinstance(new, dict) else None
+        if not isinstance(new_entries, list):
+            return 0
+        
+        entries = self._container(self._section(section_name, undo), list_key, list, undo)
+        names = self.names[section_name]
+        added = 0
+        for entry in new_entries:
+            if isinstance(entry, dict) and name_field in entry and entry[name_field] not in names:
+                self._append(entries, entry, undo)
+                self._index(names, entry[name_field], undo)
+                self._mark_dirty(section_name, undo)
+                added += 1
+                log_activity("Training", f"✅ Added {label}: {entry[name_field]}")
+        return added
+    
+    def _merge_domain(self, new: Dict, undo: list) -> int:
+        """Intents and responses added"""
+        if not isinstance(new, dict):
+            return 0
+        domain = self._section("domain", undo)
+        added = 0
+        
+        if isinstance(new.get("intents"), list):
+            intents = self._container(domain, "intents", list, undo)
+            for intent in new["intents"]:
+                if intent not in self.domain_intents:
+                    self._append(intents, intent, undo)
+                    self._index(self.domain_intents, intent, undo)
+                    self._mark_dirty("domain", undo)
+                    added += 1
+                    log_activity("Training", f"✅ Added domain intent: {intent}")
+        
+        if isinstance(new.get("responses"), dict):
+            responses = self._container(domain, "responses", dict, undo)
+            for response_key, response_value in new["responses"].items():
+                if response_key in responses:
+                    continue
+                self._set(responses, response_key, response_value, undo)
+                self._mark_dirty("domain", undo)
+                added += 1
+                log_activity("Training", f"✅ Added domain response: {response_key}")
+                
+                # Also add to actions if not present
+                if response_key not in self.actions:
+                    self._append(self._container(domain, "actions", list, undo), response_key, undo)
+                    self._index(self.actions, response_key, undo)
+        
+        return added
+    
+    def save(self) -> List[str]:
+        """Write each changed file once, atomically; returns the files written"""
+        written = []
+        for section_name, file_path in self.paths.items():
+            if section_name not in self.dirty:
+                continue
+            
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".",
+                                                  prefix=os.path.basename(file_path) + '_', suffix='.tmp')
+            try:
+                with os.fdopen(temp_fd, 'w', encoding='utf-8') as f:
+                    yaml.dump(self.data[section_name], f, default_flow_style=False, sort_keys=False,
+                              allow_unicode=True, width=1000, indent=2)
+                os.replace(temp_path, file_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+            
+            self.dirty.discard(section_name)
+            written.append(file_path)
+        
+        return written
@@ -2,16 +2,24 @@ import json
 import os
 import yaml
 import google.generativeai as genai
-from datetime import datetime
 from config.config import Config
 from src.utils import log_activity, safe_load_json, safe_save_json
+from src.feedback_clustering import FeedbackCluster, cluster_feedback
+from src.training_priority import TrainingBacklog
+from src.concurrency import TokenBucket
+from src.generation_cache import get_generation_cache
+from src.training_corpus import TrainingCorpus
+from src.training_snapshots import SnapshotStore
+from src.rasa_pool import active_rasa_pool, get_rasa_pool
+from src.metrics import metrics
 import subprocess
-import shutil
 import re
 from collections import defaultdict
 import hashlib
 import traceback
-import copy
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple, Any
 import time
 
@@ -24,6 +32,17 @@ class TrainingManager:
         self.max_processing_retries = 3
         self.feedback_threshold = self.load_feedback_threshold()
         self.debug_mode = True
+        self.gemini_calls = 0
+        self.gemini_tokens = 0
+        self._stats_lock = threading.Lock()
+        self.gemini_limiter = TokenBucket(
+            rate_per_second=Config.GEMINI_RATE_LIMIT_PER_MINUTE / 60.0,
+            capacity=Config.GEMINI_RATE_LIMIT_BURST
+        )
+        self.generation_cache = get_generation_cache() if Config.GENERATION_CACHE_ENABLED else None
+        self.snapshots = SnapshotStore()
+        # Intent names handed to feedback still being generated in this run
+        self._reserved_intents = set()
         self.rejected_reviews_file = os.path.join(Config.DATA_DIR, "rejected.json")
         self.processed_reviews_file = os.path.join(Config.DATA_DIR, "processed_reviews.json")
         self.removable_reviews_file = os.path.join(Config.DATA_DIR, "removable_reviews.json")
@@ -82,7 +101,8 @@ class TrainingManager:
             log_activity("Error", f"Failed to analyze existing structure: {str(e)}")
             return {"existing_intents": [], "existing_responses": [], "existing_actions": []}
     
-    def load_feedback_threshold(self) -> int:
+    @staticmethod
+    def load_feedback_threshold() -> int:
         """Load user-adjustable feedback threshold"""
         try:
             settings = safe_load_json(os.path.join(Config.DATA_DIR, "settings.json"), {})
@@ -102,8 +122,8 @@ class TrainingManager:
         except Exception as e:
             log_activity("Error", f"Failed to save feedback threshold: {str(e)}")
     
-    def process_feedback_for_training(self) -> str:
-        """Process feedback and automatically train if threshold reached"""
+    def process_feedback_for_training(self, time_budget: float = None, token_budget: int = None) -> str:
+        """Process feedback, highest impact first within the budgets, and automatically train if threshold reached"""
         try:
             log_activity("Training", "=== STARTING FEEDBACK PROCESSING WITH AUTO-TRAINING ===")
             
@@ -116,36 +136,103 @@ class TrainingManager:
             
             log_activity("Training", f"Found {len(unprocessed_feedback)} truly unprocessed feedback entries")
             
-            # Process each feedback
             successfully_processed = []
             failed_reviews = []
+            pending_feedback = []
             
             for feedback in unprocessed_feedback:
-                feedback_id = feedback.get("id")
-                retry_count = feedback.get("retry_count", 0)
-                
-                log_activity("Training", f"=== PROCESSING FEEDBACK ID: {feedback_id} ===")
-                
-                if retry_count >= self.max_processing_retries:
-                    log_activity("Training", f"❌ Feedback {feedback_id} exceeded max retries")
+                if feedback.get("retry_count", 0) >= self.max_processing_retries:
+                    log_activity("Training", f"❌ Feedback {feedback.get('id')} exceeded max retries")
                     failed_reviews.append(feedback)
-                    continue
-                
-                # Process with structure-aware method
-                success = self._process_single_feedback_structure_aware(feedback)
-                
-                if success:
-                    successfully_processed.append(feedback)
-                    log_activity("Training", f"✅ Successfully processed feedback {feedback_id}")
                 else:
-                    feedback["retry_count"] = retry_count + 1
-                    feedback["last_retry_timestamp"] = Config.get_timestamp()
+                    pending_feedback.append(feedback)
+            
+            # Group near-duplicate questions so each group costs one generation
+            clusters = self._cluster_feedback(pending_feedback)
+            gemini_calls_saved = 0
+            
+            # Highest-impact questions first; whatever the budgets do not reach stays queued for the next run
+            backlog = self._build_training_backlog(clusters)
+            time_budget = Config.TRAINING_TIME_BUDGET_SECONDS if time_budget is None else time_budget
+            token_budget = Config.TRAINING_TOKEN_BUDGET if token_budget is None else token_budget
+            run_start = time.time()
+            tokens_before = self.gemini_tokens
+            clusters_finished = 0
+            deferred_count = 0
+            concurrency = max(1, Config.GEMINI_CONCURRENCY)
+            batch_size = max(1, Config.GEMINI_BATCH_SIZE)
+            corpus = TrainingCorpus()
+            # The manager outlives runs, so names merged by earlier runs must be re-read before naming new intents
+            self._sync_existing_structure(corpus)
+            self._reserved_intents = set()
+            budgeted = bool(time_budget or token_budget)
+            
+            # Generation and validation run on the pool, up to `concurrency` prompts of `batch_size`
+            # clusters ahead; names, prompts and merges are handled here, one at a time and in backlog order
+            in_flight = deque()
+            clusters_in_flight = 0
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="gemini-generation") as executor:
+                while len(backlog) or in_flight:
+                    # Until a cluster finishes there is no cost estimate to check a budget against, so one batch goes out
+                    dispatch_limit = concurrency if clusters_finished or not budgeted else 1
+                    while len(backlog) and len(in_flight) < dispatch_limit:
+                        batch = []
+                        while len(backlog) and len(batch) < batch_size:
+                            if self._budget_exhausted(run_start, tokens_before, clusters_finished, clusters_in_flight + len(batch), time_budget, token_budget):
+                                deferred_count = sum(len(remaining) for remaining in backlog.drain())
+                                metrics.increment("training.deferred", deferred_count)
+                                log_activity("Training", f"⏸️ Budget reached, deferring {deferred_count} lower-impact feedback entries")
+                                break
+                            
+                            cluster, impact = backlog.pop()
+                            item = dict(self._cluster_training_item(cluster))
+                            item["intent_name"] = self._reserve_intent_name(item)
+                            log_activity("Training", f"=== PROCESSING FEEDBACK ID: {item.get('id')} ({len(cluster)} in cluster, impact {impact['score']:.1f}) ===")
+                            batch.append((cluster, item))
+                        
+                        if batch:
+                            clusters_in_flight += len(batch)
+                            prepared = self._prepare_generation_batch([item for _, item in batch])
+                            in_flight.append((batch, executor.submit(self._generate_validated_batch, prepared)))
                     
-                    if feedback["retry_count"] >= self.max_processing_retries:
-                        failed_reviews.append(feedback)
-                        log_activity("Training", f"❌ Feedback {feedback_id} failed after {self.max_processing_retries} retries")
-                    else:
-                        log_activity("Training", f"⚠️ Feedback {feedback_id} will retry (attempt {feedback['retry_count']})")
+                    if not in_flight:
+                        break
+                    
+                    batch, future = in_flight.popleft()
+                    clusters_in_flight -= len(batch)
+                    for (cluster, item), generated in zip(batch, future.result()):
+                        success, calls = self._merge_generated_feedback(item, generated, corpus)
+                        clusters_finished += 1
+                        
+                        if len(cluster) > 1:
+                            # Each other member would have needed at least as many calls on its own
+                            saved = calls * (len(cluster) - 1)
+                            gemini_calls_saved += saved
+                            metrics.increment("training.gemini_calls_saved", saved)
+                        
+                        for member in cluster.members:
+                            member_id = member.get("id")
+                            if success:
+                                successfully_processed.append(member)
+                                log_activity("Training", f"✅ Successfully processed feedback {member_id}")
+                                continue
+                            
+                            member["retry_count"] = member.get("retry_count", 0) + 1
+                            member["last_retry_timestamp"] = Config.get_timestamp()
+                            
+                            if member["retry_count"] >= self.max_processing_retries:
+                                failed_reviews.append(member)
+                                log_activity("Training", f"❌ Feedback {member_id} failed after {self.max_processing_retries} retries")
+                            else:
+                                log_activity("Training", f"⚠️ Feedback {member_id} will retry (attempt {member['retry_count']})")
+            
+            # Every merge so far lives in memory; each changed file is written once for the run
+            if successfully_processed and not self._save_corpus(corpus):
+                log_activity("Training", f"❌ Training data not written, {len(successfully_processed)} reviews stay queued")
+                return "Review processing failed: could not write training data"
+            
+            if gemini_calls_saved:
+                log_activity("Training", f"Clustering saved {gemini_calls_saved} Gemini calls ({len(pending_feedback)} feedback in {len(clusters)} clusters)")
             
             # Handle results
             if successfully_processed:
@@ -174,6 +261,10 @@ class TrainingManager:
             self._update_feedback_retry_counts(unprocessed_feedback, successfully_processed, failed_reviews)
             
             result_message = f"Review processing complete: {len(successfully_processed)} processed, {len(failed_reviews)} rejected"
+            if gemini_calls_saved:
+                result_message += f", {gemini_calls_saved} Gemini calls saved by clustering"
+            if deferred_count:
+                result_message += f", {deferred_count} deferred by budget"
             log_activity("Training", result_message)
             
             return result_message
@@ -221,18 +312,82 @@ class TrainingManager:
             log_activity("Error", f"Failed to get truly unprocessed feedback: {str(e)}")
             return []
     
-    def _process_single_feedback_structure_aware(self, feedback: Dict) -> bool:
-        """Process single feedback with perfect structure awareness"""
+    def _cluster_feedback(self, feedback_items: List[Dict]) -> List[FeedbackCluster]:
+        """Group near-duplicate feedback; one cluster per item when clustering is off"""
         try:
-            feedback_id = feedback.get("id")
-            log_activity("Training", f"Processing feedback {feedback_id} with structure awareness")
+            if not Config.FEEDBACK_CLUSTERING_ENABLED:
+                return [FeedbackCluster(feedback, set()) for feedback in feedback_items]
+            
+            clusters = cluster_feedback(feedback_items)
+            merged = len(feedback_items) - len(clusters)
+            if merged:
+                log_activity("Training", f"Clustered {len(feedback_items)} feedback entries into {len(clusters)} groups")
+            metrics.increment("training.feedback_clustered", merged)
+            return clusters
+        
+        except Exception as e:
+            log_activity("Error", f"Feedback clustering failed, processing individually: {str(e)}")
+            return [FeedbackCluster(feedback, set()) for feedback in feedback_items]
+    
+    def _build_training_backlog(self, clusters: List[FeedbackCluster]) -> TrainingBacklog:
+        """Order clusters by chat demand, LLM fallbacks and negative feedback"""
+        try:
+            if not Config.TRAINING_PRIORITY_ENABLED:
+                return TrainingBacklog(clusters)
             
-            # Generate YAML that perfectly matches existing structure
-            for attempt in range(self.max_regeneration_attempts):
+            from src.chat_ring_buffer import get_chat_history
+            return TrainingBacklog(clusters, get_chat_history())
+        
+        except Exception as e:
+            log_activity("Error", f"Backlog prioritization failed, keeping arrival order: {str(e)}")
+            return TrainingBacklog(clusters)
+    
+    def _budget_exhausted(self, run_start: float, tokens_before: int, clusters_finished: int, in_flight: int,
+                          time_budget: float, token_budget: int) -> bool:
+        """Whether the clusters in flight plus one more, at the run's average cost, would overrun a budget"""
+        if not clusters_finished:
+            return False
+        
+        elapsed = time.time() - run_start
+        tokens_used = self.gemini_tokens - tokens_before
+        if time_budget and elapsed + elapsed / clusters_finished * (in_flight + 1) > time_budget:
+            return True
+        if token_budget and tokens_used + tokens_used / clusters_finished * (in_flight + 1) > token_budget:
+            return True
+        return False
+    
+    def _cluster_training_item(self, cluster: FeedbackCluster) -> Dict:
+        """Representative feedback carrying the other phrasings of its cluster"""
+        if len(cluster) == 1:
+            return cluster.representative
+        return dict(cluster.representative, cluster_queries=cluster.variants(), cluster_size=len(cluster))
+    
+    def _process_single_feedback_structure_aware(self, feedback: Dict) -> bool:
+        """Process single feedback with perfect structure awareness"""
+        log_activity("Training", f"Processing feedback {feedback.get('id')} with structure awareness")
+        return self._merge_generated_feedback(feedback, self._generate_validated_yaml(feedback))[0]
+    
+    def _generate_validated_yaml(self, feedback: Dict, first_attempt: int = 0, prompt: str = None) -> Dict[str, Any]:
+        """Generate and validate YAML until an attempt passes; touches no files, so it can run on a worker thread given its prompt"""
+        feedback_id = feedback.get("id")
+        calls = 0
+        cache_key = None
+        
+        for attempt in range(first_attempt, self.max_regeneration_attempts):
+            try:
                 log_activity("Training", f"Structure-aware attempt {attempt + 1} for feedback {feedback_id}")
                 
+                # Cached under the prompt this attempt sends
+                attempt_prompt = prompt or self._create_structure_aware_prompt(feedback, attempt)
+                cache_key = self._generation_cache_key(attempt_prompt, feedback_id)
+                if self._cache_readable(feedback, attempt):
+                    cached = self._cached_generation(cache_key, feedback_id, attempt)
+                    if cached is not None:
+                        return cached
+                
                 # Generate YAML using Gemini with structure analysis
-                yaml_content = self._generate_structure_matching_yaml(feedback, attempt)
+                calls += 1
+                yaml_content = self._generate_structure_matching_yaml(feedback, attempt, attempt_prompt)
                 
                 if not yaml_content:
                     log_activity("Training", f"❌ Failed to generate YAML for feedback {feedback_id}, attempt {attempt + 1}")
@@ -245,45 +400,123 @@ class TrainingManager:
                     log_activity("Training", f"❌ Structure validation failed for feedback {feedback_id}, attempt {attempt + 1}: {validation_result['reason']}")
                     continue
                 
-                # Merge with existing files using structure-aware method
-                merge_result = self._merge_yaml_structure_aware(validation_result["parsed_data"], feedback_id)
+                self._cache_generation(cache_key, yaml_content, validation_result["parsed_data"])
+                return {"parsed_data": validation_result["parsed_data"], "attempt": attempt, "calls": calls, "cache_key": cache_key}
+            
+            except Exception as e:
+                log_activity("Error", f"Structure-aware generation failed for feedback {feedback_id}, attempt {attempt + 1}: {str(e)}")
+        
+        return {"parsed_data": None, "attempt": self.max_regeneration_attempts, "calls": calls, "cache_key": cache_key}
+    
+    def _prepare_generation_batch(self, items: List[Dict]) -> Dict[str, Any]:
+        """Prompts and cache hits for one batch, built on the dispatching thread so they do not depend on worker timing"""
+        prompts = [self._create_structure_aware_prompt(item, 0) for item in items]
+        cache_keys = [self._generation_cache_key(prompt, item.get("id")) for prompt, item in zip(prompts, items)]
+        results = [self._cached_generation(cache_key, item.get("id"), 0) if self._cache_readable(item, 0) else None
+                   for cache_key, item in zip(cache_keys, items)]
+        
+        # Items generated before need no place in the prompt
+        pending = [index for index, result in enumerate(results) if result is None]
+        batched_prompt = self._create_batched_prompt([items[index] for index in pending]) if len(pending) > 1 else None
+        return {"items": items, "prompts": prompts, "cache_keys": cache_keys, "results": results,
+                "pending": pending, "batched_prompt": batched_prompt}
+    
+    def _generate_validated_batch(self, prepared: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Generate YAML for several feedback items from one prompt; items whose block fails validation fall back to their own prompts"""
+        items, prompts, cache_keys, pending = prepared["items"], prepared["prompts"], prepared["cache_keys"], prepared["pending"]
+        results = list(prepared["results"])
+        if prepared["batched_prompt"] is None:
+            for index in pending:
+                results[index] = self._generate_validated_yaml(items[index], prompt=prompts[index])
+            return results
+        
+        try:
+            log_activity("Training", f"Generating structure-matching YAML for {len(pending)} feedback items in one prompt")
+            blocks = self._split_batched_response(self._call_gemini(prepared["batched_prompt"], len(pending)) or "")
+            
+            for number, index in enumerate(pending, start=1):
+                feedback_id = items[index].get("id")
+                if number not in blocks:
+                    log_activity("Training", f"❌ Batched response has no block for feedback {feedback_id}")
+                    continue
                 
-                if merge_result:
-                    log_activity("Training", f"✅ Successfully processed feedback {feedback_id} on attempt {attempt + 1}")
-                    return True
+                validation_result = self._validate_yaml_against_structure(blocks[number], feedback_id)
+                if validation_result["valid"]:
+                    # Cached under the item's own request, so a later single-item retry finds it too
+                    self._cache_generation(cache_keys[index], blocks[number], validation_result["parsed_data"])
+                    results[index] = {"parsed_data": validation_result["parsed_data"], "attempt": 0, "calls": 1,
+                                      "cache_key": cache_keys[index]}
                 else:
-                    log_activity("Training", f"❌ Merge failed for feedback {feedback_id}, attempt {attempt + 1}")
-                    continue
+                    log_activity("Training", f"❌ Structure validation failed for feedback {feedback_id} in batch: {validation_result['reason']}")
+        
+        except Exception as e:
+            log_activity("Error", f"Batched generation failed for {len(pending)} feedback items: {str(e)}")
+        
+        fallbacks = [index for index, result in enumerate(results) if result is None]
+        if fallbacks:
+            metrics.increment(f"training.batch.{len(pending)}.fallbacks", len(fallbacks))
+            log_activity("Training", f"Falling back to single-item prompts for {len(fallbacks)} of {len(pending)} batched feedback items")
+        for index in fallbacks:
+            # The batched prompt counts as the item's first attempt
+            generated = self._generate_validated_yaml(items[index], first_attempt=1, prompt=prompts[index])
+            generated["calls"] += 1
+            results[index] = generated
+        
+        return results
+    
+    @staticmethod
+    def _split_batched_response(text: str) -> Dict[int, str]:
+        """Item number -> its block of a batched response; a missing END marker ends the block at the next item"""
+        blocks = {}
+        for match in re.finditer(r"=== ITEM (\d+) ===(.*?)(?==== (?:END )?ITEM \d+ ===|\Z)", text, re.DOTALL):
+            content = match.group(2).strip()
+            if content:
+                blocks.setdefault(int(match.group(1)), content)
+        return blocks
+    
+    def _merge_generated_feedback(self, feedback: Dict, generated: Dict[str, Any], corpus: TrainingCorpus = None) -> Tuple[bool, int]:
+        """Merge validated YAML on the calling thread, regenerating after a failed merge; returns (success, Gemini calls)"""
+        feedback_id = feedback.get("id")
+        calls = generated["calls"]
+        try:
+            while generated["parsed_data"] is not None:
+                # Merge with existing files using structure-aware method
+                if self._merge_yaml_structure_aware(generated["parsed_data"], feedback_id, corpus):
+                    log_activity("Training", f"✅ Successfully processed feedback {feedback_id} on attempt {generated['attempt'] + 1}")
+                    return True, calls
+                
+                log_activity("Training", f"❌ Merge failed for feedback {feedback_id}, attempt {generated['attempt'] + 1}")
+                if self.generation_cache is not None:
+                    self.generation_cache.discard(generated.get("cache_key"))
+                if "intent_name" in feedback:
+                    # The reserved name may have been what failed, so the next attempt asks for a fresh one
+                    feedback["intent_name"] = self._reserve_intent_name(feedback)
+                generated = self._generate_validated_yaml(feedback, generated["attempt"] + 1)
+                calls += generated["calls"]
             
             log_activity("Training", f"❌ All attempts failed for feedback {feedback_id}")
-            return False
+            return False, calls
             
         except Exception as e:
-            log_activity("Error", f"Structure-aware processing failed for feedback {feedback.get('id')}: {str(e)}")
-            return False
+            log_activity("Error", f"Structure-aware processing failed for feedback {feedback_id}: {str(e)}")
+            return False, calls
     
-    def _generate_structure_matching_yaml(self, feedback: Dict, attempt: int) -> Optional[str]:
+    def _generate_structure_matching_yaml(self, feedback: Dict, attempt: int, prompt: str = None) -> Optional[str]:
         """Generate YAML using Gemini that perfectly matches existing structure"""
         try:
             feedback_id = feedback.get("id")
             log_activity("Training", f"Generating structure-matching YAML for feedback {feedback_id}")
             
             # Create enhanced prompt that includes structure analysis
-            prompt = self._create_structure_aware_prompt(feedback, attempt)
+            if prompt is None:
+                prompt = self._create_structure_aware_prompt(feedback, attempt)
             
             # Generate with Gemini
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.1,
-                    top_p=0.8,
-                    max_output_tokens=2000
-                )
-            )
-            
-            if response.text:
+            yaml_content = self._call_gemini(prompt)
+            
+            if yaml_content:
                 log_activity("Training", f"✅ Generated structure-matching YAML for feedback {feedback_id}")
-                return response.text
+                return yaml_content
             else:
                 log_activity("Training", f"❌ Empty response from Gemini for feedback {feedback_id}")
                 return None
@@ -292,40 +525,139 @@ class TrainingManager:
             log_activity("Error", f"Structure-matching YAML generation failed for feedback {feedback.get('id')}: {str(e)}")
             return None
     
+    def _call_gemini(self, prompt: str, batch_size: int = 1) -> Optional[str]:
+        """One Gemini call within the shared rate limit, with tokens and latency counted per prompt batch size"""
+        waited = self.gemini_limiter.acquire()
+        if waited:
+            metrics.observe("training.gemini_limiter_wait", waited)
+        with self._stats_lock:
+            self.gemini_calls += 1
+        metrics.increment("training.gemini_calls")
+        
+        start_time = time.time()
+        response = self.model.generate_content(
+            prompt,
+            generation_config=genai.types.GenerationConfig(**self._generation_settings(batch_size))
+        )
+        elapsed = time.time() - start_time
+        
+        tokens = self._response_tokens(prompt, response)
+        with self._stats_lock:
+            self.gemini_tokens += tokens
+        metrics.increment("training.gemini_tokens", tokens)
+        metrics.increment(f"training.batch.{batch_size}.calls")
+        metrics.increment(f"training.batch.{batch_size}.items", batch_size)
+        metrics.increment(f"training.batch.{batch_size}.tokens", tokens)
+        metrics.increment(f"training.batch.{batch_size}.seconds", elapsed)
+        return response.text
+    
+    @staticmethod
+    def _generation_settings(batch_size: int = 1) -> Dict[str, Any]:
+        return {"temperature": 0.1, "top_p": 0.8, "max_output_tokens": 2000 * batch_size}
+    
+    def _generation_cache_key(self, prompt: str, feedback_id: str) -> Optional[str]:
+        """Address of one single-item generation request"""
+        if self.generation_cache is None:
+            return None
+        try:
+            return self.generation_cache.key(prompt, Config.GEMINI_MODEL, self._generation_settings())
+        except Exception as e:
+            log_activity("Error", f"Generation cache key failed for feedback {feedback_id}: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _cache_readable(feedback: Dict, attempt: int) -> bool:
+        """Only a first attempt at feedback that never failed or was rejected may reuse earlier output"""
+        return attempt == 0 and not feedback.get("retry_count", 0) and not feedback.get("last_retry_timestamp")
+    
+    def _cached_generation(self, cache_key: Optional[str], feedback_id: str, attempt: int) -> Optional[Dict[str, Any]]:
+        """Validated YAML from an earlier identical request, without calling Gemini"""
+        if self.generation_cache is None or cache_key is None:
+            return None
+        
+        entry = self.generation_cache.get(cache_key)
+        if entry is None or not entry.get("parsed_data"):
+            return None
+        
+        metrics.increment("training.generation_cache.hits")
+        log_activity("Training", f"♻️ Reusing cached validated YAML for feedback {feedback_id}")
+        return {"parsed_data": entry["parsed_data"], "attempt": attempt, "calls": 0, "cache_key": cache_key}
+    
+    def _cache_generation(self, cache_key: Optional[str], yaml_content: str, parsed_data: Dict[str, Any]) -> None:
+        if self.generation_cache is not None and cache_key is not None:
+            self.generation_cache.put(cache_key, yaml_content, parsed_data)
+    
+    @staticmethod
+    def _response_tokens(prompt: str, response: Any) -> int:
+        """Tokens billed for one call, estimated from text length when usage is not reported"""
+        try:
+            usage = getattr(response, "usage_metadata", None)
+            if usage is not None and getattr(usage, "total_token_count", 0):
+                return int(usage.total_token_count)
+            return (len(prompt) + len(response.text or "")) // 4
+        except Exception:
+            return len(prompt) // 4
+    
     def _create_structure_aware_prompt(self, feedback: Dict, attempt: int) -> str:
         """Create prompt that ensures perfect structure matching"""
         try:
-            user_query = feedback.get('user_query', 'N/A')
-            bot_response = feedback.get('bot_response', 'N/A')
-            feedback_type = feedback.get('feedback_type', 'unknown')
-            issue_description = feedback.get('issue_description', 'N/A')
-            expected_answer = feedback.get('expected_answer', 'N/A')
-            
-            # Create unique intent name
-            intent_name = self._create_structure_aware_intent_name(user_query, feedback.get('id'))
-            response_name = f"utter_{intent_name}"
-            
-            # Analyze feedback to create better response
-            if feedback_type == "negative" and expected_answer and expected_answer.strip() != "N/A":
-                response_text = f"I can help you with that. {expected_answer.strip()}"
-            elif issue_description and issue_description.strip() != "N/A":
-                response_text = f"I understand your concern about {issue_description.strip()}. Let me help you resolve this IT issue."
-            else:
-                response_text = "I can assist you with that IT support request. Let me help you resolve this issue."
-            
-            # Create query variations
-            query_variations = self._create_intelligent_variations(user_query)
+            analysis, structure = self._prompt_item_parts(feedback)
             
             prompt = f"""You are an expert Rasa YAML generator. Generate training data that EXACTLY matches the existing structure format.
 
 FEEDBACK ANALYSIS:
-- User Query: "{user_query}"
-- Bot Response: "{bot_response}"
-- Feedback Type: {feedback_type}
-- Issue: "{issue_description}"
-- Expected Answer: "{expected_answer}"
+{analysis}
+
+{self._prompt_structure_requirements()}
+
+GENERATE EXACTLY THIS STRUCTURE:
+
+{structure}
+
+CRITICAL: 
+- Use EXACTLY the format shown above
+- Use pipe notation |- for examples
+- Use single quotes for version
+- Ensure response text addresses the user's actual problem
+- Intent name must be unique and descriptive
+"""
+            
+            return prompt
+            
+        except Exception as e:
+            log_activity("Error", f"Structure-aware prompt creation failed: {str(e)}")
+            return self._create_fallback_prompt(feedback)
+    
+    def _create_batched_prompt(self, items: List[Dict]) -> str:
+        """One prompt for several feedback items, each answered between its own item markers"""
+        parts = [self._prompt_item_parts(item) for item in items]
+        analysis_text = "\n\n".join(f"ITEM {number}:\n{analysis}" for number, (analysis, _) in enumerate(parts, start=1))
+        structure_text = "\n\n".join(f"=== ITEM {number} ===\n{structure}\n=== END ITEM {number} ==="
+                                     for number, (_, structure) in enumerate(parts, start=1))
+        
+        return f"""You are an expert Rasa YAML generator. Generate training data for {len(items)} feedback items that EXACTLY matches the existing structure format.
+
+FEEDBACK ANALYSIS:
+{analysis_text}
 
-STRUCTURE REQUIREMENTS:
+{self._prompt_structure_requirements()}
+
+GENERATE EXACTLY THIS STRUCTURE FOR EVERY ITEM:
+
+{structure_text}
+
+CRITICAL: 
+- Use EXACTLY the format shown above
+- Keep every === ITEM n === and === END ITEM n === line so each item can be read on its own
+- Use pipe notation |- for examples
+- Use single quotes for version
+- Ensure each response text addresses that item's actual problem
+- Intent names must be unique and descriptive
+"""
+    
+    def _prompt_structure_requirements(self) -> str:
+        """Format rules shared by single and batched prompts"""
+        return f"""STRUCTURE REQUIREMENTS:
 - NLU: Use pipe notation (|) for examples, EXACTLY like existing format
 - Domain: Follow existing response format with "- text:" structure
 - Stories: Simple steps format with intent and action
@@ -334,19 +666,51 @@ STRUCTURE REQUIREMENTS:
 EXISTING STRUCTURE ANALYSIS:
 - Total existing intents: {len(self.existing_structure['existing_intents'])}
 - Intent naming pattern: ask_[topic]_[detail]
-- Response naming pattern: utter_[intent_name]
-
-GENERATE EXACTLY THIS STRUCTURE:
-
-=== NLU_DATA ===
+- Response naming pattern: utter_[intent_name]"""
+    
+    def _prompt_item_parts(self, feedback: Dict) -> Tuple[str, str]:
+        """Feedback analysis lines and the expected YAML sections for one feedback item"""
+        user_query = feedback.get('user_query', 'N/A')
+        bot_response = feedback.get('bot_response', 'N/A')
+        feedback_type = feedback.get('feedback_type', 'unknown')
+        issue_description = feedback.get('issue_description', 'N/A')
+        expected_answer = feedback.get('expected_answer', 'N/A')
+        
+        # Create unique intent name, unless one was reserved when the feedback was dispatched
+        intent_name = feedback.get('intent_name') or self._create_structure_aware_intent_name(user_query, feedback.get('id'))
+        response_name = f"utter_{intent_name}"
+        
+        # Analyze feedback to create better response
+        if feedback_type == "negative" and expected_answer and expected_answer.strip() != "N/A":
+            response_text = f"I can help you with that. {expected_answer.strip()}"
+        elif issue_description and issue_description.strip() != "N/A":
+            response_text = f"I understand your concern about {issue_description.strip()}. Let me help you resolve this IT issue."
+        else:
+            response_text = "I can assist you with that IT support request. Let me help you resolve this issue."
+        
+        # Create query variations
+        query_variations = self._create_intelligent_variations(user_query)
+        
+        # Phrasings users actually sent come first, then the templated variations
+        examples = []
+        for example in (feedback.get('cluster_queries') or [user_query]) + query_variations[:3]:
+            if example not in examples:
+                examples.append(example)
+        examples_text = "\n".join(f"    - {example}" for example in examples)
+        cluster_note = f"\n- Reported {feedback['cluster_size']} times with the phrasings listed in the NLU examples" if feedback.get('cluster_size') else ""
+        
+        analysis = f"""- User Query: "{user_query}"
+- Bot Response: "{bot_response}"
+- Feedback Type: {feedback_type}
+- Issue: "{issue_description}"
+- Expected Answer: "{expected_answer}"{cluster_note}"""
+        
+        structure = f"""=== NLU_DATA ===
 version: '3.1'
 nlu:
 - intent: {intent_name}
   examples: |-
-    - {user_query}
-    - {query_variations[0]}
-    - {query_variations[1]}
-    - {query_variations[2]}
+{examples_text}
 
 === DOMAIN_DATA ===
 version: '3.1'
@@ -370,21 +734,9 @@ rules:
 - rule: {intent_name}_rule
   steps:
   - intent: {intent_name}
-  - action: {response_name}
-
-CRITICAL: 
-- Use EXACTLY the format shown above
-- Use pipe notation |- for examples
-- Use single quotes for version
-- Ensure response text addresses the user's actual problem
-- Intent name must be unique and descriptive
-"""
-            
-            return prompt
-            
-        except Exception as e:
-            log_activity("Error", f"Structure-aware prompt creation failed: {str(e)}")
-            return self._create_fallback_prompt(feedback)
+  - action: {response_name}"""
+        
+        return analysis, structure
     
     def _create_structure_aware_intent_name(self, user_query: str, feedback_id: str) -> str:
         """Create intent name that follows existing naming pattern"""
@@ -413,7 +765,7 @@ CRITICAL:
             # Ensure uniqueness
             intent_name = base_name
             counter = 1
-            while intent_name in self.existing_structure['existing_intents']:
+            while intent_name in self.existing_structure['existing_intents'] or intent_name in self._reserved_intents:
                 intent_name = f"{base_name}_{counter}"
                 counter += 1
             
@@ -423,6 +775,12 @@ CRITICAL:
             log_activity("Error", f"Intent name creation failed: {str(e)}")
             return f"ask_support_{feedback_id}"
     
+    def _reserve_intent_name(self, feedback: Dict) -> str:
+        """Free intent name held for this feedback until the run ends, so feedback generated side by side never collides"""
+        intent_name = self._create_structure_aware_intent_name(feedback.get('user_query', 'N/A'), feedback.get('id'))
+        self._reserved_intents.add(intent_name)
+        return intent_name
+    
     def _create_intelligent_variations(self, user_query: str) -> List[str]:
         """Create intelligent variations of user query"""
         try:
@@ -561,35 +919,25 @@ CRITICAL:
             log_activity("Error", f"Enhanced structure validation failed for {section_name}: {str(e)}")
             return False
     
-    def _merge_yaml_structure_aware(self, parsed_sections: Dict[str, Any], feedback_id: str) -> bool:
-        """Structure-aware YAML merging"""
+    def _merge_yaml_structure_aware(self, parsed_sections: Dict[str, Any], feedback_id: str, corpus: TrainingCorpus = None) -> bool:
+        """Structure-aware YAML merging into the run's corpus; without one, the files are loaded and written for this item alone"""
         try:
             log_activity("Training", f"Starting structure-aware merge for feedback {feedback_id}")
             
-            # Create backup
-            self._create_backup()
+            standalone = corpus is None
+            if standalone:
+                corpus = TrainingCorpus()
             
-            # Define file paths
-            file_paths = {
-                "nlu": os.path.join(Config.RASA_PROJECT_PATH, "data", "nlu.yml"),
-                "domain": os.path.join(Config.RASA_PROJECT_PATH, "domain.yml"),
-                "stories": os.path.join(Config.RASA_PROJECT_PATH, "data", "stories.yml"),
-                "rules": os.path.join(Config.RASA_PROJECT_PATH, "data", "rules.yml")
-            }
+            if not corpus.merge(parsed_sections, feedback_id):
+                log_activity("Training", f"❌ Merge failed for feedback {feedback_id}, changes rolled back")
+                # A regeneration has to pick names that are actually free
+                self._sync_existing_structure(corpus)
+                return False
             
-            # Merge each section
-            for section_name, new_data in parsed_sections.items():
-                file_path = file_paths[section_name]
-                
-                if not self._merge_single_section_structure_aware(section_name, file_path, new_data, feedback_id):
-                    log_activity("Training", f"❌ Failed to merge {section_name} for feedback {feedback_id}")
-                    self._restore_backup()
-                    return False
+            # Later prompts in this run must not reuse the names just merged
+            self._sync_existing_structure(corpus)
             
-            # Validate all files after merge
-            if not self._validate_all_files_final():
-                log_activity("Training", f"❌ Post-merge validation failed for feedback {feedback_id}")
-                self._restore_backup()
+            if standalone and not self._save_corpus(corpus):
                 return False
             
             log_activity("Training", f"✅ Structure-aware merge completed for feedback {feedback_id}")
@@ -597,192 +945,38 @@ CRITICAL:
             
         except Exception as e:
             log_activity("Error", f"Structure-aware merge failed for feedback {feedback_id}: {str(e)}")
-            self._restore_backup()
-            return False
-    
-    def _merge_single_section_structure_aware(self, section_name: str, file_path: str, new_data: Dict, feedback_id: str) -> bool:
-        """Structure-aware single section merge"""
-        try:
-            log_activity("Training", f"Structure-aware merging {section_name} for feedback {feedback_id}")
-            
-            # Load existing data
-            existing_data = self._load_existing_data_safe(file_path)
-            
-            # Merge based on section type with structure awareness
-            if section_name == "nlu":
-                merged_data = self._merge_nlu_structure_aware(existing_data, new_data)
-            elif section_name == "domain":
-                merged_data = self._merge_domain_structure_aware(existing_data, new_data)
-            elif section_name == "stories":
-                merged_data = self._merge_stories_structure_aware(existing_data, new_data)
-            elif section_name == "rules":
-                merged_data = self._merge_rules_structure_aware(existing_data, new_data)
-            else:
-                log_activity("Training", f"❌ Unknown section type: {section_name}")
-                return False
-            
-            if not merged_data:
-                log_activity("Training", f"❌ Merge operation returned empty data for {section_name}")
-                return False
-            
-            # Save merged data with preserved formatting
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    yaml.dump(merged_data, f, default_flow_style=False, sort_keys=False, 
-                             allow_unicode=True, width=1000, indent=2)
-                
-                log_activity("Training", f"✅ Successfully saved merged {section_name} for feedback {feedback_id}")
-                return True
-                
-            except Exception as e:
-                log_activity("Training", f"❌ Failed to save {section_name} for feedback {feedback_id}: {str(e)}")
-                return False
-            
-        except Exception as e:
-            log_activity("Error", f"Structure-aware section merge failed for {section_name}, feedback {feedback_id}: {str(e)}")
             return False
     
-    def _merge_nlu_structure_aware(self, existing: Dict, new: Dict) -> Optional[Dict]:
-        """Structure-aware NLU merging"""
-        try:
-            merged = copy.deepcopy(existing) if existing else {"version": "3.1"}
-            
-            if "nlu" not in merged:
-                merged["nlu"] = []
-            
-            if not isinstance(merged["nlu"], list):
-                merged["nlu"] = []
-            
-            # Get existing intents
-            existing_intents = set()
-            for item in merged["nlu"]:
-                if isinstance(item, dict) and "intent" in item:
-                    existing_intents.add(item["intent"])
-            
-            # Add new intents
-            if "nlu" in new and isinstance(new["nlu"], list):
-                for item in new["nlu"]:
-                    if isinstance(item, dict) and "intent" in item:
-                        intent_name = item["intent"]
-                        if intent_name not in existing_intents:
-                            merged["nlu"].append(item)
-                            existing_intents.add(intent_name)
-                            log_activity("Training", f"✅ Added NLU intent: {intent_name}")
-            
-            return merged
-            
-        except Exception as e:
-            log_activity("Error", f"Structure-aware NLU merge failed: {str(e)}")
-            return None
+    def _sync_existing_structure(self, corpus: TrainingCorpus) -> None:
+        """Take the known intent, response and action names from the corpus merges go into"""
+        responses = corpus.data["domain"].get("responses")
+        self.existing_structure = dict(
+            self.existing_structure,
+            existing_intents=sorted(corpus.names["nlu"] | corpus.domain_intents),
+            existing_responses=sorted(responses) if isinstance(responses, dict) else [],
+            existing_actions=sorted(corpus.actions)
+        )
     
-    def _merge_domain_structure_aware(self, existing: Dict, new: Dict) -> Optional[Dict]:
-        """Structure-aware domain merging"""
-        try:
-            merged = copy.deepcopy(existing) if existing else {"version": "3.1"}
-            
-            # Merge intents
-            if "intents" in new and isinstance(new["intents"], list):
-                if "intents" not in merged:
-                    merged["intents"] = []
-                
-                if not isinstance(merged["intents"], list):
-                    merged["intents"] = []
-                
-                for intent in new["intents"]:
-                    if intent not in merged["intents"]:
-                        merged["intents"].append(intent)
-                        log_activity("Training", f"✅ Added domain intent: {intent}")
-            
-            # Merge responses
-            if "responses" in new and isinstance(new["responses"], dict):
-                if "responses" not in merged:
-                    merged["responses"] = {}
-                
-                if not isinstance(merged["responses"], dict):
-                    merged["responses"] = {}
-                
-                for response_key, response_value in new["responses"].items():
-                    if response_key not in merged["responses"]:
-                        merged["responses"][response_key] = response_value
-                        log_activity("Training", f"✅ Added domain response: {response_key}")
-                        
-                        # Also add to actions if not present
-                        if "actions" not in merged:
-                            merged["actions"] = []
-                        if response_key not in merged["actions"]:
-                            merged["actions"].append(response_key)
-            
-            return merged
-            
-        except Exception as e:
-            log_activity("Error", f"Structure-aware domain merge failed: {str(e)}")
-            return None
-    
-    def _merge_stories_structure_aware(self, existing: Dict, new: Dict) -> Optional[Dict]:
-        """Structure-aware stories merging"""
-        try:
-            merged = copy.deepcopy(existing) if existing else {"version": "3.1"}
-            
-            if "stories" not in merged:
-                merged["stories"] = []
-            
-            if not isinstance(merged["stories"], list):
-                merged["stories"] = []
-            
-            # Get existing story names
-            existing_story_names = set()
-            for story in merged["stories"]:
-                if isinstance(story, dict) and "story" in story:
-                    existing_story_names.add(story["story"])
-            
-            # Add new stories
-            if "stories" in new and isinstance(new["stories"], list):
-                for story in new["stories"]:
-                    if isinstance(story, dict) and "story" in story:
-                        story_name = story["story"]
-                        if story_name not in existing_story_names:
-                            merged["stories"].append(story)
-                            existing_story_names.add(story_name)
-                            log_activity("Training", f"✅ Added story: {story_name}")
-            
-            return merged
-            
-        except Exception as e:
-            log_activity("Error", f"Structure-aware stories merge failed: {str(e)}")
-            return None
-    
-    def _merge_rules_structure_aware(self, existing: Dict, new: Dict) -> Optional[Dict]:
-        """Structure-aware rules merging"""
+    def _save_corpus(self, corpus: TrainingCorpus) -> bool:
+        """Write the corpus files that changed, restoring the backup if a write fails"""
+        if not corpus.dirty:
+            return True
+        
+        # Without a snapshot of the current files a failed write could not be undone
+        snapshot = self._create_backup()
+        if snapshot is None:
+            log_activity("Error", "Not writing training data without a backup to restore")
+            return False
+        
         try:
-            merged = copy.deepcopy(existing) if existing else {"version": "3.1"}
-            
-            if "rules" not in merged:
-                merged["rules"] = []
-            
-            if not isinstance(merged["rules"], list):
-                merged["rules"] = []
-            
-            # Get existing rule names
-            existing_rule_names = set()
-            for rule in merged["rules"]:
-                if isinstance(rule, dict) and "rule" in rule:
-                    existing_rule_names.add(rule["rule"])
-            
-            # Add new rules
-            if "rules" in new and isinstance(new["rules"], list):
-                for rule in new["rules"]:
-                    if isinstance(rule, dict) and "rule" in rule:
-                        rule_name = rule["rule"]
-                        if rule_name not in existing_rule_names:
-                            merged["rules"].append(rule)
-                            existing_rule_names.add(rule_name)
-                            log_activity("Training", f"✅ Added rule: {rule_name}")
-            
-            return merged
+            written = corpus.save()
+            log_activity("Training", f"✅ Wrote {len(written)} changed training files: {', '.join(os.path.basename(path) for path in written)}")
+            return True
             
         except Exception as e:
-            log_activity("Error", f"Structure-aware rules merge failed: {str(e)}")
-            return None
+            log_activity("Error", f"Failed to write training data: {str(e)}")
+            self._restore_backup(snapshot)
+            return False
     
     def _auto_train_model(self) -> str:
         """Automatically train model when threshold reached"""
@@ -904,18 +1098,6 @@ CRITICAL:
         except Exception as e:
             log_activity("Error", f"Failed to move processed to removable: {str(e)}")
     
-    def _load_existing_data_safe(self, file_path: str) -> Dict:
-        """Safely load existing data"""
-        try:
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
-                    return data if data else {}
-            return {}
-        except Exception as e:
-            log_activity("Error", f"Failed to load {file_path}: {str(e)}")
-            return {}
-    
     def _validate_all_files_final(self) -> bool:
         """Final validation of all files"""
         try:
@@ -951,59 +1133,22 @@ CRITICAL:
             log_activity("Error", f"Final validation failed: {str(e)}")
             return False
     
-    def _create_backup(self) -> None:
-        """Create backup of existing files"""
+    def _create_backup(self) -> Optional[str]:
+        """Snapshot data/ and domain.yml once before a batch of changes is written"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_dir = os.path.join(Config.RASA_PROJECT_PATH, f"backup_{timestamp}")
-            
-            if os.path.exists(backup_dir):
-                shutil.rmtree(backup_dir)
-            
-            os.makedirs(backup_dir, exist_ok=True)
-            
-            # Backup data directory
-            data_dir = os.path.join(Config.RASA_PROJECT_PATH, "data")
-            if os.path.exists(data_dir):
-                shutil.copytree(data_dir, os.path.join(backup_dir, "data"))
-            
-            # Backup domain file
-            domain_file = os.path.join(Config.RASA_PROJECT_PATH, "domain.yml")
-            if os.path.exists(domain_file):
-                shutil.copy2(domain_file, os.path.join(backup_dir, "domain.yml"))
-            
-            log_activity("Training", f"✅ Backup created: {backup_dir}")
+            snapshot = self.snapshots.create()
+            log_activity("Training", f"✅ Backup created: {snapshot}")
+            return snapshot
             
         except Exception as e:
             log_activity("Error", f"Failed to create backup: {str(e)}")
+            return None
     
-    def _restore_backup(self) -> None:
-        """Restore from most recent backup"""
+    def _restore_backup(self, snapshot: str) -> None:
+        """Restore the backup taken for this write, rewriting only the files that differ"""
         try:
-            backup_dirs = [d for d in os.listdir(Config.RASA_PROJECT_PATH) if d.startswith("backup_")]
-            if not backup_dirs:
-                return
-            
-            latest_backup = max(backup_dirs)
-            backup_dir = os.path.join(Config.RASA_PROJECT_PATH, latest_backup)
-            
-            # Restore data directory
-            data_dir = os.path.join(Config.RASA_PROJECT_PATH, "data")
-            backup_data_dir = os.path.join(backup_dir, "data")
-            
-            if os.path.exists(backup_data_dir):
-                if os.path.exists(data_dir):
-                    shutil.rmtree(data_dir)
-                shutil.copytree(backup_data_dir, data_dir)
-            
-            # Restore domain file
-            domain_file = os.path.join(Config.RASA_PROJECT_PATH, "domain.yml")
-            backup_domain_file = os.path.join(backup_dir, "domain.yml")
-            
-            if os.path.exists(backup_domain_file):
-                shutil.copy2(backup_domain_file, domain_file)
-            
-            log_activity("Training", f"✅ Restored from backup: {latest_backup}")
+            changed = self.snapshots.restore(snapshot)
+            log_activity("Training", f"✅ Restored from backup: {snapshot} ({len(changed)} files)")
             
         except Exception as e:
             log_activity("Error", f"Failed to restore backup: {str(e)}")
@@ -1062,20 +1207,20 @@ CRITICAL:
     def _update_feedback_retry_counts(self, original_feedback: List[Dict], processed: List[Dict], rejected: List[Dict]) -> None:
         """Update feedback retry counts"""
         try:
-            current_feedback = safe_load_json(Config.FEEDBACK_DATA_FILE, [])
+            from src.feedback_store import get_feedback_store
             
             processed_ids = {str(f["id"]) for f in processed}
             rejected_ids = {str(f["id"]) for f in rejected}
             
-            for feedback in current_feedback:
-                if str(feedback["id"]) not in processed_ids and str(feedback["id"]) not in rejected_ids:
-                    for orig_feedback in original_feedback:
-                        if str(orig_feedback["id"]) == str(feedback["id"]):
-                            feedback["retry_count"] = orig_feedback.get("retry_count", 0)
-                            feedback["last_retry_timestamp"] = orig_feedback.get("last_retry_timestamp", "")
-                            break
-            
-            safe_save_json(Config.FEEDBACK_DATA_FILE, current_feedback)
+            # Batched patch of the retried records only
+            get_feedback_store().update_many({
+                str(orig_feedback["id"]): {
+                    "retry_count": orig_feedback.get("retry_count", 0),
+                    "last_retry_timestamp": orig_feedback.get("last_retry_timestamp", "")
+                }
+                for orig_feedback in original_feedback
+                if str(orig_feedback["id"]) not in processed_ids and str(orig_feedback["id"]) not in rejected_ids
+            })
             log_activity("Training", "✅ Updated feedback retry counts")
             
         except Exception as e:
@@ -1091,35 +1236,20 @@ CRITICAL:
             return 0
     
     def _restart_rasa_server(self) -> bool:
-        """Restart Rasa server"""
+        """Put the Rasa workers on the new model; an embedded agent reloads it by itself"""
         try:
-            log_activity("Training", "Restarting Rasa server")
-            
-            # Kill existing processes
-            try:
-                if os.name == 'nt':  # Windows
-                    subprocess.run(["taskkill", "/f", "/im", "rasa.exe"], capture_output=True)
-                else:  # Unix-like
-                    subprocess.run(["pkill", "-f", "rasa"], capture_output=True)
-            except Exception as e:
-                log_activity("Training", f"Process kill attempt: {str(e)}")
-            
-            time.sleep(5)
+            pool = active_rasa_pool()
+            if pool is None and Config.RASA_EMBEDDED_MODE:
+                log_activity("Training", "Embedded Rasa agent will load the new model, no server restart needed")
+                return True
             
-            # Start new server
-            try:
-                subprocess.Popen([
-                    "rasa", "run", "--enable-api", "--cors", "*", "--port", "5005"
-                ], cwd=Config.RASA_PROJECT_PATH)
-                
-                time.sleep(10)
-                
+            log_activity("Training", "Restarting Rasa server")
+            if (pool or get_rasa_pool()).restart():
                 log_activity("Training", "✅ Rasa server restarted")
                 return True
-                
-            except Exception as e:
-                log_activity("Error", f"Failed to start server: {str(e)}")
-                return False
+            
+            log_activity("Error", f"Rasa workers not ready within {Config.RASA_WORKER_STARTUP_TIMEOUT}s of the restart")
+            return False
             
         except Exception as e:
             log_activity("Error", f"Server restart failed: {str(e)}")
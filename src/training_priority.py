@@ -0,0 +1,86 @@
+# Impact ordering of the training backlog
+import heapq
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+from config.config import Config
+from src.feedback_clustering import FeedbackCluster, char_ngrams, jaccard
+from src.utils import normalize_query
+
+class DemandIndex:
+    """How often each distinct question was asked in chat history and how often it fell back to the LLM"""
+    
+    def __init__(self, chat_history: List[Dict[str, Any]], n: int = None):
+        self.n = n or Config.FEEDBACK_CLUSTER_NGRAM
+        self.asked = Counter()
+        self.fallbacks = Counter()
+        for turn in chat_history:
+            query = normalize_query(turn.get("user_query", ""))
+            if not query:
+                continue
+            self.asked[query] += 1
+            if turn.get("model_source") in Config.TRAINING_PRIORITY_FALLBACK_SOURCES:
+                self.fallbacks[query] += 1
+        
+        self.queries = list(self.asked)
+        self.ngrams = [char_ngrams(query, self.n) for query in self.queries]
+        # n-gram -> distinct queries containing it
+        self.postings = defaultdict(list)
+        for index, grams in enumerate(self.ngrams):
+            for gram in grams:
+                self.postings[gram].append(index)
+    
+    def demand(self, ngrams: set, threshold: float = None) -> Dict[str, int]:
+        """Chat turns (and LLM fallbacks among them) similar to a question"""
+        threshold = Config.FEEDBACK_CLUSTER_SIMILARITY if threshold is None else threshold
+        candidates = set()
+        for gram in ngrams:
+            candidates.update(self.postings.get(gram, ()))
+        
+        asked = fallbacks = 0
+        for index in candidates:
+            if jaccard(ngrams, self.ngrams[index]) >= threshold:
+                query = self.queries[index]
+                asked += self.asked[query]
+                fallbacks += self.fallbacks[query]
+        return {"asked": asked, "fallbacks": fallbacks}
+
+def score_cluster(cluster: FeedbackCluster, demand_index: DemandIndex) -> Dict[str, Any]:
+    """Impact of fixing one question: how often it is asked, falls back, and draws complaints"""
+    ngrams = cluster.ngrams or char_ngrams(cluster.representative.get("user_query", ""), demand_index.n)
+    demand = demand_index.demand(ngrams)
+    negative = sum(1 for feedback in cluster.members if feedback.get("feedback_type") == "negative")
+    score = (demand["asked"] * Config.TRAINING_PRIORITY_ASKED_WEIGHT
+             + demand["fallbacks"] * Config.TRAINING_PRIORITY_FALLBACK_WEIGHT
+             + negative * Config.TRAINING_PRIORITY_NEGATIVE_WEIGHT)
+    return {"score": score, "asked": demand["asked"], "fallbacks": demand["fallbacks"], "negative": negative}
+
+class TrainingBacklog:
+    """Max-heap of feedback clusters by impact score; ties keep backlog order"""
+    
+    def __init__(self, clusters: List[FeedbackCluster], chat_history: Optional[List[Dict[str, Any]]] = None):
+        # Without chat history every cluster scores 0 and the backlog keeps its order
+        demand_index = DemandIndex(chat_history) if chat_history is not None else None
+        self._heap = []
+        for sequence, cluster in enumerate(clusters):
+            if demand_index is None:
+                impact = {"score": 0, "asked": 0, "fallbacks": 0, "negative": 0}
+            else:
+                impact = score_cluster(cluster, demand_index)
+            heapq.heappush(self._heap, (-impact["score"], sequence, cluster, impact))
+    
+    def pop(self) -> Optional[tuple]:
+        """Highest-impact cluster and its score breakdown, or None when empty"""
+        if not self._heap:
+            return None
+        _, _, cluster, impact = heapq.heappop(self._heap)
+        return cluster, impact
+    
+    def drain(self) -> List[FeedbackCluster]:
+        """Everything left, highest impact first"""
+        remaining = []
+        while self._heap:
+            remaining.append(self.pop()[0])
+        return remaining
+    
+    def __len__(self) -> int:
+        return len(self._heap)
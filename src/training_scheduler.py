@@ -0,0 +1,172 @@
+# Process-wide scheduler for automatic training runs
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+from config.config import Config
+from src.utils import log_activity
+
+class TrainingScheduler:
+    """Debounces training triggers and keeps exactly one training job in flight"""
+    
+    def __init__(self, debounce_seconds: float = None, max_delay_seconds: float = None):
+        self.debounce_seconds = Config.TRAINING_DEBOUNCE_SECONDS if debounce_seconds is None else debounce_seconds
+        self.max_delay_seconds = Config.TRAINING_DEBOUNCE_MAX_DELAY if max_delay_seconds is None else max_delay_seconds
+        self.state = "idle"
+        self.current_job = None
+        self.last_job = None
+        self.history = deque(maxlen=10)
+        self.pending_since = None
+        self.run_after = None
+        self.pending_reasons = []
+        self.rerun_requested = False
+        self.coalesced_requests = 0
+        self.total_runs = 0
+        self._manager = None
+        self._timer = None
+        self._lock = threading.RLock()
+    
+    def set_manager(self, training_manager) -> None:
+        """Share an existing TrainingManager instead of building one on first run"""
+        with self._lock:
+            self._manager = training_manager
+    
+    def _get_manager(self):
+        with self._lock:
+            if self._manager is None:
+                from src.training_manager import TrainingManager
+                self._manager = TrainingManager()
+            return self._manager
+    
+    def request_run(self, reason: str) -> str:
+        """Ask for a training run; bursts of requests collapse into one job"""
+        with self._lock:
+            if self.state == "running":
+                # Picked up by a single follow-up run once the current job finishes
+                self.rerun_requested = True
+                self.coalesced_requests += 1
+                self.pending_reasons.append(reason)
+                return "coalesced"
+            
+            now = time.time()
+            if self.state == "idle":
+                self.state = "pending"
+                self.pending_since = now
+                self.pending_reasons = []
+            else:
+                self.coalesced_requests += 1
+            self.pending_reasons.append(reason)
+            
+            # Trailing debounce, but never later than max_delay after the first trigger
+            self.run_after = min(now + self.debounce_seconds, self.pending_since + self.max_delay_seconds)
+            self._arm_timer(self.run_after - now)
+            return "scheduled"
+    
+    def _arm_timer(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(max(0.0, delay), self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _on_timer(self) -> None:
+        with self._lock:
+            if self.state != "pending" or time.time() < self.run_after - 0.01:
+                return
+            reason = "; ".join(self.pending_reasons[-3:]) or "scheduled"
+            self._start_job(reason)
+        self._run_job_loop()
+    
+    def run_now(self, reason: str = "manual", train_only: bool = False) -> str:
+        """Run on the caller's thread, or coalesce into a follow-up if a job is already running"""
+        with self._lock:
+            if self.state == "running" and train_only:
+                # Follow-ups process reviews, so a training request cannot wait in one
+                return "Training is already in progress; start manual training again once it finishes."
+            if self.state == "running":
+                self.rerun_requested = True
+                self.coalesced_requests += 1
+                self.pending_reasons.append(reason)
+                return "Training is already in progress; a follow-up run has been queued."
+            
+            if self._timer is not None:
+                self._timer.cancel()
+            pending_reasons = self.pending_reasons
+            if pending_reasons and not train_only:
+                reason = f"{reason}; {'; '.join(pending_reasons[-3:])}"
+            self._start_job(reason, train_only)
+            if pending_reasons and train_only:
+                # Reviews that were waiting on the debounce are processed right after training
+                self.pending_reasons = pending_reasons
+                self.rerun_requested = True
+        
+        return self._run_job_loop()
+    
+    def _start_job(self, reason: str, train_only: bool = False) -> None:
+        """Mark a job as in flight (called with the lock held)"""
+        self.state = "running"
+        self.pending_since = None
+        self.run_after = None
+        self.pending_reasons = []
+        self.current_job = {
+            "id": str(uuid.uuid4())[:8],
+            "reason": reason,
+            "train_only": train_only,
+            "started_at": datetime.now().isoformat()
+        }
+    
+    def _run_job_loop(self) -> Optional[str]:
+        """Run the current job, then one follow-up per batch of mid-run requests"""
+        first_result = None
+        while True:
+            job = self.current_job
+            start_time = time.time()
+            result, error = None, None
+            
+            try:
+                log_activity("Training", f"Training job {job['id']} started ({job['reason']})")
+                manager = self._get_manager()
+                result = manager.manual_training() if job["train_only"] else manager.process_reviews_manual()
+                log_activity("Training", f"Training job {job['id']} finished: {result}")
+            except Exception as e:
+                error = str(e)
+                log_activity("Error", f"Training job {job['id']} failed: {error}")
+            
+            if first_result is None:
+                first_result = result if error is None else f"Training failed: {error}"
+            
+            with self._lock:
+                finished = dict(job, finished_at=datetime.now().isoformat(),
+                                duration_seconds=round(time.time() - start_time, 2),
+                                result=result, error=error)
+                self.last_job = finished
+                self.history.appendleft(finished)
+                self.total_runs += 1
+                
+                if not self.rerun_requested:
+                    self.state = "idle"
+                    self.current_job = None
+                    return first_result
+                
+                self.rerun_requested = False
+                self._start_job("follow-up: " + ("; ".join(self.pending_reasons[-3:]) or "requested during run"))
+    
+    def get_state(self) -> Dict[str, Any]:
+        """Job state for the admin UI"""
+        with self._lock:
+            return {
+                "state": self.state,
+                "current_job": dict(self.current_job) if self.current_job else None,
+                "pending_since": datetime.fromtimestamp(self.pending_since).isoformat() if self.pending_since else None,
+                "run_in_seconds": max(0.0, self.run_after - time.time()) if self.run_after else None,
+                "follow_up_queued": self.rerun_requested,
+                "coalesced_requests": self.coalesced_requests,
+                "total_runs": self.total_runs,
+                "last_job": dict(self.last_job) if self.last_job else None,
+                "history": [dict(job) for job in self.history]
+            }
+
+# Shared scheduler for the process
+training_scheduler = TrainingScheduler()
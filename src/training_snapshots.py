@@ -0,0 +1,192 @@
+# Deduplicated snapshots of the Rasa training data
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from config.config import Config
+from src.utils import log_activity
+
+SNAPSHOT_PREFIX = "backup_"
+MANIFEST_FILE = "manifest.json"
+
+def _hash_file(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _copy_atomic(source: str, destination: str) -> None:
+    """Copy to a temp file beside the destination and rename it into place"""
+    directory = os.path.dirname(destination)
+    os.makedirs(directory, exist_ok=True)
+    temp_fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(destination) + "_", suffix=".tmp")
+    os.close(temp_fd)
+    try:
+        shutil.copy2(source, temp_path)
+        os.replace(temp_path, destination)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+class SnapshotStore:
+    """backup_<timestamp> copies of data/ and domain.yml whose files are hardlinks into a content-addressed object store"""
+    
+    def __init__(self, project_path: str = None, objects_dir: str = None, retention: int = None, max_age_days: float = None):
+        self.project_path = project_path or Config.RASA_PROJECT_PATH
+        self.objects_dir = objects_dir or os.path.join(self.project_path, Config.TRAINING_SNAPSHOT_OBJECTS_DIR)
+        self.retention = Config.TRAINING_SNAPSHOT_RETENTION if retention is None else retention
+        self.max_age_days = Config.TRAINING_SNAPSHOT_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    
+    def _live_files(self) -> Iterator[Tuple[str, str]]:
+        """(relative path, absolute path) of every file a snapshot covers"""
+        domain_file = os.path.join(self.project_path, "domain.yml")
+        if os.path.isfile(domain_file):
+            yield "domain.yml", domain_file
+        
+        data_dir = os.path.join(self.project_path, "data")
+        for root, dirs, files in os.walk(data_dir):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, self.project_path).replace(os.sep, "/"), path
+    
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+    
+    def _store_object(self, file_path: str) -> str:
+        """Hash a file and copy it into the object store unless that content is already there"""
+        digest = _hash_file(file_path)
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            _copy_atomic(file_path, object_path)
+        return digest
+    
+    def list(self) -> List[str]:
+        """Snapshot names, oldest first"""
+        if not os.path.isdir(self.project_path):
+            return []
+        return sorted(name for name in os.listdir(self.project_path)
+                      if name.startswith(SNAPSHOT_PREFIX) and os.path.isdir(os.path.join(self.project_path, name)))
+    
+    def latest(self) -> Optional[str]:
+        snapshots = self.list()
+        return snapshots[-1] if snapshots else None
+    
+    def manifest(self, name: str) -> Dict[str, str]:
+        """Relative path -> content hash; backups made before manifests existed are hashed file by file"""
+        snapshot_dir = os.path.join(self.project_path, name)
+        try:
+            with open(os.path.join(snapshot_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        files = {}
+        for root, dirs, names in os.walk(snapshot_dir):
+            dirs.sort()
+            for file_name in sorted(names):
+                path = os.path.join(root, file_name)
+                relative = os.path.relpath(path, snapshot_dir).replace(os.sep, "/")
+                if relative != MANIFEST_FILE:
+                    files[relative] = _hash_file(path)
+        return files
+    
+    def create(self) -> str:
+        """Snapshot the current training data, reusing the latest snapshot when nothing changed since"""
+        files = {relative: self._store_object(path) for relative, path in self._live_files()}
+        
+        latest = self.latest()
+        if latest and self.manifest(latest) == files:
+            log_activity("Training", f"Training data unchanged since {latest}, reusing it")
+            return latest
+        
+        name = f"{SNAPSHOT_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        # Built under a name the listing ignores, so a half-written snapshot is never restored
+        staging_dir = tempfile.mkdtemp(dir=self.project_path, prefix=".staging_")
+        try:
+            linked = 0
+            for relative, digest in files.items():
+                target = os.path.join(staging_dir, *relative.split("/"))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                try:
+                    os.link(self._object_path(digest), target)
+                    linked += 1
+                except OSError:
+                    # No hardlinks on this filesystem
+                    shutil.copy2(self._object_path(digest), target)
+            
+            with open(os.path.join(staging_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                json.dump({"created": datetime.now().isoformat(), "files": files}, f, indent=2)
+            os.rename(staging_dir, os.path.join(self.project_path, name))
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        
+        log_activity("Training", f"Snapshot {name}: {len(files)} files, {linked} hardlinked")
+        self.prune()
+        return name
+    
+    def restore(self, name: str = None) -> List[str]:
+        """Bring the training data back to a snapshot (the latest by default), rewriting only files that differ"""
+        name = name or self.latest()
+        if name is None:
+            return []
+        
+        snapshot_dir = os.path.join(self.project_path, name)
+        files = self.manifest(name)
+        changed = []
+        for relative, digest in files.items():
+            live_path = os.path.join(self.project_path, *relative.split("/"))
+            if os.path.isfile(live_path) and _hash_file(live_path) == digest:
+                continue
+            _copy_atomic(os.path.join(snapshot_dir, *relative.split("/")), live_path)
+            changed.append(relative)
+        
+        # Files created after the snapshot was taken
+        for relative, path in list(self._live_files()):
+            if relative not in files:
+                os.unlink(path)
+                changed.append(relative)
+        
+        log_activity("Training", f"Restored {len(changed)} changed files from {name}")
+        return changed
+    
+    def prune(self) -> List[str]:
+        """Drop snapshots beyond the retention count or age limit (never the newest), then unreferenced objects"""
+        snapshots = self.list()
+        keep = set(snapshots[-self.retention:]) if self.retention else set(snapshots)
+        if self.max_age_days:
+            cutoff = time.time() - self.max_age_days * 86400
+            keep = {name for name in keep if os.path.getmtime(os.path.join(self.project_path, name)) >= cutoff}
+        if snapshots:
+            keep.add(snapshots[-1])
+        removable = [name for name in snapshots if name not in keep]
+        
+        for name in removable:
+            shutil.rmtree(os.path.join(self.project_path, name), ignore_errors=True)
+        
+        # Link counts say nothing where snapshots hold copies, so referenced objects come from the manifests
+        referenced = set()
+        for name in self.list():
+            referenced.update(self.manifest(name).values())
+        
+        collected = 0
+        for root, _, names in os.walk(self.objects_dir):
+            for file_name in names:
+                if file_name in referenced:
+                    continue
+                try:
+                    os.unlink(os.path.join(root, file_name))
+                    collected += 1
+                except OSError:
+                    continue
+        
+        if removable or collected:
+            log_activity("Training", f"Pruned {len(removable)} snapshots and {collected} unreferenced objects")
+        return removable
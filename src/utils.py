@@ -3,6 +3,7 @@ import os
 import logging
 from datetime import datetime
 from typing import Any, Dict, List, Optional
+import re
 import shutil
 import tempfile
 
@@ -204,8 +205,6 @@ def initialize_data_files() -> None:
         # Define required files and their default structures
         required_files = {
             Config.LOGS_FILE: [],
-            Config.CHAT_HISTORY_FILE: [],
-            Config.FEEDBACK_DATA_FILE: [],
             os.path.join(Config.DATA_DIR, "processed_reviews.json"): [],
             os.path.join(Config.DATA_DIR, "rejected.json"): [],
             os.path.join(Config.DATA_DIR, "settings.json"): {"feedback_threshold": 5}
@@ -235,6 +234,12 @@ def initialize_data_files() -> None:
                 # Force create with default structure
                 safe_save_json(file_path, default_structure)
         
+        # Feedback and chat history have their own stores; opening them migrates the legacy JSON lists
+        from src.feedback_store import get_feedback_store
+        from src.chat_ring_buffer import get_chat_store
+        get_feedback_store()
+        get_chat_store()
+        
         log_activity("System", "Data files initialized successfully")
         
     except Exception as e:
@@ -247,8 +252,6 @@ def cleanup_data_files() -> None:
         
         files_to_clean = [
             Config.LOGS_FILE,
-            Config.CHAT_HISTORY_FILE,
-            Config.FEEDBACK_DATA_FILE,
             os.path.join(Config.DATA_DIR, "processed_reviews.json"),
             os.path.join(Config.DATA_DIR, "rejected.json"),
             os.path.join(Config.DATA_DIR, "settings.json")
@@ -273,6 +276,13 @@ def get_timestamp() -> str:
     """Get current timestamp in ISO format"""
     return datetime.now().isoformat()
 
+def normalize_query(text: str) -> str:
+    """Normalize a user query for matching identical questions"""
+    if not text:
+        return ""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
 def validate_json_file(file_path: str) -> bool:
     """Validate if a JSON file is properly formatted"""
     try:
@@ -3,12 +3,19 @@
 
 import sys
 import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from types import SimpleNamespace
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.utils import log_activity, initialize_data_files
 from src.feedback_manager import FeedbackManager
 from src.analytics import Analytics
 from config.config import Config
+from src.feedback_clustering import cluster_feedback
+from src.training_snapshots import SnapshotStore
 
 def test_logging():
     print("Testing logging...")
@@ -55,6 +62,137 @@ def test_chat_history():
     except Exception as e:
         print(f"✗ Chat history failed: {e}")
 
+@contextmanager
+def config_overrides(**overrides):
+    """Temporarily change Config attributes"""
+    previous = {name: getattr(Config, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(Config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(Config, name, value)
+
+class EchoModel:
+    """Stands in for Gemini: answers every prompt with exactly the YAML structure it asks for"""
+    
+    def generate_content(self, prompt, **kwargs):
+        blocks = re.findall(r"(=== ITEM (\d+) ===\n.*?=== END ITEM \2 ===)", prompt, re.DOTALL)
+        if blocks:
+            text = "\n\n".join(block for block, _ in blocks)
+        else:
+            text = prompt.split("GENERATE EXACTLY THIS STRUCTURE:\n\n")[1].split("\n\nCRITICAL")[0]
+        return SimpleNamespace(text=text, usage_metadata=None)
+
+TRAINING_QUERIES = ["printer not working", "printer not connecting to wifi", "printer not printing color",
+                    "printer not found", "vpn keeps dropping", "vpn keeps asking password",
+                    "email not syncing", "email not sending"]
+
+def run_training(concurrency, batch_size, token_budget=0):
+    """One review-processing run on a copy of the Rasa project; returns (manager, processed ids, new intents, result)"""
+    from src.training_manager import TrainingManager
+    from src.training_corpus import TrainingCorpus
+    
+    with tempfile.TemporaryDirectory() as project_dir:
+        shutil.copytree(os.path.join(Config.RASA_PROJECT_PATH, "data"), os.path.join(project_dir, "data"))
+        shutil.copy(os.path.join(Config.RASA_PROJECT_PATH, "domain.yml"), project_dir)
+        
+        with config_overrides(RASA_PROJECT_PATH=project_dir, GEMINI_CONCURRENCY=concurrency, GEMINI_BATCH_SIZE=batch_size,
+                              GENERATION_CACHE_ENABLED=False, TRAINING_PRIORITY_ENABLED=False,
+                              FEEDBACK_CLUSTERING_ENABLED=False, GEMINI_RATE_LIMIT_PER_MINUTE=60000,
+                              GEMINI_RATE_LIMIT_BURST=100):
+            existing = TrainingCorpus().names["nlu"]
+            manager = TrainingManager()
+            manager.model = EchoModel()
+            manager.feedback_threshold = len(TRAINING_QUERIES) + 1
+            
+            feedback = [{"id": str(i), "user_query": query, "feedback_type": "negative", "expected_answer": f"Answer {i}"}
+                        for i, query in enumerate(TRAINING_QUERIES)]
+            processed = []
+            manager._get_truly_unprocessed_feedback = lambda: feedback
+            manager._mark_reviews_as_processed = lambda reviews: processed.extend(review["id"] for review in reviews)
+            manager._mark_reviews_as_rejected = lambda reviews: None
+            manager._update_feedback_retry_counts = lambda *args: None
+            
+            result = manager.process_feedback_for_training(token_budget=token_budget)
+            intents = [entry["intent"] for entry in TrainingCorpus().data["nlu"]["nlu"] if entry["intent"] not in existing]
+            return manager, processed, intents, result
+
+def test_training_pipeline():
+    print("Testing training pipeline...")
+    try:
+        import google.generativeai
+    except ImportError:
+        print("- Skipped: google-generativeai is not installed")
+        return
+    
+    serial, processed, serial_intents, _ = run_training(1, 1)
+    assert sorted(processed) == sorted(str(i) for i in range(len(TRAINING_QUERIES))), processed
+    assert len(set(serial_intents)) == len(TRAINING_QUERIES), serial_intents
+    assert serial.gemini_calls == len(TRAINING_QUERIES), serial.gemini_calls
+    
+    # Items in flight share base names, yet each gets its own intent on the first call, in backlog order
+    for concurrency, batch_size, expected_calls in ((4, 1, len(TRAINING_QUERIES)), (4, 4, 2)):
+        manager, processed, intents, _ = run_training(concurrency, batch_size)
+        assert len(processed) == len(TRAINING_QUERIES), (concurrency, batch_size, processed)
+        assert intents == serial_intents, (concurrency, batch_size, intents)
+        assert manager.gemini_calls == expected_calls, (concurrency, batch_size, manager.gemini_calls)
+    print("✓ Concurrent and batched generation match the serial run")
+    
+    for concurrency, batch_size in ((1, 1), (4, 1), (4, 4)):
+        _, processed, _, result = run_training(concurrency, batch_size, token_budget=1500)
+        assert len(processed) < len(TRAINING_QUERIES) and "deferred by budget" in result, (concurrency, batch_size, result)
+    print("✓ Token budget defers the rest of the backlog")
+
+def test_feedback_clustering():
+    print("Testing feedback clustering...")
+    feedback = [
+        {"id": "1", "user_query": "reset my password", "feedback_type": "negative", "expected_answer": "Use the self-service portal"},
+        {"id": "2", "user_query": "Reset my password!", "feedback_type": "negative", "expected_answer": ""},
+        {"id": "3", "user_query": "reset my vpn password", "feedback_type": "negative", "expected_answer": "Call the VPN desk"}
+    ]
+    clusters = cluster_feedback(feedback, threshold=0.65)
+    assert [[member["id"] for member in cluster.members] for cluster in clusters] == [["1", "2"], ["3"]]
+    print("✓ Different expected answers stay in separate clusters")
+
+def test_training_snapshots():
+    print("Testing training snapshots...")
+    link = os.link
+    with tempfile.TemporaryDirectory() as project_dir:
+        os.makedirs(os.path.join(project_dir, "data"))
+        with open(os.path.join(project_dir, "domain.yml"), "w") as f:
+            f.write("version: '3.1'\n")
+        store = SnapshotStore(project_dir, retention=2, max_age_days=0)
+        
+        def write_nlu(text):
+            with open(os.path.join(project_dir, "data", "nlu.yml"), "w") as f:
+                f.write(text)
+        
+        def object_count():
+            return sum(len(names) for _, _, names in os.walk(store.objects_dir))
+        
+        def no_link(source, target):
+            raise OSError("hardlinks not supported")
+        
+        # Filesystems without hardlinks fall back to copies, which must not defeat deduplication
+        os.link = no_link
+        try:
+            for version in range(3):
+                write_nlu(f"version: '3.1'\nnlu: []\n# {version}\n")
+                store.create()
+        finally:
+            os.link = link
+        
+        assert len(store.list()) == 2, store.list()
+        assert object_count() == 3, object_count()
+        
+        write_nlu("broken")
+        store.restore(store.list()[0])
+        with open(os.path.join(project_dir, "data", "nlu.yml")) as f:
+            assert f.read().endswith("# 1\n")
+    print("✓ Snapshots deduplicate, prune and restore")
+
 if __name__ == "__main__":
     print("=== Testing MetaConverse Components ===")
     initialize_data_files()
@@ -62,4 +200,7 @@ if __name__ == "__main__":
     test_feedback()
     test_analytics()
     test_chat_history()
+    test_training_pipeline()
+    test_feedback_clustering()
+    test_training_snapshots()
     print("=== Test Complete ===")
@@ -1,23 +1,27 @@
 import json
 import os
+import struct
+import tempfile
+import zlib
 from config.config import Config
+from src.feedback_store import FeedbackStore
+from src.chat_ring_buffer import ChatRingBuffer, HEADER_SIZE, SLOT_HEADER_FORMAT
+from src.data_transfer import export_feedback, import_feedback
 
 # Test the data files
 def test_data_files():
     print("Testing data files...")
     
     # Test chat history
-    if os.path.exists(Config.CHAT_HISTORY_FILE):
-        with open(Config.CHAT_HISTORY_FILE, 'r') as f:
-            chat_history = json.load(f)
+    if os.path.exists(Config.CHAT_HISTORY_STORE_FILE) or os.path.exists(Config.CHAT_HISTORY_FILE):
+        chat_history = ChatRingBuffer().read_last()
         print(f"Chat history entries: {len(chat_history)}")
     else:
         print("Chat history file does not exist")
     
     # Test feedback data
-    if os.path.exists(Config.FEEDBACK_DATA_FILE):
-        with open(Config.FEEDBACK_DATA_FILE, 'r') as f:
-            feedback_data = json.load(f)
+    if any(os.path.exists(path) for path in (Config.FEEDBACK_STORE_DIR, Config.FEEDBACK_STORE_FILE, Config.FEEDBACK_DATA_FILE)):
+        feedback_data = FeedbackStore().all()
         print(f"Feedback entries: {len(feedback_data)}")
     else:
         print("Feedback data file does not exist")
@@ -30,5 +34,51 @@ def test_data_files():
     else:
         print("Logs file does not exist")
 
+def test_data_transfer():
+    print("Testing feedback import/export...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = FeedbackStore(os.path.join(temp_dir, "store"), legacy_file=os.path.join(temp_dir, "none.json"))
+        source = os.path.join(temp_dir, "feedback.jsonl")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"user_query": "vpn down", "feedback_type": "negative", "expected_answer": "Restart it"}) + "\n")
+            f.write(json.dumps({"id": "f2", "user_query": "wifi", "feedback_type": "positive", "timestamp": "2026-01-02T00:00:00"}) + "\n")
+            f.write("not json\n")
+        
+        first = import_feedback(source, store=store)
+        # Lines without an id or timestamp must hash to the same id on every import
+        second = import_feedback(source, store=store)
+        assert (first["imported"], first["invalid"]) == (2, 1), first
+        assert (second["imported"], second["duplicates"]) == (0, 2), second
+        assert len(store.all()) == 2
+        
+        exported = os.path.join(temp_dir, "export.jsonl.gz")
+        assert export_feedback(exported, store=store)["exported"] == 2
+        copy = FeedbackStore(os.path.join(temp_dir, "copy"), legacy_file=os.path.join(temp_dir, "none.json"))
+        assert import_feedback(exported, store=copy)["imported"] == 2
+        assert {record["id"] for record in copy.all()} == {record["id"] for record in store.all()}
+    print("✓ Re-imports deduplicate and exports round-trip")
+
+def test_chat_ring_buffer():
+    print("Testing chat ring buffer...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store_file = os.path.join(temp_dir, "chat.ring")
+        ring = ChatRingBuffer(store_file, capacity=4, slot_size=256, legacy_file="")
+        ring.append_many([{"id": str(i)} for i in range(6)])
+        assert [turn["id"] for turn in ring.read_last()] == ["2", "3", "4", "5"]
+        
+        # Crash after writing the next turn over the oldest slot but before the header update
+        sequence = ring._read_header()["head"]
+        payload = json.dumps({"id": "6"}).encode("utf-8")
+        with open(store_file, "r+b") as f:
+            f.seek(HEADER_SIZE + (sequence % 4) * 256)
+            f.write(struct.pack(SLOT_HEADER_FORMAT, sequence, len(payload), zlib.crc32(payload)) + payload)
+        assert [turn["id"] for turn in ring.read_last()] == ["3", "4", "5"]
+        
+        ring.append({"id": "6"})
+        assert [turn["id"] for turn in ChatRingBuffer(store_file, capacity=4, slot_size=256, legacy_file="").read_last()] == ["3", "4", "5", "6"]
+    print("✓ Ring buffer wraps and skips a torn slot")
+
 if __name__ == "__main__":
     test_data_files()
+    test_data_transfer()
+    test_chat_ring_buffer()